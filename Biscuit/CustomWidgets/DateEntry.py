@@ -1,6 +1,9 @@
-from tkinter import Entry, Frame, FLAT, Label, END, SUNKEN, LEFT
+from tkinter import (Entry, Frame, FLAT, Label, END, SUNKEN, LEFT,
+                     StringVar, Variable)
 from datetime import datetime
 
+from Biscuit.Management import bind_value
+
 """
 Code c/o pydesigner from stackoverflow:
 https://stackoverflow.com/a/13243973
@@ -61,6 +64,9 @@ class DateEntry(Frame):
         self.entry_3.pack(side=LEFT, fill='x', expand=True)
 
         self.entries = [self.entry_1, self.entry_2, self.entry_3]
+        # the Variables bound to the Values of the file object being displayed
+        self._vars = []
+        self._unbind = []
 
     def _check_new(self, wid, max_length, new_val, old_val):
         """ Determine whether the value entered is valid
@@ -128,9 +134,19 @@ class DateEntry(Frame):
 
         Parameters:
         -----------
-        value : tuple of StringVar's
-            The value to set the date to
+        value : tuple of StringVar's or Value's
+            The value to set the date to. Any Value's (of a file object) are
+            bound to a StringVar while they are displayed.
         """
-        self.entry_1.config(textvariable=value[0])
-        self.entry_2.config(textvariable=value[1])
-        self.entry_3.config(textvariable=value[2])
+        for unbind in self._unbind:
+            unbind()
+        self._unbind = []
+        self._vars = []
+        for entry, var in zip(self.entries, value):
+            if not isinstance(var, Variable):
+                file_value = var
+                var = StringVar()
+                self._unbind.append(bind_value(var, file_value))
+                # the Tcl variable is deleted along with the Variable
+                self._vars.append(var)
+            entry.config(textvariable=var)
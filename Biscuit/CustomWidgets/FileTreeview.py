@@ -1,6 +1,6 @@
 import os.path as op
-import os
 
+from Biscuit.utils.dir_snapshot import get_dir_snapshot, folder_key
 from .EnhancedTreeview import EnhancedTreeview
 
 
@@ -11,14 +11,41 @@ class FileTreeview(EnhancedTreeview):
 
         self.root_path = op.normpath(directory)
 
+        # the sid of each file and folder in the treeview, by path
         self.index_cache = dict()
+        # folders which have been listed and folders which only have a
+        # placeholder entry as they haven't been yet
+        self._listed = set()
+        self._unlisted = set()
+        # the key of each listed folder when it was listed (see
+        # `Biscuit.utils.dir_snapshot.folder_key`). Only the folders whose key
+        # has changed since need to be listed again when refreshing.
+        self._folder_keys = dict()
+        # the contents of the folders are listed from the snapshot if they
+        # haven't changed since the last time they were listed
+        self.snapshot = get_dir_snapshot()
 
 #region public methods
 
+    def delete(self, *items):
+        """ Delete the entries and everything in them from the treeview """
+        for item in items:
+            for sid in self.all_children(item):
+                values = self.item(sid, option='values')
+                if len(values) > 1 and self.index_cache.get(values[1]) == sid:
+                    del self.index_cache[values[1]]
+                self._listed.discard(sid)
+                self._unlisted.discard(sid)
+                self._folder_keys.pop(sid, None)
+        super(FileTreeview, self).delete(*items)
+
     def generate(self, parent, directory=""):
         """
-        Iterate over the folder structure and add all found files to the
-        treeview.
+        Add the files and folders in a folder to the treeview.
+
+        Only the folder itself is listed. The folders within it are added with
+        a placeholder entry and are listed once they are opened or an entry
+        within them is needed (see `populate` and `reveal`).
 
         Parameters
         ----------
@@ -27,6 +54,11 @@ class FileTreeview(EnhancedTreeview):
         directory : str | path-like object
             The path which is to have all the files listed from.
 
+        Returns
+        -------
+        added_sids : list of str
+            The sids of the entries added to the treeview.
+
         """
         dir_ = directory
 
@@ -34,40 +66,50 @@ class FileTreeview(EnhancedTreeview):
         # set the panel on the right hand side to have a message that no folder
         # has been selected as the base one and give details on how to set it.
         if dir_ == "":
-            return
+            return []
 
-        # create a mapping of full paths to id's
-        curr_children = self.get_children(parent)
-        file_list = dict(
-            zip([self.item(child)['values'][1] for child in
-                 curr_children], curr_children))
+        if parent == '':
+            self.index_cache.pop(self.root_path, None)
+            self.root_path = op.normpath(dir_)
+            self.index_cache[self.root_path] = ''
+        self._listed.add(parent)
 
+        # create a mapping of full paths to id's
+        file_list = self._child_paths(parent)
         # we want to put folders above files (it looks nicer!!)
-        for file in os.listdir(dir_):
-            try:
-                fullpath = op.normpath(op.join(dir_, file))
-
-                # need to check to see whether or not the file/folder already
-                # exists in the tree:
-                exists_id = file_list.get(fullpath, None)
-                if op.isdir(fullpath):
-                    if exists_id is None:
-                        exists_id = self.ordered_insert(parent,
-                                                        values=['', fullpath],
-                                                        text=file,
-                                                        open=False)
-                    self.generate(exists_id, directory=fullpath)
+        entries = sorted(self._listdir(parent, dir_),
+                         key=lambda entry: (not entry[1], entry[0].lower()))
+
+        added_sids = []
+        has_fif = False
+        for name, is_dir in entries:
+            fullpath = op.normpath(op.join(dir_, name))
+            # need to check to see whether or not the file/folder already
+            # exists in the tree:
+            if fullpath in file_list:
+                continue
+            if is_dir:
+                if len(file_list) == 0:
+                    sid = self.insert(parent, 'end', values=['', fullpath],
+                                      text=name, open=False)
                 else:
-                    fname, ext = op.splitext(file)
-                    if exists_id is None:
-                        self.insert(parent, 'end',
-                                    values=[ext, fullpath],
-                                    text=fname, open=False,
-                                    tags=(ext))
-            except PermissionError:
-                # user doesn't have sufficient permissions to open folder so it
-                # won't be included
-                pass
+                    sid = self.ordered_insert(parent, values=['', fullpath],
+                                              text=name, open=False)
+                self._add_placeholder(sid)
+            else:
+                fname, ext = op.splitext(name)
+                has_fif |= ext == '.fif'
+                if len(file_list) == 0:
+                    sid = self.insert(parent, 'end', values=[ext, fullpath],
+                                      text=fname, open=False, tags=(ext))
+                else:
+                    sid = self.ordered_insert(parent, values=[ext, fullpath],
+                                              text=fname, open=False,
+                                              tags=(ext))
+            added_sids.append(sid)
+        if has_fif:
+            self.group_split_fif(parent)
+        return added_sids
 
     def get_filepath(self, sid):
         """ Return the file path corresponding to the provided sid """
@@ -77,15 +119,54 @@ class FileTreeview(EnhancedTreeview):
         """ Return the text corresponding to the provided sid """
         return self.item(sid)['text']
 
+    def group_split_fif(self, parent):
+        """
+        Show each recording split over multiple .fif files in the folder as a
+        single entry by moving the later parts under the entry of the first
+        part.
+
+        Parameters
+        ----------
+        parent : str
+            The sid of the folder in the treeview.
+
+        """
+        # mne is only needed once there are .fif files to read
+        from Biscuit.FileTypes.fif_header import split_fif_index
+        directory = self._path(parent)
+        children = self._child_paths(parent)
+        for main, parts in split_fif_index(directory).items():
+            main_sid = children.get(op.normpath(op.join(directory, main)))
+            if main_sid is None:
+                continue
+            for i, part in enumerate(parts[1:]):
+                sid = children.get(op.normpath(op.join(directory, part)))
+                if sid is not None:
+                    self.move(sid, main_sid, i)
+
     def index(self):
         """ Create a cache of the file information in a flattened way to allow
-        fast comparison of existing and new data """
+        fast comparison of existing and new data
+
+        The cache is kept up to date as entries are added and removed, so this
+        only needs to be called if the treeview has been modified directly.
+        """
         for sid in self.all_children():
             if sid != '':
-                self.index_cache[self.item(sid)['values'][1]] = sid
+                path = self.item(sid)['values'][1]
+                if path != '':
+                    self.index_cache[path] = sid
             else:
                 self.index_cache[self.root_path] = ''
 
+    def insert(self, parent, index, iid=None, **kw):
+        """ Insert an entry into the treeview and the cache of file paths """
+        sid = super(FileTreeview, self).insert(parent, index, iid, **kw)
+        values = kw.get('values', None)
+        if values and values[1] != '':
+            self.index_cache[op.normpath(values[1])] = sid
+        return sid
+
     def ordered_insert(self, parent, *args, **kwargs):
         """
         Allows for objects to be inserted in the correct location
@@ -127,44 +208,84 @@ class FileTreeview(EnhancedTreeview):
             return self.insert(parent, index, *args, **kwargs)
         raise ValueError("No 'text' argument provided.")
 
+    def populate(self, sid):
+        """
+        List the contents of the folder with the given sid if they haven't
+        been already.
+        Returns a list of any added sid's.
+        """
+        if sid not in self._unlisted:
+            return []
+        self._unlisted.discard(sid)
+        # remove the placeholder
+        self.delete(*self.get_children(sid))
+        return self.generate(sid, self.get_filepath(sid))
+
     def refresh(self):
         """
         Refresh the treeview to include any newly added or removed files.
+        Only folders which have been listed are checked, the rest are listed
+        once needed anyway, and only the folders which have been modified
+        since they were listed are listed again.
         Returns a list of any added sid's.
         """
         curr_selection = self.focus()
         added_sids = []
-        added_files, removed_files = self._find_folder_diff()
-        # sort by length to ensure that any new folders are generated first
-        added_files.sort(key=lambda x: len(x))
-        # reverse sort the removed files to go from the ends of the branches
-        removed_files.sort(key=lambda x: len(x), reverse=True)
-        # add any new files to the file tree
-        # TODO: check any file to see if it has a parent that is a BIDSObject
-        # (ie. BIDSTree, Project, Subject, Session), and if so then
-        # instantiate the folder as the child object and add it.
-        for fullpath in added_files:
-            base, file = op.split(fullpath)
-            parent = self.sid_from_filepath(base)
-            fname, ext = op.splitext(file)
-
-            #if op.isdir(fullpath):
-            sid = self.ordered_insert(parent,
-                                      values=[ext, fullpath],
-                                      text=fname,
-                                      open=False)
-            self.index_cache[fullpath] = sid
-            added_sids.append(sid)
-        # remove any removed files from the filetree
-        for fpath in removed_files:
-            sid = self.index_cache[fpath]
-            self.delete(sid)
-            del self.index_cache[fpath]
-            # TODO: remove from main.preloaded_data somehow??
-        if curr_selection not in self.index_cache.values():
+        # go from the root down so that the contents of removed folders are
+        # removed with them
+        for sid in sorted(self._listed, key=lambda x: len(self._path(x))):
+            if sid not in self._listed:
+                continue
+            directory = self._path(sid)
+            try:
+                key = folder_key(directory)
+            except OSError:
+                # the folder has been removed
+                continue
+            if key is not None and key == self._folder_keys.get(sid):
+                continue
+            added_files, removed_files = self._find_folder_diff(sid)
+            # TODO: check any file to see if it has a parent that is a
+            # BIDSObject (ie. BIDSTree, Project, Subject, Session), and if so
+            # then instantiate the folder as the child object and add it.
+            for fpath in removed_files:
+                child = self.index_cache[fpath]
+                if not self._is_folder(child):
+                    # keep any parts of a split .fif file which still exist
+                    for part in self.get_children(child):
+                        self.move(part, self.parent(child), 'end')
+                self.delete(child)
+                # TODO: remove from main.preloaded_data somehow??
+            if len(added_files) != 0:
+                added_sids.extend(self.generate(sid, directory))
+        if curr_selection != '' and not self.exists(curr_selection):
             self.selection_set([''])
         return added_sids
 
+    def reveal(self, fpath):
+        """
+        List the contents of each folder containing the file or folder so
+        that it is in the treeview.
+        Returns a list of any added sid's.
+        """
+        path_ = op.dirname(op.normpath(fpath))
+        # find the closest folder which is in the treeview
+        folders = []
+        while path_ not in self.index_cache:
+            folders.append(path_)
+            parent = op.dirname(path_)
+            if parent == path_:
+                # the path isn't within the root folder
+                return []
+            path_ = parent
+        added_sids = self.populate(self.index_cache[path_])
+        for path_ in reversed(folders):
+            sid = self.index_cache.get(path_, None)
+            if sid is None:
+                break
+            added_sids.extend(self.populate(sid))
+        return added_sids
+
     def sid_from_filepath(self, fpath, search=True):
         """ Return the sid in the treeview with the given filepath
 
@@ -173,34 +294,16 @@ class FileTreeview(EnhancedTreeview):
         fpath : str
             Filepath to match
         search : bool
-            Whether to force a search for the file path.
-            This is required when we do a refresh as the file path may not have
-            been added to the index_cache.
+            Whether to list the folders containing the file if they haven't
+            been already. If False only the files currently in the treeview
+            are checked.
 
         """
         # Normalise the path just to ensure there are no issues.
         fpath = op.normpath(fpath)
-        try:
-            return self.index_cache[fpath]
-        except KeyError:
-            if not search:
-                raise
-            # In this case the file isn't in the cache, however it may still
-            # be in the tree. Recurse up the base paths until an object is
-            # found then follow it back down.
-            temp_fpath = op.dirname(fpath)
-            while True:
-                if temp_fpath in self.index_cache:
-                    sid = self.index_cache[temp_fpath]
-                    for child in self.all_children(item=sid):
-                        if self.item(child)['values'][1] == fpath:
-                            return child
-                _temp_fpath = op.dirname(temp_fpath)
-                # ensure we cannot get stuck in an infinte loop
-                if _temp_fpath != temp_fpath:
-                    temp_fpath = _temp_fpath
-                else:
-                    raise
+        if search and fpath not in self.index_cache:
+            self.reveal(fpath)
+        return self.index_cache[fpath]
 
     def sid_from_text(self, text, _all=False):
         """ Return the sid(s) in the treeview with the given text
@@ -224,42 +327,56 @@ class FileTreeview(EnhancedTreeview):
 
 #region private methods
 
-    def _find_added_files(self):
-        """ Return a list of all files paths in the folder that don't currently
-        exist in the current file treeview
-        """
-        new_files = []
-        for root, dirs, files in os.walk(self.root_path):
-            # add all the new files
-            for file in files:
-                fpath = op.normpath(op.join(root, file))
-                if self.index_cache.get(fpath, None) is None:
-                    new_files.append(fpath)
-            # add all the new folders
-            for dir_ in dirs:
-                fpath = op.normpath(op.join(root, dir_))
-                if self.index_cache.get(fpath, None) is None:
-                    new_files.append(fpath)
-        return new_files
-
-    def _find_folder_diff(self):
-        """ Create a list of all the files and folders contained within
-        self.root_path
+    def _add_placeholder(self, sid):
+        """ Give the folder a placeholder entry so that it can be opened
+        before its contents are listed """
+        self.insert(sid, 'end', text='', values=['', ''])
+        self._unlisted.add(sid)
+
+    def _child_paths(self, parent):
+        """ Return a mapping of the paths of the entries in the folder to their
+        sids, including the parts of split .fif files which are shown under the
+        first part """
+        children = dict()
+        for child in self.get_children(parent):
+            children[self._path(child)] = child
+            if not self._is_folder(child):
+                for part in self.get_children(child):
+                    children[self._path(part)] = part
+        return children
+
+    def _find_folder_diff(self, sid):
+        """ Compare the contents of a listed folder with its entries in the
+        treeview
 
         Returns:
         (List of added files/folders, List of removed files/folders)
         """
-        contained_files = set()
-        for root, dirs, files in os.walk(self.root_path):
-            # add all the new files
-            for file in files:
-                fpath = op.normpath(op.join(root, file))
-                contained_files.add(fpath)
-            # add all the new folders
-            for dir_ in dirs:
-                fpath = op.normpath(op.join(root, dir_))
-                contained_files.add(fpath)
-        prev_files = set(self.index_cache.keys())
-        removed_files = (prev_files - contained_files) - set([self.root_path])
+        directory = self._path(sid)
+        contained_files = set(op.normpath(op.join(directory, name)) for
+                              name, _ in self._listdir(sid, directory))
+        prev_files = set(self._child_paths(sid).keys())
+        removed_files = prev_files - contained_files
         added_files = contained_files - prev_files
         return (list(added_files), list(removed_files))
+
+    def _is_folder(self, sid):
+        return sid in self._listed or sid in self._unlisted
+
+    def _listdir(self, sid, directory):
+        """ Return the name of each entry in the folder and whether it is a
+        folder, and keep the key of the folder so that it is only listed again
+        once it has changed """
+        try:
+            entries, key = self.snapshot.listdir(directory)
+        except PermissionError:
+            # user doesn't have sufficient permissions to open folder so it
+            # won't be included
+            entries, key = [], None
+        self._folder_keys[sid] = key
+        return entries
+
+    def _path(self, sid):
+        if sid == '':
+            return self.root_path
+        return self.get_filepath(sid)
@@ -1,11 +1,11 @@
-from tkinter import ALL
+from tkinter import ALL, Variable, StringVar, BooleanVar
 # import this specifically like this because we can actually set the bg colour
 from tkinter import Entry as tkEntry
 from tkinter import Checkbutton as tkCheckbutton
 from tkinter.ttk import Label, Frame, Checkbutton, Combobox, Entry
 
 from Biscuit.utils.utils import clear_widget
-from Biscuit.Management import ToolTipManager
+from Biscuit.Management import ToolTipManager, bind_value
 from Biscuit.utils.constants import OSCONST
 
 ttm = ToolTipManager()
@@ -19,6 +19,9 @@ class InfoMaster():
         self._value = value
 
         self._validate_cmd = validate_cmd
+        # the Variable bound to the Value of the file object being displayed
+        self._var = None
+        self._unbind = None
 
     def set_bads_callback(self, bad_values=None, associated_data=None):
         pass
@@ -34,6 +37,16 @@ class InfoMaster():
         """ a method to be overwridden by other classes """
         pass
 
+    def _bind(self, value, var):
+        """Return the Variable bound to the value of a file object, removing
+        the binding to any previously displayed value."""
+        if self._unbind is not None:
+            self._unbind()
+        self._unbind = bind_value(var, value)
+        # the Tcl variable is deleted along with the Variable so it is kept
+        self._var = var
+        return var
+
     def tooltip(self, text):
         """ Register the text specified with the tool tip manager (ttm) for
         both label and value widgets """
@@ -165,6 +178,8 @@ class InfoEntry(InfoMaster):
             self._value.check_valid()
 
     def _set_value(self, value):
+        if not isinstance(value, Variable):
+            value = self._bind(value, StringVar())
         self._value.config(textvariable=value)
 
     @property
@@ -205,6 +220,8 @@ class InfoCheck(InfoMaster):
                                       command=self._validate_cmd)
 
     def _set_value(self, value):
+        if not isinstance(value, Variable):
+            value = self._bind(value, BooleanVar())
         self._value.config(variable=value)
 
     @property
@@ -5,10 +5,10 @@ This class shouldn't ever be instantiated directly, only to be used as a base
 class or tested for with `issubclass`.
 """
 
-from tkinter import StringVar, ACTIVE, DISABLED
+from tkinter import ACTIVE, DISABLED
 
-from Biscuit.Management import OptionsVar
 from .FileInfo import FileInfo
+from .states import Value, OptionsValue
 from Biscuit.utils.utils import flatten, generate_readme
 
 
@@ -26,21 +26,21 @@ class BIDSContainer(FileInfo):
 
     def _create_vars(self):
         FileInfo._create_vars(self)
-        self.proj_name = StringVar()
+        self.proj_name = Value()
         self.proj_name.trace("w", self.check_projname_change)
-        self.session_ID = StringVar(value='1')
+        self.session_ID = Value('1')
         self.session_ID.trace("w", self.validate)
         # This will be a list of BIDSFile's which have their data extracted
         # and passed to mne_bids.
         self.jobs = set()
 
         # subject info
-        self.subject_ID = StringVar()
+        self.subject_ID = Value()
         self.subject_ID.trace("w", self.validate)
         # self.subject_age format [DD, MM, YYYY]
-        self.subject_age = [StringVar(), StringVar(), StringVar()]
-        self.subject_gender = OptionsVar(options=['M', 'F', 'U'])
-        self.subject_group = OptionsVar(options=['Participant', 'Control'])
+        self.subject_age = [Value(), Value(), Value()]
+        self.subject_gender = OptionsValue(options=['M', 'F', 'U'])
+        self.subject_group = OptionsValue(options=['Participant', 'Control'])
         self.subject_group.trace("w", self._update_groups)
 
         self.contains_required_files = True
@@ -132,10 +132,9 @@ class BIDSContainer(FileInfo):
         active or not
         """
         if self.associated_tab is not None:
-            if self.valid:
-                self.associated_tab.bids_gen_btn.config({"state": ACTIVE})
-            else:
-                self.associated_tab.bids_gen_btn.config({"state": DISABLED})
+            state = ACTIVE if self.valid else DISABLED
+            self.associated_tab.bids_gen_btn.config({"state": state})
+            self.associated_tab.preview_btn.config({"state": state})
 
     def prepare(self):
         """Prepare all the data in the object to be ready for bids export"""
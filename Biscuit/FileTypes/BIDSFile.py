@@ -1,7 +1,5 @@
-from tkinter import StringVar, BooleanVar
-
 from .FileInfo import FileInfo
-from Biscuit.Management import OptionsVar
+from .states import Value, OptionsValue
 
 
 class BIDSFile(FileInfo):
@@ -26,14 +24,14 @@ class BIDSFile(FileInfo):
         # TODO: Fix
         # This is called multiple times...
         FileInfo._create_vars(self)
-        self.run = StringVar(value='1')
+        self.run = Value('1')
         self.run.trace("w", self.validate)
-        self.task = OptionsVar(options=['None'])
+        self.task = OptionsValue(options=['None'])
         self.task.trace("w", self._update_tasks)
-        self.is_junk = BooleanVar()
-        self.is_empty_room = BooleanVar()
+        self.is_junk = Value(False)
+        self.is_empty_room = Value(False)
         self.is_empty_room.trace("w", self.propagate_emptyroom_data)
-        self.has_empty_room = BooleanVar()
+        self.has_empty_room = Value(False)
 
         self.hpi = list()
 
@@ -41,13 +39,18 @@ class BIDSFile(FileInfo):
 
         self.extra_data = dict()
 
-        # event info: a list of lists. The sub-lists contains the event number
-        # and the event description
+        # event info: a list of the EventState of each event of interest
         self.event_info = list()
-        # channel info: key - channel name (?), value - something
+        # channel info: key - channel number, value - the BioChannelState of
+        # the channel
         self.channel_info = dict()
 
         self.raw = None
+        # the parameters required to read the raw data at conversion time
+        self.raw_params = None
+        # the events found when last converted and the key of the raw
+        # parameters used to find them
+        self.events_cache = None
         self.container = None
 
         # Set all BIDS files to be saved by default
@@ -116,7 +119,7 @@ class BIDSFile(FileInfo):
 
     def __setstate__(self, state):
         super(BIDSFile, self).__setstate__(state)
-        self.run.set(state.get('run', 0))
+        self.run.set(str(state.get('run', 0)))
         task = state.get('tsk', '')
         self.task.options = [task]
         self.task.set(task)
@@ -1,14 +1,11 @@
-from mne.io import read_raw_fif
-from mne.io.constants import FIFF
-from datetime import datetime
-from numpy import ndarray
-from tkinter import messagebox, StringVar, IntVar
+from datetime import datetime, timezone
+from tkinter import messagebox
 import os.path as path
-import re
 
-from Biscuit.Management import OptionsVar
+from Biscuit.utils.header_cache import cached_header
 from .BIDSFile import BIDSFile
 from .BIDSContainer import BIDSContainer
+from .states import BioChannelState, EventState
 
 
 class FIFData(BIDSContainer, BIDSFile):
@@ -24,10 +21,15 @@ class FIFData(BIDSContainer, BIDSFile):
         self.container = self
         self.jobs = set([self])
         self.info['Has Active Shielding'] = "False"
+        self.info['Parts'] = 1
         self.hpi = None
+        # the scan number, name and kind of each channel
+        self.chs = []
 
         # name of main file part
         self.mainfile_name = None
+        # paths of all the files the recording is split over
+        self.parts = [self.file]
 
         self.interesting_events = set()
 
@@ -36,61 +38,68 @@ class FIFData(BIDSContainer, BIDSFile):
         self.has_error = False
 
     def load_data(self):
-        # first, let's make sure that there are no other files in the same
-        # folder with the same name but with a number after it to indicate
-        # being part of a split file
-        fname, _ = path.splitext(self.file)
-        # TODO: this is matched for BIDS produced files. (Don't want!)
-        m = re.compile(".*-[0-9]")
-        if re.match(m, fname):
+        # numpy and mne are only imported once some data is loaded
+        from mne.io.constants import FIFF
+        from .fif_header import read_fif_header, split_fif_index
+
+        # first, let's make sure that the file isn't one of the later parts
+        # of a recording split over multiple files. These are converted with
+        # the first part.
+        name = path.basename(self.file)
+        split_index = split_fif_index(path.dirname(self.file))
+        main = self._first_part(split_index)
+        if main is not None:
             # the file is part of a larger one.
-            orig_name = ''.join(fname.split('-')[:-1])
-            self.mainfile_name = orig_name
+            self.mainfile_name, _ = path.splitext(main)
             self.requires_save = False
+            self.loaded = True
         else:
             try:
-                self.raw = read_raw_fif(self.file, verbose='ERROR')
-            except ValueError as e:
-                if 'Internal Active Shielding' in str(e):
-                    if not self.loaded_from_save:
-                        messagebox.showinfo(
-                            "Active Shield Warning",
-                            "The selected file contains active shielding "
-                            "data.\nIt can be converted but you should "
-                            "process the data.")
-                    self.raw = read_raw_fif(self.file, verbose='ERROR',
-                                            allow_maxshield=True)
-                    self.info['Has Active Shielding'] = "True"
-            finally:
-                if self.raw is None:
-                    self.has_error = True
-                    self.requires_save = False
-                    self.loaded = True
-                    # in this case the reading of the raw file
-                    raise IOError
-            self.info['Channels'] = self.raw.info['nchan']
-            rec_date = self.raw.info['meas_date']
-            if isinstance(rec_date, ndarray):
+                header = cached_header(self.file, 'fif', read_fif_header)
+                parts = split_index.get(name, [name])
+                last = cached_header(path.join(path.dirname(self.file),
+                                               parts[-1]),
+                                     'fif', read_fif_header)
+                if last['next'] is not None:
+                    raise ValueError('Part of the recording is missing.')
+            except Exception:
+                # the file can't be read
+                self.has_error = True
+                self.requires_save = False
+                self.loaded = True
+                raise IOError
+            self.chs = header['chs']
+            if header['maxshield']:
+                # don't show the message when running without the GUI
+                if not (self.loaded_from_save or
+                        getattr(self.parent, 'headless', False)):
+                    messagebox.showinfo(
+                        "Active Shield Warning",
+                        "The selected file contains active shielding "
+                        "data.\nIt can be converted but you should "
+                        "process the data.")
+                self.info['Has Active Shielding'] = "True"
+            self.info['Channels'] = header['nchan']
+            self.parts = [path.join(path.dirname(self.file), part) for part in
+                          parts]
+            self.info['Parts'] = len(self.parts)
+            if header['meas_date'] is not None:
                 self.info['Measurement date'] = datetime.fromtimestamp(
-                    rec_date[0]).strftime('%d/%m/%Y')
-            # TODO: check this still works with MNE 0.16?
-            else:
-                self.info['Measurement date'] = datetime.fromtimestamp(
-                    rec_date[0]).strftime('%d/%m/%Y')
+                    header['meas_date'], timezone.utc).strftime('%d/%m/%Y')
 
             # only pre-fill this if the file hasn't been loaded from a save
             if not self.loaded_from_save:
                 # load subject data
-                subject_info = self.raw.info['subject_info']
+                subject_info = header['subject_info']
                 if subject_info is not None:
-                    self.subject_ID.set(
-                        self.raw.info['subject_info'].get('id', ''))
-                    bday = list(self.raw.info['subject_info']['birthday'])
-                    bday.reverse()
-                    for i, num in enumerate(bday):
-                        self.subject_age[i].set(num)
+                    self.subject_ID.set(str(subject_info['id']))
+                    if subject_info['birthday'] is not None:
+                        bday = list(subject_info['birthday'])
+                        bday.reverse()
+                        for i, num in enumerate(bday):
+                            self.subject_age[i].set(str(num))
                     gender = {0: 'U', 1: 'M', 2: 'F'}.get(
-                        self.raw.info['subject_info']['sex'], 0)
+                        subject_info['sex'], 0)
                     self.subject_gender.set(gender)
                 else:
                     # TODO: raise popup to notify the user that there is no
@@ -101,13 +110,9 @@ class FIFData(BIDSContainer, BIDSFile):
                     self.subject_gender.set('U')
 
                 # load just the BIO channel info if there is any
-                for ch in self.raw.info['chs']:
-                    if ch['kind'] == FIFF.FIFFV_BIO_CH:
-                        self.channel_info[ch['scanno']] = {
-                            'ch_name': StringVar(value=ch['ch_name']),
-                            'ch_type': OptionsVar(
-                                value='EOG',
-                                options=['EOG', 'ECG', 'EMG'])}
+                for scanno, ch_name, kind in self.chs:
+                    if kind == FIFF.FIFFV_BIO_CH:
+                        self.channel_info[scanno] = BioChannelState(ch_name)
 
                 # load any default event info
                 if isinstance(self.container.settings, dict):
@@ -118,14 +123,22 @@ class FIFData(BIDSContainer, BIDSFile):
                         for key, value in def_event_info:
                             if key not in self.interesting_events:
                                 self.event_info.append(
-                                    {'event': IntVar(value=key),
-                                     'description': StringVar(value=value)})
+                                    EventState(key, value))
                                 self.interesting_events.add(key)
 
             self.loaded = True
 
             self.validate()
 
+    def _first_part(self, split_index):
+        """Return the name of the first part of the split recording this file
+        is a later part of, or None if it isn't part of one."""
+        name = path.basename(self.file)
+        for main, parts in split_index.items():
+            if name in parts[1:]:
+                return main
+        return None
+
     def check_valid(self):
         # this will be essentially custom as we need to be careful due to the
         # fact that the list of jobs contains `self`, which could lead to odd
@@ -138,13 +151,25 @@ class FIFData(BIDSContainer, BIDSFile):
         is_valid &= self.run.get() != ''
         return is_valid
 
+    def channel_stats(self):
+        """Return the quality statistics of each channel.
+        The data is only read the first time as the statistics are cached."""
+        from .channel_stats import fif_channel_stats
+        return cached_header(self.file, 'stats', fif_channel_stats)
+
+    def find_triggers(self):
+        """Return the summary of the event codes on the stim channel.
+        The data is only read the first time as the summary is cached."""
+        from .trigger_scan import scan_fif_triggers
+        return cached_header(self.file, 'triggers', scan_fif_triggers)
+
     # TODO: maybe not have this return two lists??
     def get_event_data(self):
         events = []
         descriptions = []
-        for lst in self.event_info:
-            events.append(self._process_event(lst['event'].get()))
-            descriptions.append(lst['description'].get())
+        for evt in self.event_info:
+            events.append(self._process_event(evt.event))
+            descriptions.append(evt.description)
         return events, descriptions
 
 
@@ -155,17 +180,11 @@ class FIFData(BIDSContainer, BIDSFile):
         ch_type_map = dict()
         # find any changed names or specified types and set them
         for ch_num, ch_data in self.channel_info.items():
-            for ch in self.raw.info['chs']:
-                if ch['scanno'] == ch_num:
-                    ch_name_map[ch['ch_name']] = ch_data['ch_name'].get()
-                    ch_type = ch_data['ch_type'].get()
-                    ch_type_map[ch_data['ch_name'].get()] = ch_type.lower()
+            for scanno, ch_name, _ in self.chs:
+                if scanno == ch_num:
+                    ch_name_map[ch_name] = ch_data.name
+                    ch_type_map[ch_data.name] = ch_data.ch_type.lower()
                     break
-        # only do some processing if the data has changed
-        if ch_name_map != dict():
-            self.raw.rename_channels(ch_name_map)
-        if ch_type_map != dict():
-            self.raw.set_channel_types(ch_type_map)
 
         # assign the subject data
         try:
@@ -177,10 +196,17 @@ class FIFData(BIDSContainer, BIDSFile):
         sex = self.subject_gender.get()
         # map the sex to the data used by the raw info
         sex = {'U': 0, 'M': 1, 'F': 2}.get(sex, 0)
-        if self.raw.info['subject_info'] is None:
-            self.raw.info['subject_info'] = dict()
-        self.raw.info['subject_info']['birthday'] = bday
-        self.raw.info['subject_info']['sex'] = sex
+
+        self.raw_params = {
+            'dtype': '.fif',
+            'file': self.file,
+            'allow_maxshield': self.info['Has Active Shielding'] == "True",
+            'ch_names': ch_name_map,
+            'ch_types': ch_type_map,
+            'subject_info': {'birthday': bday, 'sex': sex}}
+        if len(self.parts) > 1:
+            # all the parts are read with the first one
+            self.raw_params['parts'] = self.parts
 
     def autodetect_emptyroom(self):
         """ Autodetect if there are any other files in the same folder with the
@@ -232,10 +258,8 @@ class FIFData(BIDSContainer, BIDSFile):
             if default_events is not None:
                 for i, desc in default_events:
                     if i not in curr_events:
-                        # add the variables to self.event_info
-                        self.event_info.append(
-                            {'event': IntVar(value=i),
-                             'description': StringVar(value=desc)})
+                        # add the event to self.event_info
+                        self.event_info.append(EventState(i, desc))
                         self.interesting_events.add(i)
 
     def _process_event(self, evt):
@@ -260,11 +284,10 @@ class FIFData(BIDSContainer, BIDSFile):
         data.update(BIDSFile.__getstate__(self))
         data['chs'] = dict()
         for num, ch_data in self.channel_info.items():
-            data['chs'][num] = [ch_data['ch_name'].get(),
-                                ch_data['ch_type'].get()]
+            data['chs'][num] = [ch_data.name, ch_data.ch_type]
         data['evt'] = dict()
         for evt in self.event_info:
-            data['evt'][evt['event'].get()] = evt['description'].get()
+            data['evt'][evt.event] = evt.description
         return data
 
     def __setstate__(self, state):
@@ -272,11 +295,7 @@ class FIFData(BIDSContainer, BIDSFile):
         # Why do we not need this one too???
         #BIDSFile.__setstate__(self, state)
         for key in state.get('chs', []):
-            self.channel_info[key] = {
-                'ch_name': StringVar(value=state['chs'][key][0]),
-                'ch_type': OptionsVar(value=state['chs'][key][1],
-                                      options=['EOG', 'ECG', 'EMG'])}
+            self.channel_info[key] = BioChannelState(*state['chs'][key])
         for key, value in state.get('evt', dict()).items():
-            self.event_info.append({'event': IntVar(value=key),
-                                    'description': StringVar(value=value)})
+            self.event_info.append(EventState(key, value))
             self.interesting_events.add(key)
@@ -1,6 +1,8 @@
-from tkinter import BooleanVar
 from os.path import normpath
 
+from Biscuit.utils.dispatcher import get_dispatcher
+from .states import Value
+
 
 class FileInfo():
     """
@@ -45,26 +47,33 @@ class FileInfo():
         """
         Change the colour of the tag in the treeview to reflect the current
         state of the entry
+
+        This may be called from any thread. The tags are changed in the
+        tkinter thread to reflect the state at that time.
         """
         if self.parent is not None:
-            # check for the is_junk tag. If it has it apply the correct tags.
-            if self.is_junk.get() is True:
-                self.parent.file_treeview.add_tags(self.ID, ['JUNK_FILE'])
-            else:
-                self.parent.file_treeview.remove_tags(self.ID, ['JUNK_FILE'])
-            # next see if good or not and give the correct tags
-            if self.valid:
-                self.parent.file_treeview.remove_tags(self.ID, ['BAD_FILE'])
-                self.parent.file_treeview.add_tags(self.ID, tags=['GOOD_FILE'])
-            else:
-                self.parent.file_treeview.add_tags(self.ID, tags=['BAD_FILE'])
-                self.parent.file_treeview.remove_tags(self.ID, ['GOOD_FILE'])
+            get_dispatcher().dispatch(self._update_tags,
+                                      key=('tags', self.ID))
 
 #region private methods
 
     def _apply_settings(self):
         pass
 
+    def _update_tags(self):
+        # check for the is_junk tag. If it has it apply the correct tags.
+        if self.is_junk.get() is True:
+            self.parent.file_treeview.add_tags(self.ID, ['JUNK_FILE'])
+        else:
+            self.parent.file_treeview.remove_tags(self.ID, ['JUNK_FILE'])
+        # next see if good or not and give the correct tags
+        if self.valid:
+            self.parent.file_treeview.remove_tags(self.ID, ['BAD_FILE'])
+            self.parent.file_treeview.add_tags(self.ID, tags=['GOOD_FILE'])
+        else:
+            self.parent.file_treeview.add_tags(self.ID, tags=['BAD_FILE'])
+            self.parent.file_treeview.remove_tags(self.ID, ['GOOD_FILE'])
+
     def _create_vars(self):
         """ Create all the required data for the file """
         self.info = dict()
@@ -91,8 +100,7 @@ class FileInfo():
         # a pointer to the tab object that is displaying the info for this file
         self.associated_tab = None
 
-        self.is_junk = BooleanVar()
-        self.is_junk.set(False)
+        self.is_junk = Value(False)
 
         self.is_valid = True
 
@@ -1,15 +1,12 @@
 from tkinter import messagebox
 #from warnings import warn
 
-from mne.io import read_raw_kit
-from mne.io.constants import FIFF
-
-from Biscuit.Management import OptionsVar
 from Biscuit.utils.utils import get_object_class
 from .BIDSContainer import BIDSContainer
 from .generic_file import generic_file
 from .BIDSFile import BIDSFile
 from .FileInfo import FileInfo
+from .states import OptionsValue
 
 
 class KITData(BIDSContainer):
@@ -163,7 +160,7 @@ class KITData(BIDSContainer):
 
     def prepare(self):
         super(KITData, self).prepare()
-        self._create_raws()
+        self._create_raw_params()
         self.make_specific_data = {
             'electrode': self.contained_files['.elp'][0].file,
             'hsp': self.contained_files['.hsp'][0].file}
@@ -176,7 +173,12 @@ class KITData(BIDSContainer):
             job._apply_settings()
 
     # TODO: fix up 'jobs' stuff
-    def _create_raws(self):
+    def _create_raw_params(self):
+        """Generate the parameters required to read the raw data of each job.
+
+        The raw data itself is only read when the job is converted so that
+        the conversion can be carried out in a separate process.
+        """
         # refresh to avoid adding the con files each time
         self.jobs = set()
         for con_file in self.contained_files['.con']:
@@ -203,24 +205,6 @@ class KITData(BIDSContainer):
                 #         'file at a time at the moment... Using first one.')
                 if len(hpi) == 0:
                     raise ValueError('Con file has no associated mrk file.')
-                raw = read_raw_kit(
-                    con_file.file,
-                    # Construct a list of the file paths.
-                    # here.
-                    mrk=hpi[0],
-                    elp=self.contained_files['.elp'][0].file,
-                    hsp=self.contained_files['.hsp'][0].file,
-                    stim=trigger_channels, stim_code=stim_code,
-                    slope=slope)
-                bads = con_file.bad_channels()
-                # Set the bads.
-                raw.info['bads'] = bads
-
-                # change the channel type of any channels that are triggers
-                if isinstance(trigger_channels, list):
-                    for ch in trigger_channels:
-                        i = int(ch) - 1
-                        raw.info['chs'][i]['kind'] = FIFF.FIFFV_STIM_CH
 
                 # assign the subject data
                 try:
@@ -232,13 +216,21 @@ class KITData(BIDSContainer):
                 sex = self.subject_gender.get()
                 # map the sex to the data used by the raw info
                 sex = {'U': 0, 'M': 1, 'F': 2}.get(sex, 0)
-                if raw.info['subject_info'] is None:
-                    raw.info['subject_info'] = dict()
-                raw.info['subject_info']['birthday'] = bday
-                raw.info['subject_info']['sex'] = sex
 
-                # assign the raw to the con_file
-                con_file.raw = raw
+                con_file.raw_params = {
+                    'dtype': '.con',
+                    'file': con_file.file,
+                    # Only the first marker is passed to mne as it can only
+                    # handle one.
+                    'mrk': hpi[0],
+                    'elp': self.contained_files['.elp'][0].file,
+                    'hsp': self.contained_files['.hsp'][0].file,
+                    'stim': trigger_channels,
+                    'stim_code': stim_code,
+                    'slope': slope,
+                    'bads': con_file.bad_channels(),
+                    'data_info': con_file.data_info,
+                    'subject_info': {'birthday': bday, 'sex': sex}}
 
                 con_file.extra_data = {
                     'InstitutionName': con_file.info['Institution name'],
@@ -259,8 +251,8 @@ class KITData(BIDSContainer):
         super(KITData, self)._create_vars()
 
         # KIT specific variables
-        self.dewar_position = OptionsVar(value='supine',
-                                         options=["supine", "upright"])
+        self.dewar_position = OptionsValue(value='supine',
+                                           options=["supine", "upright"])
         self.con_map = dict()
         self.is_valid = False
         self.contains_required_files = False
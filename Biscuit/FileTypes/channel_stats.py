@@ -0,0 +1,280 @@
+"""
+Quality statistics of each channel, used to suggest bad channels.
+
+The data is read a fixed number of samples at a time so that the memory used
+doesn't depend on the length of the recording (see
+`kit_header.iter_kit_data`).
+
+The statistics of each channel are:
+- rms: the root mean square about the mean of the channel
+- ptp: the peak-to-peak amplitude
+- flat: the fraction of samples which are the same as the previous sample
+- line_ratio: the fraction of the power (excluding DC) which is within
+  `LINE_WIDTH` Hz of the first `LINE_HARMONICS` multiples of the line
+  frequency, from the spectrum of each second of data
+"""
+
+import numpy as np
+from mne import channel_indices_by_type
+from mne.io import read_raw_fif
+from mne.io.kit.constants import KIT
+
+from .kit_header import iter_kit_data
+
+# number of samples read at a time
+CHUNK_SIZE = 10000
+# the number of multiples of the line frequency the line noise is measured at
+LINE_HARMONICS = 3
+# half width of the frequency band around each line frequency (Hz)
+LINE_WIDTH = 1.
+# robust z-score above which a statistic is considered an outlier
+Z_THRESHOLD = 5.
+# fraction of flat samples above which a channel is considered flat
+FLAT_THRESHOLD = 0.5
+
+
+def kit_channel_stats(fname, data_info, line_freq=50.,
+                      chunk_size=CHUNK_SIZE):
+    """Calculate the statistics of each channel of a .con file.
+
+    Parameters
+    ----------
+    fname : str
+        Path to the .con file.
+    data_info : dict
+        The information about the layout of the raw data in the file as
+        found by `con_file.load_data`.
+    line_freq : float
+        The frequency of the power line noise.
+    chunk_size : int
+        The number of samples to read at a time.
+
+    Returns
+    -------
+    stats : dict
+        The statistics of each channel, the number of samples and the groups
+        of channels that are compared to each other (see `suggest_bads`).
+    """
+    chunks = (block for _, block in
+              iter_kit_data(fname, data_info, chunk_size))
+    stats = channel_stats(chunks, data_info['sfreq'], data_info['nchan'],
+                          line_freq)
+
+    ch_types = data_info['ch_types']
+    stats['groups'] = [
+        [i for i, ch_type in enumerate(ch_types) if
+         ch_type in KIT.CHANNELS_MEG and
+         ch_type != KIT.CHANNEL_MAGNETOMETER_REFERENCE],
+        [i for i, ch_type in enumerate(ch_types) if
+         ch_type == KIT.CHANNEL_MAGNETOMETER_REFERENCE]]
+    return stats
+
+
+def fif_channel_stats(fname, line_freq=50., chunk_size=CHUNK_SIZE):
+    """Calculate the statistics of each channel of a .fif file.
+
+    The data in a .fif file is split over a number of tagged buffers, so it
+    is read using mne a chunk at a time rather than mapped directly.
+
+    Parameters
+    ----------
+    fname : str
+        Path to the .fif file.
+    line_freq : float
+        The frequency of the power line noise.
+    chunk_size : int
+        The number of samples to read at a time.
+
+    Returns
+    -------
+    stats : dict
+        The statistics of each channel, the number of samples and the groups
+        of channels that are compared to each other (see `suggest_bads`).
+    """
+    raw = read_raw_fif(fname, allow_maxshield=True, verbose='ERROR')
+
+    def chunks():
+        for start in range(0, raw.n_times, chunk_size):
+            yield raw.get_data(start=start, stop=start + chunk_size).T
+
+    stats = channel_stats(chunks(), raw.info['sfreq'], raw.info['nchan'],
+                          line_freq)
+    idx = channel_indices_by_type(raw.info)
+    stats['groups'] = [[int(i) for i in idx[ch_type]] for ch_type in
+                       ('mag', 'grad', 'eeg') if len(idx[ch_type]) != 0]
+    return stats
+
+
+def channel_stats(chunks, sfreq, nchan, line_freq=50.):
+    """Calculate the statistics of each channel from the chunks of data.
+
+    Parameters
+    ----------
+    chunks : iterable of array, shape (n_samples, nchan)
+        The data of consecutive chunks of the recording.
+    sfreq : float
+        The sampling frequency.
+    nchan : int
+        The number of channels.
+    line_freq : float
+        The frequency of the power line noise.
+
+    Returns
+    -------
+    stats : dict
+        The statistics of each channel as lists, and the total number of
+        samples.
+    """
+    n = 0
+    mean = np.zeros(nchan)
+    m2 = np.zeros(nchan)
+    low = np.full(nchan, np.inf)
+    high = np.full(nchan, -np.inf)
+    flat = np.zeros(nchan)
+    line_power = np.zeros(nchan)
+    total_power = np.zeros(nchan)
+    prev = None
+    seg_len = int(round(sfreq))
+    basis = _line_basis(seg_len, sfreq, line_freq)
+    for block in chunks:
+        n_block = len(block)
+        if n_block == 0:
+            continue
+        low = np.minimum(low, block.min(axis=0))
+        high = np.maximum(high, block.max(axis=0))
+
+        flat += (np.diff(block, axis=0) == 0).sum(axis=0)
+        if prev is not None:
+            flat += block[0] == prev
+        prev = block[-1].copy()
+
+        # combine the mean and sum of squared deviations with those of the
+        # previous chunks (Chan et al.) to avoid the loss of precision of
+        # summing the squares directly
+        block_mean = block.mean(axis=0)
+        block = block - block_mean
+        block_m2 = np.einsum('ij,ij->j', block, block)
+        delta = block_mean - mean
+        total = n + n_block
+        m2 += block_m2 + delta ** 2 * n * n_block / total
+        mean += delta * n_block / total
+        n = total
+
+        # the line noise is found from the spectrum of each second of data.
+        # Only the Fourier coefficients at the line frequencies are needed,
+        # and the total power is the sum of squares (Parseval)
+        n_seg = n_block // seg_len
+        if n_seg != 0:
+            seg = block[:n_seg * seg_len]
+            coeffs = np.einsum('stc,tk->sck',
+                               seg.reshape(n_seg, seg_len, nchan), basis,
+                               optimize=True)
+            line_power += 2 * (coeffs ** 2).sum(axis=(0, 2)) / seg_len
+            total_power += np.einsum('ij,ij->j', seg, seg)
+
+    if n == 0:
+        raise ValueError('There is no data to calculate the statistics of.')
+    with np.errstate(invalid='ignore', divide='ignore'):
+        line_ratio = np.where(total_power > 0, line_power / total_power, 0.)
+    return {'n_samples': n,
+            'rms': np.sqrt(m2 / n).tolist(),
+            'ptp': (high - low).tolist(),
+            'flat': (flat / max(n - 1, 1)).tolist(),
+            'line_ratio': line_ratio.tolist()}
+
+
+def _line_basis(n_samples, sfreq, line_freq):
+    """Return the cosines and sines of the frequencies of the discrete
+    Fourier transform which are close to the line frequency or its harmonics.
+    Multiplying data by these gives the real and imaginary parts of the
+    coefficients of the frequencies."""
+    freqs = np.fft.rfftfreq(n_samples, 1. / sfreq)
+    is_line = np.zeros(len(freqs), dtype=bool)
+    for harmonic in range(1, LINE_HARMONICS + 1):
+        is_line |= np.abs(freqs - harmonic * line_freq) <= LINE_WIDTH
+    # the DC and Nyquist frequencies only appear once in the spectrum
+    is_line[0] = False
+    if n_samples % 2 == 0:
+        is_line[-1] = False
+    phase = 2 * np.pi * np.outer(np.arange(n_samples) / sfreq,
+                                 freqs[is_line])
+    return np.concatenate((np.cos(phase), np.sin(phase)), axis=1)
+
+
+def suggest_bads(stats, z_threshold=Z_THRESHOLD,
+                 flat_threshold=FLAT_THRESHOLD):
+    """Find the channels whose statistics are outliers.
+
+    Each channel is compared to the others in its group using a robust
+    z-score (the deviation from the median scaled by the median absolute
+    deviation).
+
+    Parameters
+    ----------
+    stats : dict
+        The statistics as returned by `kit_channel_stats` or
+        `fif_channel_stats`.
+    z_threshold : float
+        The robust z-score above which a value is an outlier.
+    flat_threshold : float
+        The fraction of flat samples above which a channel is flat.
+
+    Returns
+    -------
+    bads : dict
+        The reasons each suggested bad channel is an outlier, keyed by the
+        index of the channel.
+    """
+    bads = dict()
+
+    def add(ch, reason):
+        bads.setdefault(ch, []).append(reason)
+
+    for group in stats['groups']:
+        group = np.asarray(group, dtype=int)
+        if len(group) == 0:
+            continue
+        rms = np.asarray(stats['rms'])[group]
+        flat = np.asarray(stats['flat'])[group]
+        for ch in group[(flat > flat_threshold) | (rms == 0)]:
+            add(int(ch), 'flat')
+        # the other statistics can't be compared with too few channels
+        if len(group) < 3:
+            continue
+        with np.errstate(divide='ignore'):
+            values = (('amplitude', np.log(rms)),
+                      ('peak-to-peak', np.log(
+                          np.asarray(stats['ptp'])[group])),
+                      ('line noise', np.asarray(stats['line_ratio'])[group]))
+        for reason, value in values:
+            z = _robust_z(value)
+            if reason == 'line noise':
+                # less line noise than the other channels is fine
+                outliers = z > z_threshold
+            else:
+                outliers = np.abs(z) > z_threshold
+            for ch in group[outliers]:
+                # a flat channel is also an outlier in everything else
+                if 'flat' not in bads.get(int(ch), []):
+                    add(int(ch), reason)
+    return bads
+
+
+def _robust_z(values):
+    """Return the robust z-score of each value. Values which aren't finite
+    (eg. the log of the amplitude of a flat channel) are ignored."""
+    z = np.zeros(len(values))
+    finite = np.isfinite(values)
+    if finite.sum() < 3:
+        return z
+    median = np.median(values[finite])
+    deviation = np.abs(values[finite] - median)
+    scale = np.median(deviation) * 1.4826
+    if scale == 0:
+        # more than half the values are the same so use the mean absolute
+        # deviation instead
+        scale = deviation.mean() * 1.2533
+    if scale == 0:
+        return z
+    z[finite] = (values[finite] - median) / scale
+    return z
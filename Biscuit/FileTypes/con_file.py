@@ -1,12 +1,9 @@
-from tkinter import StringVar, BooleanVar
-from struct import unpack
 from datetime import datetime
 
+from Biscuit.utils.header_cache import cached_header
 from .BIDSFile import BIDSFile
-from mne.io.kit.constants import KIT
 from .KITData import KITData
-
-GAINS = [1, 2, 5, 10, 20, 50, 100, 200]
+from .states import ChannelState
 
 
 class con_file(BIDSFile):
@@ -37,11 +34,35 @@ class con_file(BIDSFile):
         bads = []
 
         for ch_data in self.tab_info.values():
-            if ch_data[1].get() == 1:
-                bads.append(ch_data[0].get())
+            if ch_data.bad:
+                bads.append(ch_data.name)
 
         return bads
 
+    def channel_state(self, ch):
+        """Return the ChannelState of the channel, adding the channel to the
+        interesting channels if it isn't already."""
+        if ch not in self.tab_info:
+            self.tab_info[ch] = ChannelState(self.channel_names[ch])
+        self.interesting_channels.add(ch)
+        return self.tab_info[ch]
+
+    def channel_stats(self):
+        """Return the quality statistics of each channel.
+        The data is only read the first time as the statistics are cached."""
+        from .channel_stats import kit_channel_stats
+        return cached_header(
+            self.file, 'stats',
+            lambda fname: kit_channel_stats(fname, self.data_info))
+
+    def find_triggers(self):
+        """Return the summary of the channels which have triggers on them.
+        The data is only read the first time as the summary is cached."""
+        from .trigger_scan import scan_kit_triggers
+        return cached_header(
+            self.file, 'triggers',
+            lambda fname: scan_kit_triggers(fname, self.data_info))
+
     # TODO: maybe not have this return two lists??
     def get_event_data(self):
         """ Returns the list of trigger channels associated with the data
@@ -50,112 +71,73 @@ class con_file(BIDSFile):
         descriptions = []
         for ch_num in self.interesting_channels:
             ch_data = self.tab_info[ch_num]
-            if ch_data[2].get() == 1:
+            if ch_data.trigger:
                 # TODO: +1 for adult system I think...
                 trigger_channels.append(str(ch_num))    # +1 for MNE
-                descriptions.append(ch_data[3].get())
+                descriptions.append(ch_data.description)
 
         return trigger_channels, descriptions
 
     def load_data(self):
         # reads in various other pieces of information required
-        with open(self.file, 'rb') as file:
-            # let's get the gain:
-            file.seek(0x70)
-            offset = unpack('i', file.read(4))[0]
-            file.seek(offset)
-            amp_data = unpack('i', file.read(4))[0]
-            gain1 = (amp_data & 0x00007000) >> 12
-            gain2 = (amp_data & 0x70000000) >> 28
-            gain3 = (amp_data & 0x07000000) >> 24
-            self.info['gains'] = '{0}, {1}, {2}'.format(GAINS[gain1],
-                                                        GAINS[gain2],
-                                                        GAINS[gain3])
-
-            # get the InsitutionName and ManufacturersModelName:
-            # code taken pretty much directly from the kit.py script in mne
-            file.seek(0x20C)
-            system_name = unpack('128s', file.read(0x80))[0].decode()
-            model_name = unpack('128s', file.read(0x80))[0].decode()
-            nchans = unpack('i', file.read(4))[0]
-            file.seek(0x100, 1)     # ignore any comments
-            create_time, = unpack('i', file.read(0x4))
-            system_name = system_name.replace('\x00', '')
-            # system_name = system_name.strip().replace('\n', '/')
-            model_name = model_name.replace('\x00', '')
-            # model_name = model_name.strip().replace('\n', '/')
-            self.info['Institution name'] = system_name
-            self.info['Serial Number'] = model_name
-            self.info['Channels'] = nchans
-            self.info['Measurement date'] = datetime.fromtimestamp(
-                create_time).strftime('%d/%m/%Y')
-
-            # determine whether the data has continuous head movement data
-            file.seek(0x1D0)
-            reTHM_offset, = unpack('i', file.read(0x4))
-            self.extra_data['ContinuousHeadLocalization'] = (reTHM_offset != 0)
-
-            # Get all the channel information here separately from mne.
-            # This way the data is intrinsically linked to the con file
-            # and we can generate the channels tab from the start
-            file.seek(0x40)
-            chan_offset, chan_size = unpack('2i', file.read(8))
-
-            # check to see if any of the channels are designated as triggers
-            # by default
-            def_trigger_info = None
-            if isinstance(self.container, KITData):
-                if self.container.contains_required_files:
-                    if isinstance(self.container.settings, dict):
-                        def_trigger_info = self.container.settings.get(
-                            'DefaultTriggers', None)
-            default_triggers = []
-            default_descriptions = []
-            if def_trigger_info is not None:
-                default_triggers = [int(row[0]) for row in
-                                    def_trigger_info]
-                default_descriptions = [row[1] for row in def_trigger_info]
-
-            channels_from_load = list(self.interesting_channels)
-
-            """ optimise to only load interesting channels """
-            for i in range(nchans):
-                file.seek(chan_offset + i * chan_size)
-                channel_type, = unpack('i', file.read(4))
-                if channel_type in KIT.CHANNELS_MEG:
-                    name = "MEG {0:03d}".format(i)
-                elif (channel_type in KIT.CHANNELS_MISC or
-                        channel_type == KIT.CHANNEL_NULL):
-                    ch_type_label = KIT.CH_LABEL[channel_type]
-                    name = "{0} {1:03d}".format(ch_type_label, i)
-                self.channel_names.append(name)
-
-                # only add the default channels if the list of channels loaded
-                # is empty. Otherwise default channels removed before save will
-                # be re-added
-                if channels_from_load == []:
-                    if i in default_triggers:
-                        is_trigger = True
-                        self.interesting_channels.add(i)
+        # (numpy and mne are only imported once some data is loaded)
+        from .kit_header import read_kit_header, kit_channel_names
+        header = cached_header(self.file, 'kit', read_kit_header)
+        self.info['gains'] = '{0}, {1}, {2}'.format(*header['gains'])
+        # get the InsitutionName and ManufacturersModelName:
+        self.info['Institution name'] = header['system_name']
+        self.info['Serial Number'] = header['model_name']
+        self.info['Channels'] = header['nchans']
+        self.info['Measurement date'] = datetime.fromtimestamp(
+            header['create_time']).strftime('%d/%m/%Y')
+        # determine whether the data has continuous head movement data
+        self.extra_data['ContinuousHeadLocalization'] = header['reTHM']
+        # get the information required to read the data directly.
+        self.data_info = header['data_info']
+
+        # Get all the channel information here separately from mne.
+        # This way the data is intrinsically linked to the con file
+        # and we can generate the channels tab from the start
+        self.channel_names.extend(
+            kit_channel_names(self.data_info['ch_types']))
+
+        # check to see if any of the channels are designated as triggers
+        # by default
+        def_trigger_info = None
+        if isinstance(self.container, KITData):
+            if self.container.contains_required_files:
+                if isinstance(self.container.settings, dict):
+                    def_trigger_info = self.container.settings.get(
+                        'DefaultTriggers', None)
+        default_triggers = []
+        default_descriptions = []
+        if def_trigger_info is not None:
+            default_triggers = [int(row[0]) for row in
+                                def_trigger_info]
+            default_descriptions = [row[1] for row in def_trigger_info]
+
+        channels_from_load = list(self.interesting_channels)
+
+        """ optimise to only load interesting channels """
+        for i, name in enumerate(self.channel_names):
+            # only add the default channels if the list of channels loaded
+            # is empty. Otherwise default channels removed before save will
+            # be re-added
+            if channels_from_load == []:
+                if i in default_triggers:
+                    is_trigger = True
+                    self.interesting_channels.add(i)
+                else:
+                    is_trigger = False
+                if (i in self.interesting_channels and
+                        i not in self.tab_info.keys()):
+                    if is_trigger:
+                        idx = default_triggers.index(i)
+                        description = default_descriptions[idx]
                     else:
-                        is_trigger = False
-                    if (i in self.interesting_channels and
-                            i not in self.tab_info.keys()):
-                        name_var = StringVar()
-                        name_var.set(name)
-                        bad_var = BooleanVar()
-                        bad_var.set(False)
-                        trigger_var = BooleanVar()
-                        trigger_var.set(is_trigger)
-                        if is_trigger:
-                            idx = default_triggers.index(i)
-                            description = default_descriptions[idx]
-                        else:
-                            description = ''
-                        desc_var = StringVar()
-                        desc_var.set(description)
-                        self.tab_info[i] = [name_var, bad_var, trigger_var,
-                                            desc_var]
+                        description = ''
+                    self.tab_info[i] = ChannelState(
+                        name, trigger=is_trigger, description=description)
 
         self.loaded = True
 
@@ -170,29 +152,20 @@ class con_file(BIDSFile):
         if default_triggers is not None:
             for i, desc in default_triggers:
                 if i not in curr_triggers:
-                    # add the variables to self.tab_info[i]
-                    name_var = StringVar()
+                    # add the channel to self.tab_info[i]
                     try:
-                        name_var.set(self.channel_names[i])
+                        name = self.channel_names[i]
                     except IndexError:
                         break
-                    bad_var = BooleanVar()
-                    bad_var.set(False)
-                    trigger_var = BooleanVar()
-                    trigger_var.set(True)
-                    desc_var = StringVar()
-                    desc_var.set(desc)
-                    self.tab_info[i] = [name_var, bad_var, trigger_var,
-                                        desc_var]
+                    self.tab_info[i] = ChannelState(name, trigger=True,
+                                                    description=desc)
                     self.interesting_channels.add(i)
-                    # If the associated channel tab is currently associated,
-                    # select the channel name and redraw the panel
-                    if self.associated_channel_tab is not None:
-                        self.associated_channel_tab.channels_table.nameselection.set(self.channel_names[i])  # noqa
-                        self.associated_channel_tab.channels_table.add_row_from_selection(None)  # noqa
                 else:
-                    desc_var = self.tab_info[i][3]
-                    desc_var.set(desc)
+                    self.tab_info[i].description = desc
+            # If the associated channel tab is currently associated, redraw
+            # the panel to show the new values
+            if self.associated_channel_tab is not None:
+                self.associated_channel_tab.update()
 
     def _create_vars(self):
         """
@@ -207,7 +180,10 @@ class con_file(BIDSFile):
         # TODO: replace with self.event_data ??
         self.interesting_channels = set()
         self.channel_names = []
+        # information about the layout of the raw data in the file
+        self.data_info = None
 
+        # the ChannelState of each interesting channel
         self.tab_info = {}
 
         self.associated_channel_tab = None
@@ -224,7 +200,7 @@ class con_file(BIDSFile):
         # 'interesting channel'. The other channel info will be discarded as it
         # would have been deleted from the list anyway.
         for key in self.interesting_channels:
-            data['cin'][key] = [i.get() for i in self.tab_info[key]]
+            data['cin'][key] = self.tab_info[key].to_list()
 
         return data
 
@@ -233,9 +209,6 @@ class con_file(BIDSFile):
 
         # then populate them
         for key in state.get('cin', []):
-            self.tab_info[key] = [StringVar(value=state['cin'][key][0]),
-                                  BooleanVar(value=state['cin'][key][1]),
-                                  BooleanVar(value=state['cin'][key][2]),
-                                  StringVar(value=state['cin'][key][3])]
+            self.tab_info[key] = ChannelState(*state['cin'][key])
 
         self.interesting_channels = set(self.tab_info.keys())
@@ -0,0 +1,186 @@
+"""
+Reading of the information Biscuit needs from the header of .fif files.
+
+Only the tag directory and the measurement information block are read. The
+raw data blocks (which `mne.io.read_raw_fif` goes through tag by tag to find
+the layout of the data) are never touched, and files containing Internal
+Active Shielding data are detected from the kind of block the data is in
+rather than by reading the file a second time.
+
+Recordings split over multiple files are found from the link each file has to
+the next part, which is only followed once all the .fif files in the folder
+have been read (see `split_fif_index`).
+"""
+
+from datetime import datetime, date
+from functools import lru_cache
+import os
+import os.path as op
+
+from mne.io.constants import FIFF
+from numpy import ndarray
+try:
+    from mne._fiff.open import fiff_open
+    from mne._fiff.meas_info import read_meas_info
+    from mne._fiff.tag import read_tag
+    from mne._fiff.tree import dir_tree_find
+except ImportError:
+    # older versions of mne
+    from mne.io.open import fiff_open
+    from mne.io.meas_info import read_meas_info
+    from mne.io.tag import read_tag
+    from mne.io.tree import dir_tree_find
+
+from Biscuit.utils.header_cache import cached_header
+
+
+def read_fif_header(fname):
+    """Read the information in the header of a .fif file.
+
+    Parameters
+    ----------
+    fname : str
+        Path to the .fif file.
+
+    Returns
+    -------
+    header : dict
+        The values read from the header:
+        - nchan: the number of channels
+        - meas_date: the timestamp of the recording, or None
+        - subject_info: the id, birthday ([year, month, day]) and sex of the
+          subject, or None
+        - chs: the scan number, name and kind of each channel
+        - maxshield: whether the file contains Internal Active Shielding
+          data
+        - next: the name of the next file the recording is split over, or
+          None
+    """
+    with open(fname, 'rb') as fid:
+        _, tree, _ = fiff_open(fid)
+        info, meas = read_meas_info(fid, tree, verbose='ERROR')
+        if (len(dir_tree_find(meas, FIFF.FIFFB_RAW_DATA)) == 0 and
+                len(dir_tree_find(meas, FIFF.FIFFB_CONTINUOUS_DATA)) == 0):
+            if len(dir_tree_find(meas, FIFF.FIFFB_IAS_RAW_DATA)) == 0:
+                raise ValueError('No raw data in {0}'.format(fname))
+            maxshield = True
+        else:
+            maxshield = False
+        next_part = _next_part(fid, tree, fname)
+
+    meas_date = info['meas_date']
+    if isinstance(meas_date, ndarray):
+        meas_date = float(meas_date[0])
+    # newer versions of MNE store the date as a datetime
+    elif isinstance(meas_date, datetime):
+        meas_date = meas_date.timestamp()
+
+    subject_info = info['subject_info']
+    if subject_info is not None:
+        birthday = subject_info.get('birthday')
+        if isinstance(birthday, date):
+            birthday = [birthday.year, birthday.month, birthday.day]
+        elif birthday is not None:
+            birthday = [int(i) for i in birthday]
+        subject_info = {'id': str(subject_info.get('id', '')),
+                        'birthday': birthday,
+                        'sex': int(subject_info.get('sex', 0))}
+
+    return {'nchan': info['nchan'],
+            'meas_date': meas_date,
+            'subject_info': subject_info,
+            'chs': [[int(ch['scanno']), ch['ch_name'], int(ch['kind'])] for ch in
+                    info['chs']],
+            'maxshield': maxshield,
+            'next': None if next_part is None else op.basename(next_part)}
+
+
+def split_fif_index(directory):
+    """Find the recordings in a folder which are split over multiple .fif
+    files.
+
+    The parts are found from the links between the files, so files which
+    simply have a number at the end of their name (eg. BIDS files such as
+    `sub-01_task-rest_run-1_meg.fif`) are not mistaken for parts.
+
+    Parameters
+    ----------
+    directory : str
+        Path to the folder.
+
+    Returns
+    -------
+    index : dict
+        The names of all the parts of each split recording, keyed by the name
+        of the first part.
+    """
+    signature = []
+    try:
+        for entry in os.scandir(directory):
+            if entry.name.endswith('.fif') and entry.is_file():
+                stat = entry.stat()
+                signature.append((entry.name, stat.st_size, stat.st_mtime_ns))
+    except OSError:
+        return dict()
+    return _split_fif_index(op.realpath(directory), tuple(sorted(signature)))
+
+
+@lru_cache(maxsize=32)
+def _split_fif_index(directory, signature):
+    """Return the split recordings in the folder.
+    The names, sizes and modification times of the .fif files are only passed
+    so that the folder is indexed again if any of them change."""
+    next_parts = dict()
+    for name, _, _ in signature:
+        try:
+            header = cached_header(op.join(directory, name), 'fif',
+                                   read_fif_header)
+        except Exception:
+            # files which can't be read aren't part of any recording
+            continue
+        next_parts[name] = header['next']
+    parts = dict()
+    for name in next_parts:
+        names = [name]
+        # a missing part ends the recording
+        while (next_parts.get(names[-1]) in next_parts and
+               next_parts[names[-1]] not in names):
+            names.append(next_parts[names[-1]])
+        if len(names) > 1:
+            parts[name] = names
+    later_parts = set(part for names in parts.values() for part in names[1:])
+    return dict((name, names) for name, names in parts.items() if
+                name not in later_parts)
+
+
+def _next_part(fid, tree, fname):
+    """Return the path of the next part of a split recording, or None if the
+    file is the last part. Based on `_get_next_fname` in mne."""
+    for node in dir_tree_find(tree, FIFF.FIFFB_REF):
+        next_fname = None
+        for ent in node['directory']:
+            if ent.kind == FIFF.FIFF_REF_ROLE:
+                role = int(read_tag(fid, ent.pos).data.item())
+                if role != FIFF.FIFFV_ROLE_NEXT_FILE:
+                    next_fname = None
+                    break
+            elif ent.kind == FIFF.FIFF_REF_FILE_NAME:
+                next_fname = op.join(op.dirname(fname),
+                                     str(read_tag(fid, ent.pos).data))
+            elif ent.kind == FIFF.FIFF_REF_FILE_NUM and next_fname is None:
+                # some files only have the number of the next part, so the
+                # name is constructed from the current name
+                next_num = read_tag(fid, ent.pos).data.item()
+                base = op.basename(fname)
+                idx = base.find('.')
+                idx2 = base.rfind('-')
+                if not base[idx2 + 1:idx].isdigit():
+                    idx2 = -1
+                if idx2 < 0 and next_num == 1:
+                    # this is the first file, which may not be numbered
+                    idx2 = idx
+                next_fname = op.join(op.dirname(fname), '{0}-{1:d}.{2}'.format(
+                    base[:idx2], next_num, base[idx + 1:]))
+        if next_fname is not None:
+            return next_fname
+    return None
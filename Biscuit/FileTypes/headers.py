@@ -0,0 +1,67 @@
+"""
+Reading of the headers of files before their objects are created.
+
+The objects of the files and folders use the file treeview, so can only be
+created in the tkinter thread. The slow part of loading them is reading the
+headers of the data files, so the files which will be read are found in the
+tkinter thread (`header_files`) and only their headers are read in the
+background (`read_headers`). The headers are stored in the header cache, so
+loading the objects afterwards only requires a stat of each file.
+"""
+
+import os.path as op
+
+from Biscuit.utils.header_cache import cached_header
+from .KITData import KITData
+
+
+def header_files(tree, sids):
+    """Return the paths of the data files read when the files or folders
+    with the sids are loaded.
+
+    Parameters
+    ----------
+    tree : instance of FileTreeview
+        The treeview the sids are in. Any folders must already be populated.
+    sids : list of str
+        The sids of the files and folders.
+
+    Returns
+    -------
+    fpaths : list of str
+        The path of each .con and .fif file.
+    """
+    fpaths = []
+    for sid in sids:
+        ext, fpath = tree.item(sid)['values']
+        if op.isdir(fpath):
+            # only the files of KIT folders are loaded with the folder
+            if KITData.generate_file_list(sid, tree, validate=True):
+                fpaths.extend(tree.item(child)['values'][1] for child in
+                              KITData.generate_file_list(sid, tree)['.con'])
+        elif ext in ('.con', '.fif'):
+            fpaths.append(fpath)
+    return fpaths
+
+
+def read_headers(fpaths):
+    """Read the headers of the files into the header cache.
+
+    This doesn't use any tkinter objects so can be called from any thread.
+    Files which can't be read are skipped, as the error is raised again when
+    their object is loaded.
+    """
+    # numpy and mne are only imported once some data is loaded
+    from .fif_header import read_fif_header, split_fif_index
+    from .kit_header import read_kit_header
+    for fpath in fpaths:
+        try:
+            if fpath.endswith('.con'):
+                cached_header(fpath, 'kit', read_kit_header)
+            elif fpath.endswith('.fif'):
+                # the headers of all the .fif files in the folder are read to
+                # find which are parts of split recordings
+                split_fif_index(op.dirname(fpath))
+                cached_header(fpath, 'fif', read_fif_header)
+        except Exception:
+            pass
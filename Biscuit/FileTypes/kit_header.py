@@ -0,0 +1,164 @@
+"""
+Reading of the header of KIT (.con) files.
+
+The header consists of a number of blocks (system, amplifier, acquisition and
+channel information) whose locations are given at fixed offsets at the start
+of the file. Rather than seeking to and reading each value separately, the
+start of the file is read in one go, and then everything up to the end of
+the last block in a second read, so that loading a file on a network share
+only requires two requests.
+
+Code based on the kit.py script in mne.
+"""
+
+from struct import unpack_from
+
+import numpy as np
+from mne.io.kit.constants import KIT
+
+GAINS = [1, 2, 5, 10, 20, 50, 100, 200]
+# size of the first read. This contains all the values at fixed offsets.
+HEADER_SIZE = 0x1000
+
+
+def read_kit_header(fname):
+    """Read the information in the header of a KIT file.
+
+    Parameters
+    ----------
+    fname : str
+        Path to the .con file.
+
+    Returns
+    -------
+    header : dict
+        The values read from the header:
+        - gains: the gains of the three amplifier stages
+        - system_name: the name of the system (institution)
+        - model_name: the model (serial number) of the system
+        - nchans: the number of channels
+        - create_time: the timestamp of the recording
+        - reTHM: whether the file has continuous head localisation data
+        - data_info: the information required to read the raw data directly
+          (see `kit_triggers.find_kit_events`), including the type of each
+          channel.
+    """
+    with open(fname, 'rb') as f:
+        buf = f.read(HEADER_SIZE)
+        # the locations of all the blocks
+        sys_offset, = unpack_from('<i', buf, 0x10)
+        chan_offset, chan_size = unpack_from('<2i', buf, 0x40)
+        amp_offset, = unpack_from('<i', buf, 0x70)
+        acq_offset, = unpack_from('<i', buf, 0x80)
+        data_offset, = unpack_from('<i', buf, 0x90)
+        nchans, = unpack_from('<i', buf, 0x30C)
+        # read the rest of the blocks if they aren't in the first read
+        end = max(sys_offset + 0x2E0, amp_offset + 4, acq_offset + 28,
+                  chan_offset + nchans * chan_size)
+        if end > len(buf):
+            buf += f.read(end - len(buf))
+
+    amp_data, = unpack_from('<i', buf, amp_offset)
+    gain1 = (amp_data & 0x00007000) >> 12
+    gain2 = (amp_data & 0x70000000) >> 28
+    gain3 = (amp_data & 0x07000000) >> 24
+
+    system_name, model_name = unpack_from('<128s128s', buf, 0x20C)
+    # skip the comments
+    create_time, = unpack_from('<i', buf, 0x410)
+    reTHM_offset, = unpack_from('<i', buf, 0x1D0)
+
+    version, revision, sysid = unpack_from('<3i', buf, sys_offset)
+    if version < 2 or (version == 2 and revision <= 3):
+        adc_range = float(unpack_from('<i', buf, sys_offset + 0x2CC)[0])
+        adc_offset = sys_offset + 0x2D0
+    else:
+        adc_range, = unpack_from('<d', buf, sys_offset + 0x2CC)
+        adc_offset = sys_offset + 0x2D4
+    _, adc_allocated, adc_stored = unpack_from('<3i', buf, adc_offset)
+
+    acq_type, sfreq = unpack_from('<id', buf, acq_offset)
+    if acq_type == KIT.CONTINUOUS:
+        n_samples, = unpack_from('<i', buf, acq_offset + 16)
+    else:
+        frame_length, _, _, n_epochs = unpack_from('<4i', buf,
+                                                   acq_offset + 12)
+        if acq_type == KIT.EVOKED:
+            n_samples = frame_length
+        else:
+            n_samples = frame_length * n_epochs
+
+    # the type is the first value of the information of each channel
+    ch_types = np.ndarray((nchans,), dtype='<i4', buffer=buf,
+                          offset=chan_offset, strides=(chan_size,))
+
+    return {'gains': (GAINS[gain1], GAINS[gain2], GAINS[gain3]),
+            'system_name': system_name.decode().replace('\x00', ''),
+            'model_name': model_name.decode().replace('\x00', ''),
+            'nchans': nchans,
+            'create_time': create_time,
+            'reTHM': reTHM_offset != 0,
+            'data_info': {'data_offset': data_offset,
+                          'n_samples': n_samples,
+                          'nchan': nchans,
+                          'dtype': '<i{0}'.format(adc_allocated // 8),
+                          'ad_to_volt': adc_range / (2.0 ** adc_stored),
+                          'sfreq': sfreq,
+                          'sysid': sysid,
+                          'ch_types': ch_types.tolist()}}
+
+
+def iter_kit_data(fname, data_info, chunk_size, picks=None):
+    """Read the data of a KIT file a number of samples at a time.
+
+    Each chunk is mapped with its own `np.memmap` which is released once the
+    chunk has been read, so that the pages of a large file don't accumulate
+    in memory.
+
+    Parameters
+    ----------
+    fname : str
+        Path to the .con file.
+    data_info : dict
+        The information about the layout of the raw data in the file (see
+        `read_kit_header`).
+    chunk_size : int
+        The number of samples to read at a time.
+    picks : list of int
+        The channels to read. Defaults to all channels.
+
+    Yields
+    ------
+    start : int
+        The first sample of the chunk.
+    data : array, shape (n_samples, n_channels)
+        The data of the chunk in volts.
+    """
+    nchan = data_info['nchan']
+    n_samples = data_info['n_samples']
+    dtype = np.dtype(data_info['dtype'])
+    for start in range(0, n_samples, chunk_size):
+        n = min(chunk_size, n_samples - start)
+        data = np.memmap(fname, dtype=dtype, mode='r',
+                         offset=(data_info['data_offset'] +
+                                 start * nchan * dtype.itemsize),
+                         shape=(n, nchan))
+        if picks is None:
+            block = data.astype(float)
+        else:
+            block = data[:, picks].astype(float)
+        del data
+        block *= data_info['ad_to_volt']
+        yield start, block
+
+
+def kit_channel_names(ch_types):
+    """Return the names of the channels with the types."""
+    names = []
+    for i, channel_type in enumerate(ch_types):
+        if channel_type in KIT.CHANNELS_MEG:
+            names.append("MEG {0:03d}".format(i))
+        else:
+            ch_type_label = KIT.CH_LABEL.get(channel_type, 'MISC')
+            names.append("{0} {1:03d}".format(ch_type_label, i))
+    return names
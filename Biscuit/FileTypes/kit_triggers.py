@@ -0,0 +1,101 @@
+"""
+Detection of the events on the trigger channels of KIT data.
+
+This gives exactly the same events as reading the data with
+`mne.io.read_raw_kit(stim=..., stim_code='channel', slope='+')` and then
+calling `mne.find_events(raw, output='onset', consecutive=False,
+min_duration=0, shortest_event=1)`, however only the trigger channels are
+read and the data is never loaded into memory all at once.
+"""
+
+import numpy as np
+from mne.io.kit.constants import KIT
+
+# number of samples read at a time
+CHUNK_SIZE = 100000
+
+
+def can_be_trigger(ch, data_info):
+    """Return whether the channel can be used as a trigger channel."""
+    ch_type = data_info['ch_types'][ch]
+    # the data in these channels isn't scaled to volts by mne
+    return not (ch_type in KIT.CHANNELS_MEG or
+                ch_type in (KIT.CHANNEL_EEG, KIT.CHANNEL_ECG) or
+                (data_info['sysid'] == 52 and ch < 160 and
+                 ch_type == KIT.CHANNEL_NULL))
+
+
+def find_kit_events(fname, data_info, trigger_channels, threshold=1,
+                    chunk_size=CHUNK_SIZE):
+    """Find the events on the trigger channels of a .con file.
+
+    Parameters
+    ----------
+    fname : str
+        Path to the .con file.
+    data_info : dict
+        The information about the layout of the raw data in the file as
+        found by `con_file.load_data`.
+    trigger_channels : list of int
+        The indexes of the trigger channels. The value of the event produced
+        by each channel is its index.
+    threshold : float
+        The voltage above which a trigger channel is considered to be on.
+    chunk_size : int
+        The number of samples to read at a time.
+
+    Returns
+    -------
+    events : array, shape (n_events, 3)
+        The events found. Each row is the sample of the event onset, the
+        value before the onset (always 0) and the event value.
+    """
+    stim = np.asarray(trigger_channels, int)
+    for ch in stim:
+        if not can_be_trigger(ch, data_info):
+            raise ValueError('Channel {0} cannot be used as a trigger '
+                             'channel.'.format(ch))
+
+    n_samples = data_info['n_samples']
+    ad_to_volt = data_info['ad_to_volt']
+    data = np.memmap(fname, dtype=data_info['dtype'], mode='r',
+                     offset=data_info['data_offset'],
+                     shape=(n_samples, data_info['nchan']))
+
+    steps = []
+    prev = None
+    for start in range(0, n_samples, chunk_size):
+        block = data[start:start + chunk_size, stim].T.astype(float)
+        block *= ad_to_volt
+        values = ((block > threshold) * stim[:, np.newaxis]).sum(axis=0)
+        # include the last value of the previous chunk so that steps across
+        # the boundary are found
+        if prev is not None:
+            values = np.concatenate(([prev], values))
+            first = start - 1
+        else:
+            first = start
+        idx = np.where(np.diff(values) != 0)[0]
+        steps.append(np.c_[idx + first + 1, values[idx], values[idx + 1]])
+        prev = values[-1]
+    del data
+
+    if len(steps) == 0:
+        return np.empty((0, 3), dtype='int32')
+    steps = np.concatenate(steps, axis=0)
+    if len(steps) == 0:
+        return np.empty((0, 3), dtype='int32')
+    # any event still on at the end of the data ends there
+    if steps[-1, 2] != 0:
+        steps = np.append(steps, [[n_samples, steps[-1, 2], 0]], axis=0)
+
+    onset_idx = np.where(steps[:, 1] == 0)[0]
+    offset_idx = np.where(steps[:, 2] == 0)[0]
+    if len(onset_idx) == 0 or len(offset_idx) == 0:
+        return np.empty((0, 3), dtype='int32')
+    # remove any orphaned onsets/offsets
+    if onset_idx[0] > offset_idx[0]:
+        offset_idx = np.delete(offset_idx, 0)
+    if onset_idx[-1] > offset_idx[-1]:
+        onset_idx = np.delete(onset_idx, -1)
+    return steps[onset_idx]
@@ -0,0 +1,213 @@
+"""
+Plain containers of the information entered for a file.
+
+The values are stored as ordinary attributes rather than tkinter Variables so
+that the file objects can be pickled, passed to other processes and used
+without a Tcl interpreter. The InfoTabs create Variables bound to the
+attributes only while the values are being displayed (see
+`Biscuit.Management.CustomVars.bind_var`).
+
+The values of the jobs and containers (eg. the run number or subject ID) are
+held by `Value`s. Other values depend on these (eg. whether the file is
+valid), so they can be watched for changes like a Variable. The widgets which
+display them bind a Variable to them (see
+`Biscuit.Management.CustomVars.bind_value`).
+"""
+
+# the types a BIO channel in a .fif file can be set as
+BIO_CH_TYPES = ['EOG', 'ECG', 'EMG']
+
+
+class ChannelState():
+    """The information about a channel of a .con file.
+
+    Parameters
+    ----------
+    name : str
+        The name of the channel.
+    bad : bool
+        Whether the channel is bad.
+    trigger : bool
+        Whether the channel is a trigger channel.
+    description : str
+        The description of the events on the trigger channel.
+    """
+    __slots__ = ('name', 'bad', 'trigger', 'description')
+
+    def __init__(self, name, bad=False, trigger=False, description=''):
+        self.name = name
+        self.bad = bad
+        self.trigger = trigger
+        self.description = description
+
+    def to_list(self):
+        """Return the values as a list (the format they are saved in)."""
+        return [self.name, self.bad, self.trigger, self.description]
+
+    def __repr__(self):
+        return '<ChannelState: {0}>'.format(self.to_list())
+
+
+class BioChannelState():
+    """The information about a BIO channel of a .fif file.
+
+    Parameters
+    ----------
+    name : str
+        The name of the channel.
+    ch_type : str
+        The type of the channel. One of `BIO_CH_TYPES`.
+    """
+    __slots__ = ('name', 'ch_type')
+
+    def __init__(self, name, ch_type='EOG'):
+        self.name = name
+        self.ch_type = ch_type
+
+    def __repr__(self):
+        return '<BioChannelState: {0}, {1}>'.format(self.name, self.ch_type)
+
+
+class EventState():
+    """An event of interest in a .fif file.
+
+    Parameters
+    ----------
+    event : int
+        The value of the event on the trigger channel.
+    description : str
+        The description of the event.
+    """
+    __slots__ = ('event', 'description')
+
+    def __init__(self, event=0, description=''):
+        self.event = event
+        self.description = description
+
+    def __repr__(self):
+        return '<EventState: {0}, {1}>'.format(self.event, self.description)
+
+
+class Value():
+    """A value entered for a job or container (eg. its run number).
+
+    This has the `get`, `set` and `trace` methods of a tkinter Variable so it
+    can be used the same way, but doesn't need a Tcl interpreter.
+
+    Parameters
+    ----------
+    value : object
+        The initial value.
+    """
+    __slots__ = ('_value', '_callbacks')
+
+    def __init__(self, value=''):
+        self._value = value
+        self._callbacks = []
+
+    def get(self):
+        return self._value
+
+    def set(self, value):
+        self._value = value
+        # as with a Variable the callbacks are called whenever the value is
+        # written, even if it hasn't changed
+        for callback in list(self._callbacks):
+            callback()
+
+    def trace(self, mode, callback):
+        """Call the function whenever the value is written.
+
+        Only the 'w' mode of `Variable.trace` is supported, and the function
+        is called without any arguments. The function is returned so that it
+        can be passed to `untrace`.
+        """
+        if mode != 'w':
+            raise ValueError('Only the "w" mode is supported.')
+        self._callbacks.append(callback)
+        return callback
+
+    def untrace(self, callback):
+        """Stop calling the function when the value is written."""
+        self._callbacks.remove(callback)
+
+    def __getstate__(self):
+        # the callbacks are methods of the objects using the value, which
+        # add them again once they are created
+        return (self._value,)
+
+    def __setstate__(self, state):
+        self._value, = state
+        self._callbacks = []
+
+    def __repr__(self):
+        return '<Value: {0!r}>'.format(self._value)
+
+
+class OptionsValue(Value):
+    """A value which is one of a list of options (eg. the task).
+
+    As with an `OptionsVar`, the value must be one of the options if there are
+    any, otherwise it is added to them. The options and value are strings.
+
+    Parameters
+    ----------
+    value : str
+        The initial value. Defaults to the first option.
+    options : list
+        The options the value can have.
+    """
+    __slots__ = ('_options',)
+
+    def __init__(self, value=None, options=()):
+        Value.__init__(self)
+        self._options = [str(option) for option in options]
+        if value is not None:
+            self.set(value)
+        elif len(self._options) != 0:
+            self._value = self._options[0]
+
+    def set(self, value):
+        if len(self._options) != 0:
+            if value not in self._options:
+                raise ValueError(
+                    "Cannot set value {0}\n "
+                    "Possible values: {1}".format(value, self.options))
+        else:
+            self._options.append(str(value))
+        Value.set(self, str(value))
+
+    def append(self, value):
+        """Append the value to the options."""
+        self._options.append(str(value))
+
+    def __len__(self):
+        return len(self._options)
+
+    def __getstate__(self):
+        return (self._value, self._options)
+
+    def __setstate__(self, state):
+        self._value, self._options = state
+        self._callbacks = []
+
+    @property
+    def options(self):
+        return list(self._options)
+
+    @options.setter
+    def options(self, value):
+        """Set the options. The value stays the same if it is still an
+        option, otherwise it is set to the first one."""
+        curr_value = self._value
+        self._options = [str(option) for option in value]
+        if curr_value != '' and curr_value in self._options:
+            Value.set(self, curr_value)
+        elif len(self._options) != 0:
+            Value.set(self, self._options[0])
+        else:
+            Value.set(self, '')
+
+    def __repr__(self):
+        return '<OptionsValue: {0!r} of {1}>'.format(self._value,
+                                                     self._options)
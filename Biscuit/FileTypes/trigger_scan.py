@@ -0,0 +1,151 @@
+"""
+Discovery of the triggers in a recording.
+
+Only the channels which can contain triggers are read (the trigger and misc
+channels of KIT data, or the stim channel of .fif data), a chunk of samples at
+a time, and a summary of the events on each channel (KIT) or of each event
+code (.fif) is returned. This allows the trigger channels and event codes of a
+file to be filled in without having to know them in advance.
+"""
+
+import numpy as np
+from mne import pick_types
+from mne.io import read_raw_fif
+
+from .kit_header import iter_kit_data
+from .kit_triggers import CHUNK_SIZE, can_be_trigger
+
+# names of the stim channel of .fif data, in order of preference
+FIF_STIM_CHANNELS = ['STI101', 'STI 101', 'STI 014']
+
+
+def scan_kit_triggers(fname, data_info, threshold=1, chunk_size=CHUNK_SIZE):
+    """Find the channels of a .con file which have triggers on them.
+
+    An event is when a channel goes above the threshold, the same as for
+    `kit_triggers.find_kit_events`.
+
+    Parameters
+    ----------
+    fname : str
+        Path to the .con file.
+    data_info : dict
+        The information about the layout of the raw data in the file as
+        found by `con_file.load_data`.
+    threshold : float
+        The voltage above which a trigger channel is considered to be on.
+    chunk_size : int
+        The number of samples to read at a time.
+
+    Returns
+    -------
+    summary : dict
+        The sampling frequency, the number of samples and a list of the
+        number of events and the times of the first and last event (s) on
+        each channel which has any events. The channel number is the 'value'
+        of the events.
+    """
+    channels = [ch for ch in range(data_info['nchan']) if
+                can_be_trigger(ch, data_info)]
+    counts = np.zeros(len(channels), dtype=int)
+    first = np.full(len(channels), -1)
+    last = np.full(len(channels), -1)
+    prev = None
+    for start, block in iter_kit_data(fname, data_info, chunk_size,
+                                      channels):
+        on = block > threshold
+        if prev is None:
+            # a channel which is on at the start has no onset
+            prev = on[0]
+        onsets = on & ~np.concatenate(([prev], on[:-1]))
+        prev = on[-1]
+        counts += onsets.sum(axis=0)
+        found = onsets.any(axis=0)
+        new = found & (first < 0)
+        first[new] = np.argmax(onsets, axis=0)[new] + start
+        last[found] = (start + len(onsets) - 1 -
+                       np.argmax(onsets[::-1], axis=0)[found])
+
+    return _summary(channels, counts, first, last, data_info['sfreq'],
+                    data_info['n_samples'])
+
+
+def scan_fif_triggers(fname, chunk_size=CHUNK_SIZE):
+    """Find the event codes on the stim channel of a .fif file.
+
+    An event is when the value of the stim channel increases to a non-zero
+    value, the same as for `mne.find_events` with the default parameters.
+
+    Parameters
+    ----------
+    fname : str
+        Path to the .fif file.
+    chunk_size : int
+        The number of samples to read at a time.
+
+    Returns
+    -------
+    summary : dict
+        The name of the stim channel, the sampling frequency, the number of
+        samples and a list of the number of events and the times of the
+        first and last event (s) of each event code.
+    """
+    raw = read_raw_fif(fname, allow_maxshield=True, verbose='ERROR')
+    stim = _fif_stim_channel(raw)
+    found = dict()
+    if stim is not None:
+        prev = None
+        for start in range(0, raw.n_times, chunk_size):
+            values = np.round(raw.get_data(
+                picks=[stim], start=start, stop=start + chunk_size)[0])
+            values = values.astype(int)
+            if prev is None:
+                prev = values[0]
+            steps = np.concatenate(([prev], values))
+            prev = values[-1]
+            idx = np.where((steps[1:] > steps[:-1]) & (steps[1:] > 0))[0]
+            codes = values[idx]
+            for code in np.unique(codes):
+                onsets = idx[codes == code] + start
+                count, first, last = found.get(int(code), (0, onsets[0], 0))
+                found[int(code)] = (count + len(onsets), first, onsets[-1])
+
+    codes = sorted(found)
+    summary = _summary(codes, [found[code][0] for code in codes],
+                       [found[code][1] for code in codes],
+                       [found[code][2] for code in codes],
+                       raw.info['sfreq'], raw.n_times)
+    summary['stim_channel'] = None if stim is None else raw.ch_names[stim]
+    return summary
+
+
+def format_trigger(label, trigger):
+    """Return a description of the events found on a channel or of an event
+    code."""
+    return '{0}: {1} event{2} ({3:.1f} s to {4:.1f} s)'.format(
+        label, trigger['count'], '' if trigger['count'] == 1 else 's',
+        trigger['first'], trigger['last'])
+
+
+def _fif_stim_channel(raw):
+    """Return the index of the stim channel of the raw data, or None if it
+    has no stim channel."""
+    for name in FIF_STIM_CHANNELS:
+        if name in raw.ch_names:
+            return raw.ch_names.index(name)
+    picks = pick_types(raw.info, meg=False, stim=True)
+    if len(picks) != 0:
+        return int(picks[0])
+    return None
+
+
+def _summary(values, counts, first, last, sfreq, n_samples):
+    """Return the summary of the values which have events."""
+    triggers = []
+    for value, count, first_, last_ in zip(values, counts, first, last):
+        if count != 0:
+            triggers.append({'value': int(value),
+                             'count': int(count),
+                             'first': float(first_ / sfreq),
+                             'last': float(last_ / sfreq)})
+    return {'sfreq': sfreq, 'n_samples': n_samples, 'triggers': triggers}
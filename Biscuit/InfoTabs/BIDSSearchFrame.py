@@ -3,9 +3,8 @@ from tkinter import StringVar, Entry, Text, Scrollbar, filedialog, messagebox
 from tkinter import END, FLAT, NORMAL, DISABLED, HORIZONTAL, NONE
 from webbrowser import open_new as open_hyperlink
 
-from bidshandler import Scan
-
-from Biscuit.utils.utils import str_to_obj, get_bidsobj_info
+from Biscuit.utils.utils import (str_to_obj, get_bidsobj_info,
+                                 is_bids_object)
 from Biscuit.utils.constants import OSCONST
 from Biscuit.Windows.SendFilesWindow import SendFilesWindow
 from Biscuit.CustomWidgets import WidgetTable
@@ -165,7 +164,7 @@ class BIDSSearchFrame(Frame):
     def _select_obj(self, obj):
         """Highlight the selected object in the treeview."""
         # find the selected object's sid
-        if isinstance(obj, Scan):
+        if is_bids_object(obj, 'Scan'):
             # for scan objects we want to go to the actual raw object
             fpath = obj.raw_file
         else:
@@ -1,9 +1,15 @@
-from tkinter import StringVar, BooleanVar
+from tkinter import StringVar, BooleanVar, DISABLED, NORMAL, messagebox
 from tkinter import Entry as tkEntry
-from tkinter.ttk import Frame, Label, Checkbutton
+from tkinter.ttk import Frame, Label, Checkbutton, Button
 
 from Biscuit.FileTypes import con_file
+from Biscuit.FileTypes.states import ChannelState
 from Biscuit.CustomWidgets import WidgetTable
+from Biscuit.Management import bind_var, ToolTipManager
+from Biscuit.utils.executor import get_executor
+
+# assign the tool tip manager
+ttm = ToolTipManager()
 
 
 class ChannelInfoFrame(Frame):
@@ -39,6 +45,22 @@ class ChannelInfoFrame(Frame):
             remove_script=self.remove_channel,
             sort_column=0)
         self.channels_table.grid(sticky='nsew')
+        btn_frame = Frame(self)
+        btn_frame.grid(column=0, row=1, sticky='w')
+        self.triggers_btn = Button(btn_frame, text="Find triggers",
+                                   command=self.find_triggers)
+        self.triggers_btn.grid(column=0, row=0)
+        ttm.register(self.triggers_btn,
+                     "Find the channels which have triggers on them.\nThe "
+                     "first time this is done for a file all the trigger "
+                     "channels are read, which can take some time.")
+        self.suggest_btn = Button(btn_frame, text="Suggest bad channels",
+                                  command=self.suggest_bads)
+        self.suggest_btn.grid(column=1, row=0)
+        ttm.register(self.suggest_btn,
+                     "Find channels whose signal is unusual compared to the "
+                     "other channels.\nThe first time this is done for a "
+                     "file all the data is read, which can take some time.")
         self.grid_columnconfigure(0, weight=1)
         self.grid_rowconfigure(0, weight=1)
         self.master.grid_columnconfigure(0, weight=1)
@@ -58,16 +80,19 @@ class ChannelInfoFrame(Frame):
 
     def add_channel_vars(self, i):
         if i not in self._file.tab_info.keys():
-            name_var = StringVar()
-            name_var.set(self._file.channel_names[i])
-            bad_var = BooleanVar()
-            bad_var.set(False)
-            trigger_var = BooleanVar()
-            trigger_var.set(False)
-            desc_var = StringVar()
-            desc_var.set("")
-            self._file.tab_info[i] = [name_var, bad_var, trigger_var,
-                                      desc_var]
+            self._file.tab_info[i] = ChannelState(self._file.channel_names[i])
+
+    def channel_vars(self, i):
+        """Return the row of Variables bound to the information of the
+        channel."""
+        ch_data = self._file.tab_info[i]
+        row = [bind_var(StringVar(), ch_data, 'name'),
+               bind_var(BooleanVar(), ch_data, 'bad'),
+               bind_var(BooleanVar(), ch_data, 'trigger'),
+               bind_var(StringVar(), ch_data, 'description')]
+        if ch_data.trigger:
+            row[-1] = {'var': row[-1], 'configs': {'state': 'normal'}}
+        return row
 
     def add_channel_from_selection(self):
         # this will look up to see if the con file has any saved info for the
@@ -102,12 +127,7 @@ class ChannelInfoFrame(Frame):
 
         # finally, return the required data:
         self.add_channel_vars(i)
-        if self._file.tab_info[i][-2].get():
-            return [*self._file.tab_info[i][:-1],
-                    {'var': self._file.tab_info[i][-1],
-                     'configs': {'state': 'normal'}}]
-        else:
-            return self._file.tab_info[i]
+        return self.channel_vars(i)
 
     def remove_channel(self, idx):
         # Simply adds the channel number that was removed back into the list of
@@ -126,6 +146,28 @@ class ChannelInfoFrame(Frame):
         self.channels_table.nameselection.configure(
             values=self.channel_name_states['not shown'])
 
+    def find_triggers(self):
+        """ Find the channels with triggers on them in the background and
+        offer to mark them as trigger channels once found """
+        self.triggers_btn.config(state=DISABLED)
+        file = self.file
+
+        def _found(summary):
+            self._found_triggers(file, summary)
+        get_executor().submit(file.find_triggers, callback=_found,
+                              errback=_found, long_running=True)
+
+    def suggest_bads(self):
+        """ Find the channels which look bad in the background and offer
+        to mark them as bad once found """
+        self.suggest_btn.config(state=DISABLED)
+        file = self.file
+
+        def _found(stats):
+            self._found_channel_stats(file, stats)
+        get_executor().submit(file.channel_stats, callback=_found,
+                              errback=_found, long_running=True)
+
     def update(self):
         var_data = []
         not_shown = []
@@ -136,18 +178,69 @@ class ChannelInfoFrame(Frame):
             else:
                 shown.append(self._file.channel_names[i])
                 # also append the tab info data into a list
-                if self.file.tab_info[i][-2].get():
-                    data = [*self.file.tab_info[i][:-1],
-                            {'var': self.file.tab_info[i][-1],
-                            'configs': {'state': 'normal'}}]
-                else:
-                    data = self.file.tab_info[i]
-                var_data.append(data)
+                var_data.append(self.channel_vars(i))
         self.channel_name_states['not shown'] = not_shown
         self.channel_name_states['shown'] = shown
         self.channels_table.set(var_data)
         self.channels_table.options = self.channel_name_states['not shown']
 
+    def _found_triggers(self, file, summary):
+        from Biscuit.FileTypes.trigger_scan import format_trigger
+        self.triggers_btn.config(state=NORMAL)
+        if isinstance(summary, Exception):
+            _read_error(file, summary)
+            return
+        # only offer the channels that aren't already trigger channels
+        triggers = [trigger for trigger in summary['triggers'] if
+                    not (trigger['value'] in file.tab_info and
+                         file.tab_info[trigger['value']].trigger)]
+        if len(triggers) == 0:
+            messagebox.showinfo("No Triggers Found",
+                                "No other channels have triggers on them.")
+            return
+        found = '\n'.join(
+            format_trigger(file.channel_names[trigger['value']], trigger)
+            for trigger in triggers)
+        if messagebox.askyesno(
+                "Triggers Found",
+                "The following channels have triggers on them:\n\n{0}\n\n"
+                "Mark them as trigger channels?".format(found)):
+            for trigger in triggers:
+                ch_data = file.channel_state(trigger['value'])
+                ch_data.trigger = True
+                # the descriptions are used as the names of the events so
+                # need to be unique
+                if ch_data.description == '':
+                    ch_data.description = ch_data.name
+            if file is self.file:
+                self.update()
+
+    def _found_channel_stats(self, file, stats):
+        from Biscuit.FileTypes.channel_stats import suggest_bads
+        self.suggest_btn.config(state=NORMAL)
+        if isinstance(stats, Exception):
+            _read_error(file, stats)
+            return
+        # only suggest the channels that aren't already marked as bad
+        bads = dict((ch, reasons) for ch, reasons in
+                    suggest_bads(stats).items() if
+                    not (ch in file.tab_info and file.tab_info[ch].bad))
+        if len(bads) == 0:
+            messagebox.showinfo("No Bad Channels",
+                                "No other channels look bad.")
+            return
+        reasons = '\n'.join(
+            '{0}: {1}'.format(file.channel_names[ch], ', '.join(bads[ch]))
+            for ch in sorted(bads))
+        if messagebox.askyesno(
+                "Suggested Bad Channels",
+                "The following channels look bad:\n\n{0}\n\nMark them as "
+                "bad?".format(reasons)):
+            for ch in bads:
+                file.channel_state(ch).bad = True
+            if file is self.file:
+                self.update()
+
     @property
     def file(self):
         return self._file
@@ -169,3 +262,10 @@ class ChannelInfoFrame(Frame):
                 self.update()
             else:
                 self.is_loaded = False
+
+
+def _read_error(file, error):
+    """Show the error raised when the data of the file couldn't be read."""
+    messagebox.showerror(
+        "Error", "The data of {0} couldn't be read:\n{1}".format(file.file,
+                                                                  error))
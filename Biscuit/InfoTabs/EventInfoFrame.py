@@ -1,8 +1,14 @@
-from tkinter import StringVar, IntVar, Entry
-from tkinter.ttk import Frame
+from tkinter import StringVar, IntVar, Entry, DISABLED, NORMAL, messagebox
+from tkinter.ttk import Frame, Button
 from Biscuit.FileTypes import FIFData
+from Biscuit.FileTypes.states import EventState
 from Biscuit.CustomWidgets.InfoEntries import ValidatedEntry
 from Biscuit.CustomWidgets import WidgetTable
+from Biscuit.Management import bind_var, ToolTipManager
+from Biscuit.utils.executor import get_executor
+
+# assign the tool tip manager
+ttm = ToolTipManager()
 
 
 class EventInfoFrame(Frame):
@@ -32,6 +38,13 @@ class EventInfoFrame(Frame):
                              Entry],
             sort_column=0)
         self.events_table.grid(sticky='nsew')
+        self.find_btn = Button(self, text="Find events",
+                               command=self.find_events)
+        self.find_btn.grid(column=0, row=1, sticky='w')
+        ttm.register(self.find_btn,
+                     "Find the event codes on the stim channel.\nThe first "
+                     "time this is done for a file the whole stim channel "
+                     "is read, which can take some time.")
         self.grid_columnconfigure(0, weight=1)
         self.grid_rowconfigure(0, weight=1)
         self.master.grid_columnconfigure(0, weight=1)
@@ -42,24 +55,67 @@ class EventInfoFrame(Frame):
         rem_id = self.events_table.data[idx][0].get()
         self.file.interesting_events.remove(rem_id)
         for event in self.file.event_info:
-            if event['event'].get() == rem_id:
+            if event.event == rem_id:
                 self.file.event_info.remove(event)
                 break
 
     def _add_event(self):
-        """ Add the two new variables to the underlying FIFData object """
-        num = IntVar()
-        num.set(0)
-        desc = StringVar()
-        # set the dictionary key as the name of the variable so that it is
-        # unique. We cannot use the actual value here as it will change.
-        self.file.event_info.append({'event': num, 'description': desc})
-        return [num, desc]
+        """ Add a new event to the underlying FIFData object """
+        event = EventState()
+        self.file.event_info.append(event)
+        return self._event_vars(event)
+
+    def _event_vars(self, event):
+        """ Return the Variables bound to the values of the event """
+        return [bind_var(IntVar(), event, 'event'),
+                bind_var(StringVar(), event, 'description')]
+
+    def find_events(self):
+        """ Find the event codes in the file in the background and offer to
+        add them once found """
+        self.find_btn.config(state=DISABLED)
+        file = self.file
+
+        def _found(summary):
+            self._found_events(file, summary)
+        get_executor().submit(file.find_triggers, callback=_found,
+                              errback=_found, long_running=True)
+
+    def _found_events(self, file, summary):
+        self.find_btn.config(state=NORMAL)
+        if isinstance(summary, Exception):
+            messagebox.showerror(
+                "Error", "The data of {0} couldn't be read:\n{1}".format(
+                    file.file, summary))
+            return
+        # only offer the events that aren't already in the table
+        triggers = [trigger for trigger in summary['triggers'] if
+                    trigger['value'] not in file.interesting_events]
+        if len(triggers) == 0:
+            messagebox.showinfo("No Events Found",
+                                "No other events were found.")
+            return
+        from Biscuit.FileTypes.trigger_scan import format_trigger
+        found = '\n'.join(format_trigger(str(trigger['value']), trigger)
+                          for trigger in triggers)
+        if messagebox.askyesno(
+                "Events Found",
+                "The following event codes were found on {0}:\n\n{1}\n\n"
+                "Add them to the events?".format(summary['stim_channel'],
+                                                 found)):
+            for trigger in triggers:
+                # the descriptions are used as the names of the events so
+                # need to be unique
+                file.event_info.append(
+                    EventState(trigger['value'], str(trigger['value'])))
+                file.interesting_events.add(trigger['value'])
+            if file is self.file:
+                self.update()
 
     def update(self):
         data = []
-        for d in self.file.event_info:
-            data.append([d['event'], d['description']])
+        for event in self.file.event_info:
+            data.append(self._event_vars(event))
         self.events_table.set(data)
 
     @property
@@ -5,7 +5,9 @@ from tkinter.ttk import Frame, Label, Separator, Button, Combobox
 from Biscuit.CustomWidgets.InfoEntries import (InfoEntry, InfoLabel, InfoCheck,
                                                InfoChoice)
 from Biscuit.CustomWidgets import WidgetTable, DateEntry
-from Biscuit.Management import OptionsVar, convert, ToolTipManager
+from Biscuit.FileTypes.states import BIO_CH_TYPES
+from Biscuit.Management import OptionsVar, convert, ToolTipManager, bind_var
+from Biscuit.Management.BIDSConvert import preview
 
 # assign the tool tip manager
 ttm = ToolTipManager()
@@ -25,7 +27,7 @@ class FifFileFrame(Frame):
 
         self._create_widgets()
 
-        self.current_job_thread = None
+        self.current_job = None
 
     def _create_widgets(self):
         # recording information
@@ -43,6 +45,9 @@ class FifFileFrame(Frame):
                                            "False")
         self.activeshield_info.label.grid(column=0, row=4)
         self.activeshield_info.value.grid(column=1, row=4)
+        self.parts_info = InfoLabel(self, 'Parts', "1")
+        self.parts_info.label.grid(column=0, row=5)
+        self.parts_info.value.grid(column=1, row=5)
 
         Separator(self, orient='vertical').grid(column=2, row=0,
                                                 rowspan=16, sticky='ns')
@@ -159,6 +164,12 @@ class FifFileFrame(Frame):
                                    state=DISABLED)
         self.bids_gen_btn.grid(column=0, row=16)
         ttm.register(self.bids_gen_btn, "Convert session data to BIDS format")
+        self.preview_btn = Button(self, text="Preview",
+                                  command=self.preview_conversion,
+                                  state=DISABLED)
+        self.preview_btn.grid(column=1, row=16)
+        ttm.register(self.preview_btn,
+                     "Show what converting the session data would do")
 
         self.grid()
 
@@ -174,26 +185,29 @@ class FifFileFrame(Frame):
             self.bids_gen_btn.config(state=DISABLED)
 
     def convert_to_bids(self):
-        if self.current_job_thread is None:
-            self.current_job_thread = convert(self.file, self.settings,
-                                              self.parent)
+        if self.current_job is None:
+            self.current_job = convert(self.file, self.settings, self.parent)
         else:
-            if self.current_job_thread.is_alive():      # pylint: disable=E1101
+            if not self.current_job.done():
                 messagebox.showerror("Job Already Running",
                                      "You already have one job running.\n"
                                      "Please wait until it has finished before"
                                      " starting a new one.")
             else:
                 # in this case the job has ended so we nullify the current
-                # job thread then re-run this function
-                self.current_job_thread = None
+                # job then re-run this function
+                self.current_job = None
                 self.convert_to_bids()
 
+    def preview_conversion(self):
+        preview(self.file, self.settings, self.parent)
+
     def update_widgets(self):
         # update info
         self.channel_info.value = self.file.info['Channels']
         self.meas_date_info.value = self.file.info['Measurement date']
         self.activeshield_info.value = self.file.info['Has Active Shielding']
+        self.parts_info.value = self.file.info['Parts']
         # update subject info
         self.sub_id_entry.value = self.file.subject_ID
         self.sub_age_entry.setvar(self.file.subject_age)
@@ -210,8 +224,14 @@ class FifFileFrame(Frame):
         # update channel table
         channel_data = []
         for ch in self.file.channel_info.values():
-            channel_data.append([ch['ch_name'], ch['ch_type']])
+            channel_data.append(
+                [ch.name, OptionsVar(value=ch.ch_type, options=BIO_CH_TYPES)])
         self.channel_table.set(channel_data)
+        # the table holds its own copies of the Variables, so bind those
+        for ch, row in zip(self.file.channel_info.values(),
+                           self.channel_table.data):
+            bind_var(row[0], ch, 'name')
+            bind_var(row[1], ch, 'ch_type')
 
     @property
     def file(self):
@@ -1,21 +1,18 @@
 from tkinter import WORD, END, StringVar
 from tkinter.scrolledtext import ScrolledText
 from tkinter.ttk import Frame, Button, Label
+from importlib.util import find_spec
 from warnings import warn
-try:
-    from pygments import lex
-    from pygments.lexers.python import Python3Lexer
-    from pygments.lexers.matlab import MatlabLexer
-    HAS_PYGMENTS = True
-except ImportError:
-    HAS_PYGMENTS = False
+# pygments is only imported once a file is highlighted
+HAS_PYGMENTS = find_spec('pygments') is not None
+if not HAS_PYGMENTS:
     warn("Python library `pygments` not found. This isn't an issue, however "
          "if you install it you can have nice syntax highlighting when "
          "opening files containing code such as matlab (.m) or python (.py) "
          "files.")
 from datetime import datetime
 
-from Biscuit.utils.utils import threaded
+from Biscuit.utils.executor import get_executor
 
 
 class ScrolledTextInfoFrame(Frame):
@@ -67,7 +64,6 @@ class ScrolledTextInfoFrame(Frame):
     def _update_savetime(self):
         self.saved_time.set("Last saved:\t{0}\t".format(self.file.saved_time))
 
-    @threaded
     def syn(self, event=None):
         """
         Allow for syntax highlighting.
@@ -76,19 +72,29 @@ class ScrolledTextInfoFrame(Frame):
         yet supported.
         #TODO: (maybe?): https://stackoverflow.com/questions/32058760/improve-pygments-syntax-highlighting-speed-for-tkinter-text/32064481  # noqa
 
-        This is threaded to hopefully stop it blocking the view from displaying
-        and causing a race condition.
+        The text is split into tokens in the background so that it doesn't
+        block the view from displaying. The tokens are then highlighted in the
+        tkinter thread.
         """
-        self.textentry.mark_set("range_start", "1.0")
-        data = self.textentry.get("1.0", "end-1c")
         lexer = self.highlighter.lexer
-        if lexer is not None:
-            for token, content in lex(data, lexer()):
+        if lexer is None:
+            return
+        data = self.textentry.get("1.0", "end-1c")
+
+        def _highlight(tokens):
+            # the text may have changed while it was being split up
+            if self.textentry.get("1.0", "end-1c") != data:
+                return
+            self.textentry.mark_set("range_start", "1.0")
+            for token, length in tokens:
                 self.textentry.mark_set("range_end",
-                                        "range_start + %dc" % len(content))
-                self.textentry.tag_add(str(token), "range_start", "range_end")
+                                        "range_start + %dc" % length)
+                self.textentry.tag_add(token, "range_start", "range_end")
                 self.textentry.mark_set("range_start", "range_end")
 
+        get_executor().submit(_tokens, data, lexer, group=('syntax', id(self)),
+                              callback=_highlight)
+
     def save_file(self):
         """ Write the current data in the text widget back to the file """
         file_contents = self.textentry.get("1.0", "end-1c")
@@ -117,6 +123,13 @@ class ScrolledTextInfoFrame(Frame):
             self.update()
 
 
+def _tokens(data, lexer):
+    """Return the name and length of each token in the text."""
+    from pygments import lex
+    return [(str(token), len(content)) for token, content in
+            lex(data, lexer())]
+
+
 class Highlighter():
     def __init__(self):
         self.dtype = None
@@ -144,8 +157,10 @@ class Highlighter():
     @property
     def lexer(self):
         if self.dtype == '.py':
+            from pygments.lexers.python import Python3Lexer
             return Python3Lexer
         elif self.dtype == '.m':
+            from pygments.lexers.matlab import MatlabLexer
             return MatlabLexer
         else:
             return None
@@ -4,6 +4,7 @@ from tkinter.ttk import Label, Separator, Button, Frame
 from Biscuit.CustomWidgets.InfoEntries import InfoEntry, InfoChoice
 from Biscuit.CustomWidgets import DateEntry
 from Biscuit.Management import OptionsVar, convert, ToolTipManager
+from Biscuit.Management.BIDSConvert import preview
 
 # assign the tool tip manager
 ttm = ToolTipManager()
@@ -92,6 +93,12 @@ class SessionInfoFrame(Frame):
         self.bids_gen_btn.grid(column=3, row=7)
         ttm.register(self.bids_gen_btn,
                      ("Convert session data to BIDS format"))
+        self.preview_btn = Button(self, text="Preview",
+                                  command=self.preview_conversion,
+                                  state=DISABLED)
+        self.preview_btn.grid(column=4, row=7)
+        ttm.register(self.preview_btn,
+                     ("Show what converting the session data would do"))
         self.grid()
 
     def update_widgets(self):
@@ -106,6 +113,9 @@ class SessionInfoFrame(Frame):
     def convert_to_bids(self):
         convert(self.file, self.settings, self.parent)
 
+    def preview_conversion(self):
+        preview(self.file, self.settings, self.parent)
+
     @property
     def file(self):
         return self._file
@@ -1,187 +1,141 @@
-from contextlib import redirect_stdout
-from time import sleep
+from queue import Queue
 import os
 import os.path as op
-from tkinter import StringVar
 from datetime import date
-import shutil
 from warnings import warn
-import glob
 
-from bidshandler import Session
 
-import mne
-from mne_bids import write_raw_bids, BIDSPath
-
-from Biscuit.Management import StreamedVar
-from Biscuit.utils.bids_postprocess import (update_sidecar, write_readme,
-                                            update_participants,
-                                            modify_dataset_description,
-                                            clean_emptyroom, update_markers)
-from Biscuit.Windows import ProgressPopup
-from Biscuit.utils.utils import threaded, assign_bids_data, assign_bids_folder
+from Biscuit.utils.bids_postprocess import BIDSMetadataWriter
+from Biscuit.utils.bids_writer import (convert_jobs, get_events_key,
+                                       raw_size)
+from Biscuit.utils.constants import OSCONST
+from Biscuit.utils.copyutils import fast_copy
+from Biscuit.utils.conversion_plan import (ThroughputHistory,
+                                           plan_conversion, THROUGHPUT_NAME)
+from Biscuit.utils.emptyroom import (EmptyRoomRegistry, is_emptyroom,
+                                     split_emptyroom, REGISTRY_NAME)
+from Biscuit.utils.manifest import ConversionManifest, job_fingerprint
+from Biscuit.utils.progress import (ProgressReporter, STARTED,
+                                    WRITE_SIDECARS, COPY_EXTRAS, FINISHED,
+                                    ERROR)
+from Biscuit.utils.executor import get_executor, print_error
+from Biscuit.utils.utils import (assign_bids_data, assign_bids_folder,
+                                 is_bids_object)
 from Biscuit.utils.timeutils import get_chunk_num, get_year
 
+# file the output of mne is written to during conversion
+LOG_NAME = 'conversion.log'
+
 
-@threaded
 def convert(container, settings, parent=None):
     """
     Main function to take all the data from some container (IC or fif file
     currently) and call the bids conversion function (from mne_bids).
     parent is the main GUI object
-    """
-
-    # first, make sure that the container obejct is ready for conversion
-    container.prepare()
 
-    # Construct a name for storing 2 weeks worth of BIDS formatted data.
-    # We chunk into 2 week blocks for ease of uploading to the MEG_RAW archive.
-    chunk_length = settings.get('CHUNK_FREQ', 14)
-    if chunk_length == 0:
-        subfolder_name = ''
-    else:
-        curr_date = date.today()
-        subfolder_name = 'BIDS-{0}-{1}'.format(
-            get_year(curr_date), get_chunk_num(curr_date, chunk_length))
+    The conversion is done in a separate thread which reports its progress
+    to a `ProgressPopup`. This thread is returned.
+    """
+    # Imported here as the Windows module imports this one.
+    from Biscuit.Windows import ProgressPopup
 
-    # Find the SID of the BIDS folder.
-    bids_root_folder_path = op.join(settings['DATA_PATH'], 'BIDS')
-    bids_folder_path = op.join(bids_root_folder_path, subfolder_name)
+    bids_folder_path, target_folder = get_target_folder(container, settings)
 
     # Determine if the BIDS-YYYY-FF folder exists already:
     bidstree_folder_exists = op.exists(bids_folder_path)
 
-    # Create variables for the dynamic displaying of the process.
-    # We unfortunately cannot get particularly granular or precise progress
-    # tracking due to the fact that the conversion is done externally.
-    progress = StreamedVar(['Writing', 'Conversion done'],
-                           {'Writing': _shorten_path})
-    job_name = StringVar()
-
-    has_error = False
-
-    p = ProgressPopup(parent, progress, job_name)
-
-    target_folder = op.join(bids_folder_path,
-                            container.proj_name.get())
-
-    # redict the stout to the StreamedVar as a way of capturing progress
-    with redirect_stdout(progress):
-        for job in container.jobs:
-            if job.is_junk.get():
-                continue
-
-            extra_data = job.extra_data
-
-            emptyroom_path = ''
-            rec_date = None
-            if 'Measurement date' in job.info:
-                date_vals = job.info['Measurement date'].split('/')
-                date_vals.reverse()
-                rec_date = ''.join(date_vals)
-
-            # also check to see if the file is meant to have an associated
-            # empty room file
-            if job.has_empty_room.get() is True:
-                # we will auto-construct a file path based on the date of
-                # creation of the con file
-                # TODO: make this more robust?
-                emptyroom_path = ('sub-emptyroom/ses-{0}/meg/'
-                                  'sub-emptyroom_ses-{0}_task-'
-                                  'noise_meg.con'.format(rec_date))
-
-            # get the variables for the raw_to_bids conversion function:
-            if job.is_empty_room.get():
-                if rec_date is None:
-                    warn('Recording date is not known. Emptry room cannot be '
-                         'exported.')
-                    continue
-                subject_id = 'emptyroom'
-                sess_id = rec_date
-                subject_group = 'n/a'
-                task = 'noise'
-                run = None
-                job.raw.info['subject_info'] = None
-            else:
-                subject_id = container.subject_ID.get()
-                sess_id = container.session_ID.get()
-                if sess_id == '':
-                    sess_id = None
-                subject_group = container.subject_group.get()
-                task = job.task.get()
-                if task == 'None':
-                    task = None
-                run = job.run.get()
-                if run == '':
-                    run = None
-                if emptyroom_path != '':
-                    extra_data['AssociatedEmptyRoom'] = emptyroom_path
-
-            # TODO: change this to just use the event_info property
-            trigger_channels, descriptions = job.get_event_data()
-
-            # assume there is only one for now??
-            event_ids = dict(zip(descriptions,
-                                 [int(i) for i in trigger_channels]))
-
-            #print(job.__dict__) # FOR DEBUG: use this to print out all attributes of the object "job"
-            events_data = _create_events_fiff(getattr(job, 'file'), trigger_channels) 
-            
-            job_name.set("Task: {0}, Run: {1}".format(task, run))
-
-            try:
-                bids_path = BIDSPath(
-                    subject=subject_id,
-                    session=sess_id,
-                    task=task,
-                    run=run,
-                    root=target_folder,
-                    datatype='meg')
-
-                write_raw_bids(
-                    raw=job.raw,
-                    bids_path=bids_path,
-                    event_id=event_ids,
-                    events_data=events_data,
-                    overwrite=True,
-                    verbose=True)
-
-                update_sidecar(op.join(bids_path.directory,
-                                       '{0}_meg.json'.format(bids_path.basename)),
-                               extra_data)
-                update_participants(op.join(target_folder,
-                                            'participants.tsv'),
-                                    ('sub-{0}'.format(subject_id),
-                                        subject_group))
-                write_readme(op.join(target_folder, 'README.txt'),
-                             container.readme)
-                modify_dataset_description(
-                    op.join(target_folder, 'dataset_description.json'),
-                    container.proj_name.get())
-                update_markers(job, bids_path.fpath, bids_path.basename)
-                if subject_id == 'emptyroom':
-                    clean_emptyroom(bids_path.directory)
-                
-                # Do some cleaning up
-                # rename hsp file
-                old_name = glob.glob(op.join(bids_path.directory, '*acq-HSP_headshape.pos'))[0]
-                new_name = old_name.replace('acq-HSP_headshape.pos', 'headshape.txt')
-                if os.path.isfile(new_name): # if file already exists, remove it first (otherwise it won't update)
-                    os.remove(new_name)
-                os.rename(old_name, new_name) 
-                # delete elp file
-                os.remove(glob.glob(op.join(bids_path.directory, '*ELP*'))[0]) 
-
-            except:  # noqa
-                # We want to actually just catch any error and print a
-                # message.
-                progress.curr_value.set("An error occurred during the "
-                                        "conversion process.\nPlease check "
-                                        "the python console to see the error.")
-                has_error = True
-                raise
+    session_folder = get_session_folder(container, target_folder)
+
+    def _update_tree():
+        show_converted(bids_folder_path, bidstree_folder_exists, parent,
+                       session_folder)
+
+    progress = Queue()
+    log_file = op.join(OSCONST.USRDIR, LOG_NAME)
+    ProgressPopup(parent, progress, on_finish=_update_tree,
+                  log_file=log_file)
+
+    return run_conversion(container, settings, target_folder, progress,
+                          log_file)
+
+
+def run_conversion(container, settings, target_folder, progress,
+                   log_file=None):
+    """Convert the container in the background, putting the progress
+    events into the queue `progress`.
+
+    The last event is always either `FINISHED` or `ERROR`. The future of the
+    conversion is returned.
+    """
+    # any error is shown by the progress popup or the queue
+    return get_executor().submit(_run_conversion, container, settings,
+                                 target_folder, progress, log_file,
+                                 errback=print_error, long_running=True)
+
+
+def _run_conversion(container, settings, target_folder, progress,
+                    log_file=None):
+    reporter = ProgressReporter(progress)
+    try:
+        jobs = prepare_jobs(container)
+
+        # only convert the jobs that have changed since they were last
+        # converted
+        manifest = ConversionManifest(target_folder)
+        registry = get_emptyroom_registry()
+        new_jobs, reused = split_emptyroom(
+            [params for params in jobs if not manifest.is_current(params)],
+            target_folder, registry)
+        reporter.emit(STARTED, sum(raw_size(params['raw']) for
+                                   params in new_jobs) +
+                      sum(op.getsize(fname) for fname in
+                          container.extra_files))
+
+        converted = []
+
+        files = dict((job.file, job) for job in container.jobs)
+
+        def _job_done(params, events):
+            converted.append(params)
+            # keep the events so that they don't need to be found again if
+            # the file is re-converted
+            if events is not None:
+                files[params['raw']['file']].events_cache = (
+                    params['events_key'], events)
+
+        convert_jobs(new_jobs, target_folder,
+                     workers=settings.get('CONVERSION_WORKERS', 1),
+                     callback=_job_done, progress=progress,
+                     log_file=log_file, history=get_history())
+        if len(converted) != 0:
+            reporter.emit(WRITE_SIDECARS)
+            finalise_conversion(jobs, container, target_folder, converted)
+        # only record the jobs once their metadata is written
+        record_converted(converted, reused, target_folder, manifest,
+                         registry)
+        reporter.emit(COPY_EXTRAS)
+        copy_extra_files(container, target_folder, progress,
+                         settings.get('LINK_EXTRAS', False))
+    except:  # noqa
+        # We want to actually just catch any error and show a message.
+        reporter.emit(ERROR)
+        raise
+    reporter.emit(FINISHED)
+
+    # This is essentially useless but it suppresses pylint:E1111
+    return True
+
 
+def show_converted(bids_folder_path, bidstree_folder_exists, parent,
+                   session_folder=None):
+    """Add the newly converted data to the file treeview and select it.
+
+    If provided, the folders containing `session_folder` are listed so that
+    it can be selected even if they haven't been opened yet.
+    """
     new_sids = parent.file_treeview.refresh()
+    if session_folder is not None:
+        new_sids.extend(parent.file_treeview.reveal(session_folder))
 
     if not bidstree_folder_exists:
         assign_bids_folder(bids_folder_path, parent.file_treeview,
@@ -194,68 +148,329 @@ def convert(container, settings, parent=None):
     # find the first instance from the newly added folders that is a
     # bidshandler.Session object and set this is the focus of the treeview.
     for sid in new_sids:
-        if isinstance(parent.preloaded_data.get(sid, None), Session):
+        if is_bids_object(parent.preloaded_data.get(sid, None), 'Session'):
             parent.file_treeview.see(sid)
             parent.file_treeview.focus(item=sid)
             # sid added as a tuple for pre-3.6 compatibilty
             parent.file_treeview.selection_set((sid,))
             break
 
-    if not has_error:
-        # copy over any extra files:
-        for file in container.extra_files:
-            ext = op.splitext(file)[1]
-            if ext in ['.m', '.py']:
-                dst = op.join(target_folder, 'code')
-            else:
-                dst = op.join(target_folder,
-                              'sub-{0}'.format(subject_id),
-                              'ses-{0}'.format(sess_id), 'extras')
-            if not op.exists(dst):
-                os.makedirs(dst)
-            shutil.copy(file, dst)
-        progress.curr_value.set("Conversion done! Closing window in 3...")
-        sleep(1)
-        progress.curr_value.set("Conversion done! Closing window in 2...")
-        sleep(1)
-        progress.curr_value.set("Conversion done! Closing window in 1...")
-        sleep(1)
-        p._exit()
 
-    # This is essentially useless but it suppresses pylint:E1111
-    return True
+def check_container(container):
+    """Return the reason the container cannot be converted, or None if it
+    can be."""
+    if not container.contains_required_files:
+        return 'Missing required files.'
+    if container.check_valid():
+        return None
+    if container.proj_name.get() == '':
+        return 'No project ID.'
+    if container.subject_ID.get() == '':
+        return 'No subject ID.'
+    invalid = [op.basename(job.file) for job in container.jobs if
+               not job.check_valid()]
+    return ('Files are missing a run number or associated marker files: '
+            '{0}'.format(', '.join(sorted(invalid))))
+
+
+def plan(container, settings, force=False):
+    """Return the plan of what converting the container would do, without
+    converting anything.
+
+    Parameters
+    ----------
+    container : instance of BIDSContainer
+        The container to be converted.
+    settings : dict
+        The program settings.
+    force : bool
+        Whether all the jobs would be converted, even if they are unchanged
+        since they were last converted.
+
+    Returns
+    -------
+    plan : dict
+        See `Biscuit.utils.conversion_plan.plan_conversion`. The BIDS folder
+        and the chunk folder within the data folder's BIDS folder are also
+        included.
+    """
+    bids_folder_path, target_folder = get_target_folder(container, settings)
+    jobs = prepare_jobs(container)
+    current = []
+    if not force:
+        manifest = ConversionManifest(target_folder)
+        current = [params for params in jobs if manifest.is_current(params)]
+    # empty room recordings already in the folder aren't written again
+    current.extend(split_emptyroom(
+        [params for params in jobs if params not in current],
+        target_folder, get_emptyroom_registry())[1])
+    conversion_plan = plan_conversion(
+        jobs, target_folder, current=current, history=get_history(),
+        workers=settings.get('CONVERSION_WORKERS', 1))
+    conversion_plan['path'] = container.file
+    conversion_plan['bids_folder'] = bids_folder_path
+    # the name of the chunk folder (BIDS-YYYY-NN), if chunking is used
+    conversion_plan['chunk'] = op.basename(op.normpath(bids_folder_path))
+    if conversion_plan['chunk'] == 'BIDS':
+        conversion_plan['chunk'] = None
+    return conversion_plan
+
+
+def preview(container, settings, parent):
+    """Show the plan of what converting the container would do.
+
+    The plan is made in the background as the fingerprint of each job is
+    found from the files. The future of the planning is returned.
+    """
+    # Imported here as the Windows module imports this one.
+    from Biscuit.Windows import ConversionPlanWindow
+    return get_executor().submit(
+        plan, container, settings,
+        callback=lambda conversion_plan: ConversionPlanWindow(
+            parent, conversion_plan))
+
+
+def get_history():
+    """Return the throughput of previous conversions."""
+    return ThroughputHistory(op.join(OSCONST.USRDIR, THROUGHPUT_NAME))
+
+
+def get_emptyroom_registry():
+    """Return the registry of the empty room recordings converted."""
+    return EmptyRoomRegistry(op.join(OSCONST.USRDIR, REGISTRY_NAME))
+
+
+def record_converted(converted, reused, target_folder, manifest, registry):
+    """Record the converted jobs in the manifest and any empty room
+    recordings in the registry.
+
+    Parameters
+    ----------
+    converted : list of dict
+        The jobs which were converted.
+    reused : list of dict
+        The empty room jobs which weren't converted as the recording was
+        already in the folder.
+    target_folder : str
+        The folder the jobs were converted into.
+    manifest : instance of ConversionManifest
+        The manifest of the folder.
+    registry : instance of EmptyRoomRegistry
+        The registry of the empty room recordings converted.
+    """
+    if len(converted) == 0 and len(reused) == 0:
+        return
+    for params in converted + reused:
+        manifest.update(params)
+        if is_emptyroom(params):
+            registry.add(params, target_folder)
+    manifest.save()
+    registry.save()
+
+
+def get_target_folder(container, settings):
+    """Return the paths of the BIDS folder and the project folder within it
+    that the container will be converted into."""
+    # Construct a name for storing 2 weeks worth of BIDS formatted data.
+    # We chunk into 2 week blocks for ease of uploading to the MEG_RAW archive.
+    chunk_length = settings.get('CHUNK_FREQ', 14)
+    if chunk_length == 0:
+        subfolder_name = ''
+    else:
+        curr_date = date.today()
+        subfolder_name = 'BIDS-{0}-{1}'.format(
+            get_year(curr_date), get_chunk_num(curr_date, chunk_length))
+
+    # Find the SID of the BIDS folder.
+    bids_root_folder_path = op.join(settings['DATA_PATH'], 'BIDS')
+    bids_folder_path = op.join(bids_root_folder_path, subfolder_name)
+
+    return bids_folder_path, op.join(bids_folder_path,
+                                     container.proj_name.get())
+
+
+def get_session_folder(container, target_folder):
+    """Return the path of the folder within the project folder the container
+    will be converted into."""
+    folder = op.join(target_folder,
+                     'sub-{0}'.format(container.subject_ID.get()))
+    if container.session_ID.get() != '':
+        folder = op.join(folder,
+                         'ses-{0}'.format(container.session_ID.get()))
+    return folder
 
 
-def _shorten_path(fname):
-    """ strip just the final part of the path """
-    return op.basename(fname).split("'")[0]
-
-    
-def _create_events_fiff(raw_data_file, trigger_channels):
-    """ automatically detect events in the specified trigger channels """
-    raw = mne.io.read_raw_kit(
-        raw_data_file,
-        stim=trigger_channels, #[*range(trigger_start, trigger_stop)],
-        slope="+",
-        stim_code="channel",
-        stimthresh=1,  # 2 for adults
-        preload=False,
-        allow_unknown_format=False,
-        verbose=True,
-    )
-
-    events = mne.find_events(
-        raw,
-        output="onset",
-        consecutive=False,
-        min_duration=0,
-        shortest_event=1,  
-        mask=None,
-        uint_cast=False,
-        mask_type="and",
-        initial_event=False,
-        verbose=None,
-    )
-    
-    #mne.write_events(output_fname, events, overwrite=False, verbose=None)
-    return events
+def prepare_jobs(container):
+    """Prepare the container for conversion and return the parameters of all
+    the jobs within it that are to be converted."""
+    # first, make sure that the container obejct is ready for conversion
+    container.prepare()
+
+    jobs = []
+    for job in container.jobs:
+        if job.is_junk.get():
+            continue
+        params = _get_job_params(job, container)
+        if params is not None:
+            params['fingerprint'] = job_fingerprint(params, container.readme)
+            jobs.append(params)
+    return jobs
+
+
+def finalise_conversion(jobs, container, target_folder, converted=None):
+    """Update the metadata files once all the jobs are converted.
+
+    Every file is only written once, regardless of the number of jobs.
+
+    Parameters
+    ----------
+    jobs : list of dict
+        The parameters of all the jobs in the container.
+    container : instance of BIDSContainer
+        The container the jobs are from.
+    target_folder : str
+        The project folder within the BIDS folder.
+    converted : list of dict
+        The jobs which have just been converted. Only these have their
+        sidecar updated. If not provided all the jobs are considered
+        converted.
+    """
+    if converted is None:
+        converted = jobs
+    if len(jobs) == 0:
+        return
+    from mne_bids import BIDSPath
+    writer = BIDSMetadataWriter(target_folder)
+    for params in converted:
+        bids_path = BIDSPath(root=target_folder, datatype='meg',
+                             suffix='meg', extension='.json',
+                             **params['bids'])
+        writer.add_sidecar(str(bids_path.fpath), params['extra_data'])
+    for params in jobs:
+        writer.add_participant('sub-{0}'.format(params['bids']['subject']),
+                               params['group'])
+    writer.set_readme(container.readme)
+    writer.set_name(container.proj_name.get())
+    writer.write()
+
+
+def copy_extra_files(container, target_folder, progress=None,
+                     allow_hardlink=False):
+    """Copy any extra files associated with the container into the BIDS
+    folder.
+
+    Parameters
+    ----------
+    container : instance of BIDSContainer
+        The container the files are associated with.
+    target_folder : str
+        The project folder within the BIDS folder.
+    progress : queue.Queue | None
+        Queue the progress of copying each file is put into. The file is
+        reported as the job.
+    allow_hardlink : bool
+        Whether the files may be hardlinked into the BIDS folder instead of
+        being copied.
+    """
+    for file in container.extra_files:
+        ext = op.splitext(file)[1]
+        if ext in ['.m', '.py']:
+            dst = op.join(target_folder, 'code')
+        else:
+            dst = op.join(target_folder,
+                          'sub-{0}'.format(container.subject_ID.get()),
+                          'ses-{0}'.format(container.session_ID.get()),
+                          'extras')
+        if not op.exists(dst):
+            os.makedirs(dst)
+        reporter = ProgressReporter(progress, file)
+        reporter.emit(COPY_EXTRAS)
+        fast_copy(file, dst, allow_hardlink=allow_hardlink,
+                  callback=lambda n_bytes: reporter.emit(COPY_EXTRAS,
+                                                         n_bytes))
+
+
+def _get_job_params(job, container):
+    """Return all the parameters required to convert the job.
+
+    The returned dictionary only contains plain python data so that it can be
+    passed to a separate process for conversion.
+    If the job cannot be converted None is returned.
+    """
+    extra_data = dict(job.extra_data)
+    raw_params = dict(job.raw_params)
+
+    emptyroom_path = ''
+    rec_date = None
+    if 'Measurement date' in job.info:
+        date_vals = job.info['Measurement date'].split('/')
+        date_vals.reverse()
+        rec_date = ''.join(date_vals)
+
+    # also check to see if the file is meant to have an associated
+    # empty room file
+    if job.has_empty_room.get() is True:
+        # we will auto-construct a file path based on the date of
+        # creation of the con file
+        # TODO: make this more robust?
+        emptyroom_path = ('sub-emptyroom/ses-{0}/meg/'
+                          'sub-emptyroom_ses-{0}_task-'
+                          'noise_meg.con'.format(rec_date))
+
+    # get the variables for the raw_to_bids conversion function:
+    if job.is_empty_room.get():
+        if rec_date is None:
+            warn('Recording date is not known. Emptry room cannot be '
+                 'exported.')
+            return None
+        subject_id = 'emptyroom'
+        sess_id = rec_date
+        subject_group = 'n/a'
+        task = 'noise'
+        run = None
+        raw_params['subject_info'] = None
+    else:
+        subject_id = container.subject_ID.get()
+        sess_id = container.session_ID.get()
+        if sess_id == '':
+            sess_id = None
+        subject_group = container.subject_group.get()
+        task = job.task.get()
+        if task == 'None':
+            task = None
+        run = job.run.get()
+        if run == '':
+            run = None
+        if emptyroom_path != '':
+            extra_data['AssociatedEmptyRoom'] = emptyroom_path
+
+    # TODO: change this to just use the event_info property
+    trigger_channels, descriptions = job.get_event_data()
+
+    # assume there is only one for now??
+    event_ids = dict(zip(descriptions,
+                         [int(i) for i in trigger_channels]))
+
+    markers = []
+    if job.hpi:
+        markers = [mrk.file for mrk in job.hpi]
+
+    # use the events from the last conversion if nothing has changed
+    events_key = get_events_key(raw_params)
+    events = None
+    if job.events_cache is not None and job.events_cache[0] == events_key:
+        events = job.events_cache[1]
+
+    return {'name': "Task: {0}, Run: {1}".format(task, run),
+            'raw': raw_params,
+            'bids': {'subject': subject_id,
+                     'session': sess_id,
+                     'task': task,
+                     'run': run},
+            'group': subject_group,
+            'trigger_channels': trigger_channels,
+            'event_id': event_ids,
+            'extra_data': extra_data,
+            'markers': markers,
+            'events': events,
+            'events_key': events_key}
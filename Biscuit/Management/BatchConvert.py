@@ -0,0 +1,571 @@
+"""
+Headless conversion of data to BIDS format.
+
+This allows a number of folders (KIT) or .fif files to be converted without
+the GUI, either from a job specification file (JSON or TOML) or from the
+data saved by the GUI (savedata.save).
+
+The job specification has the following format (shown as TOML):
+
+    workers = 4                         # optional
+    chunk_freq = 14                     # optional
+
+    [[containers]]
+    path = "raw/1234_ABC_WS001"         # relative to DATA_PATH
+    project = "WS001"
+    subject = "1234"
+    session = "1"
+    group = "Participant"
+    age = ["01", "02", "1990"]          # DD, MM, YYYY
+    sex = "M"
+    dewar_position = "supine"           # KIT only
+    task = "rest"                       # default for all files
+    markers = ["pre.mrk", "post.mrk"]   # KIT only (default all .mrk files)
+
+    [containers.files."1234_ABC_rest.con"]
+    run = "1"
+    triggers = {"161" = "start", "162" = "stop"}
+    bads = [23, 89]
+
+    [containers.files."1234_ABC_emptyroom.con"]
+    emptyroom = true
+
+Any of the file level values (task, run, emptyroom, markers, triggers and
+bads) can also be given at the container level, which is the only place they
+are given for a .fif file.
+Triggers are the channel numbers for KIT data and the event values for .fif
+data.
+
+The files are treated exactly as they would be by the GUI. The file objects
+don't use any tkinter variables, so no display (or Tcl interpreter) is
+required.
+"""
+
+from argparse import ArgumentParser
+from contextlib import redirect_stdout
+import json
+import os
+import os.path as op
+import pickle
+import sys
+import time
+try:
+    import tomllib
+except ImportError:
+    tomllib = None
+
+from Biscuit.FileTypes import KITData, FIFData, BIDSContainer
+from Biscuit.FileTypes.states import EventState
+from Biscuit.Management.BIDSConvert import (check_container,
+                                            get_target_folder, prepare_jobs,
+                                            finalise_conversion,
+                                            copy_extra_files, get_history,
+                                            get_emptyroom_registry,
+                                            record_converted, plan, LOG_NAME)
+from Biscuit.Management.SaveManager import SaveManager
+from Biscuit.utils.bids_writer import convert_jobs
+from Biscuit.utils.emptyroom import split_emptyroom
+from Biscuit.utils.manifest import ConversionManifest
+from Biscuit.utils.settings import DEFAULTSETTINGS
+from Biscuit.utils.constants import OSCONST
+
+STAGES = ['load', 'prepare', 'convert', 'finalise']
+
+
+def main(argv=None):
+    """Entry point of the `biscuit-convert` command.
+
+    Returns the exit code. This is 0 if everything was converted and 1 if
+    anything was skipped.
+    """
+    parser = ArgumentParser(
+        prog='biscuit-convert',
+        description='Convert MEG data to BIDS format without the GUI.')
+    parser.add_argument('data_path', metavar='DATA_PATH',
+                        help='Folder containing the data. The BIDS data is '
+                             'written to the BIDS folder within it.')
+    parser.add_argument('source', metavar='SOURCE', nargs='?',
+                        help='JSON or TOML job specification, or a Biscuit '
+                             'save file. Defaults to the save file of the '
+                             'current user.')
+    parser.add_argument('--only', metavar='PATH', action='append',
+                        default=[],
+                        help='Only convert the folder or .fif file with this '
+                             'path. May be given multiple times.')
+    parser.add_argument('--workers', type=int,
+                        help='Number of processes used for conversion.')
+    parser.add_argument('--chunk-freq', type=int,
+                        help='How often (in days) to create a new BIDS '
+                             'folder. 0 for no chunking.')
+    parser.add_argument('--link-extras', action='store_true',
+                        help='Hardlink any extra files into the BIDS folder '
+                             'instead of copying them if they are on the '
+                             'same filesystem.')
+    parser.add_argument('--force', action='store_true',
+                        help='Convert all files, even if they are unchanged '
+                             'since they were last converted.')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Only show what would be converted, the files '
+                             'that would be written and an estimate of how '
+                             'long it would take.')
+    parser.add_argument('--output', metavar='FILE',
+                        help='Write the summary to FILE instead of stdout.')
+    parser.add_argument('--log', metavar='FILE',
+                        help='Write the output of the conversion to FILE. '
+                             'Defaults to {0} in the Biscuit settings '
+                             'folder.'.format(LOG_NAME))
+    args = parser.parse_args(argv)
+
+    source = args.source
+    if source is None:
+        source = op.join(OSCONST.USRDIR, 'savedata.save')
+    spec = None
+    if op.splitext(source)[1].lower() in ('.json', '.toml'):
+        spec = load_spec(source)
+
+    settings, proj_settings = load_settings()
+    settings['DATA_PATH'] = op.abspath(args.data_path)
+    if spec is not None:
+        if 'workers' in spec:
+            settings['CONVERSION_WORKERS'] = spec['workers']
+        if 'chunk_freq' in spec:
+            settings['CHUNK_FREQ'] = spec['chunk_freq']
+    if args.workers is not None:
+        settings['CONVERSION_WORKERS'] = args.workers
+    if args.chunk_freq is not None:
+        settings['CHUNK_FREQ'] = args.chunk_freq
+    if args.link_extras:
+        settings['LINK_EXTRAS'] = True
+    log_file = args.log
+    if log_file is None:
+        log_file = op.join(OSCONST.USRDIR, LOG_NAME)
+    log_file = op.abspath(log_file)
+    if not op.exists(op.dirname(log_file)):
+        os.makedirs(op.dirname(log_file))
+
+    # The output from mne and mne-bids is written to the log file and
+    # anything else is sent to stderr so that only the summary is written to
+    # stdout.
+    with redirect_stdout(sys.stderr):
+        summary = BatchConverter(settings, proj_settings, force=args.force,
+                                 log_file=log_file).run(
+            spec=spec, savefile=source if spec is None else None,
+            only=args.only, dry_run=args.dry_run)
+
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(summary, f, indent=2)
+    else:
+        json.dump(summary, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+
+    return 0 if len(summary['skipped']) == 0 else 1
+
+
+def load_spec(fname):
+    """Load a JSON or TOML job specification."""
+    if op.splitext(fname)[1].lower() == '.toml':
+        if tomllib is None:
+            raise ImportError('TOML job specifications require python 3.11 '
+                              'or later. Please use a JSON file instead.')
+        with open(fname, 'rb') as f:
+            return tomllib.load(f)
+    with open(fname, 'r') as f:
+        return json.load(f)
+
+
+def load_settings():
+    """Load the settings and project settings saved by the GUI."""
+    settings = dict(DEFAULTSETTINGS)
+    try:
+        with open(op.join(OSCONST.USRDIR, 'settings.pkl'), 'rb') as f:
+            settings.update(pickle.load(f))
+    except FileNotFoundError:
+        pass
+    try:
+        with open(op.join(OSCONST.USRDIR, 'proj_settings.pkl'), 'rb') as f:
+            proj_settings = pickle.load(f)
+    except FileNotFoundError:
+        proj_settings = []
+    return settings, proj_settings
+
+
+class BatchConverter():
+    """Load and convert a number of containers without the GUI.
+
+    This acts as the `parent` of the file objects in place of the main
+    window.
+
+    Parameters
+    ----------
+    settings : dict
+        The program settings. DATA_PATH must be set.
+    proj_settings : list of dict
+        The project settings.
+    force : bool
+        Whether to convert all files, even if they haven't changed since they
+        were last converted.
+    log_file : str
+        The file the output of mne is written to. If not provided it is
+        printed.
+    """
+    # Used by file objects to avoid showing any message boxes.
+    headless = True
+
+    def __init__(self, settings, proj_settings, force=False, log_file=None):
+        self.settings = settings
+        self.proj_settings = proj_settings
+        self.force = force
+        self.log_file = log_file
+        self.file_treeview = FileTree(settings['DATA_PATH'])
+        self.preloaded_data = dict()
+
+        self.timings = dict((stage, 0) for stage in STAGES)
+        self.converted = []
+        self.plans = []
+        self.skipped = []
+
+    def run(self, spec=None, savefile=None, only=[], dry_run=False):
+        """Load and convert all the containers.
+
+        Parameters
+        ----------
+        spec : dict
+            The job specification. If this is None the containers are loaded
+            from `savefile`.
+        savefile : str
+            Path to a file saved by the GUI.
+        only : list of str
+            If not empty only containers with these paths are converted.
+        dry_run : bool
+            If True nothing is converted and the plan of each conversion is
+            returned instead.
+
+        Returns
+        -------
+        summary : dict
+            Summary of what has been converted (or the plans if `dry_run`)
+            and skipped and how long each stage of the conversion took.
+        """
+        start = time.perf_counter()
+        if only:
+            only = set(op.normpath(op.abspath(path)) for path in only)
+        with self._timed('load'):
+            if spec is not None:
+                containers = self.load_spec(spec, only)
+            else:
+                containers = self.load_savefile(savefile)
+        if only:
+            containers = [c for c in containers if op.normpath(c.file) in
+                          only]
+        if dry_run:
+            self.plan(containers)
+        else:
+            self.convert(containers)
+        self.timings['total'] = time.perf_counter() - start
+        summary = {'converted': self.converted,
+                   'skipped': self.skipped,
+                   'timings': dict((stage, round(value, 3)) for stage, value
+                                   in self.timings.items())}
+        if dry_run:
+            del summary['converted']
+            summary['plans'] = self.plans
+        return summary
+
+    def load_savefile(self, savefile):
+        """Load all the containers from the data saved by the GUI."""
+        save_handler = SaveManager(self)
+        save_handler.save_file = savefile
+        save_handler.load(load_bids=False)
+        return [obj for obj in self.preloaded_data.values() if
+                isinstance(obj, BIDSContainer)]
+
+    def load_spec(self, spec, only=None):
+        """Load all the containers specified in the job specification.
+
+        If `only` is provided only the containers with those paths are
+        loaded.
+        """
+        containers = []
+        for container_spec in spec.get('containers', []):
+            fpath = op.normpath(op.join(self.settings['DATA_PATH'],
+                                        container_spec['path']))
+            if only and fpath not in only:
+                continue
+            try:
+                container = self._load_container(fpath)
+                _apply_spec(container, container_spec)
+            except Exception as e:
+                self._skip(fpath, e)
+                continue
+            containers.append(container)
+        return containers
+
+    def plan(self, containers):
+        """Plan the conversion of all the containers which are valid."""
+        for container in containers:
+            with self._timed('prepare'):
+                reason = check_container(container)
+                if reason is not None:
+                    self._skip(container.file, reason)
+                    continue
+                try:
+                    self.plans.append(plan(container, self.settings,
+                                           force=self.force))
+                except Exception as e:
+                    self._skip(container.file, e)
+
+    def convert(self, containers):
+        """Convert all the containers which are valid.
+
+        Containers with the same target folder have all their jobs converted
+        together so that the workers are kept busy.
+        """
+        targets = dict()
+        for container in containers:
+            with self._timed('prepare'):
+                reason = check_container(container)
+                if reason is not None:
+                    self._skip(container.file, reason)
+                    continue
+                try:
+                    _, target = get_target_folder(container, self.settings)
+                    jobs = prepare_jobs(container)
+                except Exception as e:
+                    self._skip(container.file, e)
+                    continue
+            targets.setdefault(target, []).append((container, jobs))
+
+        for target, items in targets.items():
+            manifest = ConversionManifest(target)
+            registry = get_emptyroom_registry()
+            owners = dict()
+            failed = dict()
+            new_jobs = []
+            for container, jobs in items:
+                for job in jobs:
+                    owners[id(job)] = container
+                    if self.force or not manifest.is_current(job):
+                        new_jobs.append(job)
+            # the same empty room recording is often in a number of the
+            # containers but only needs to be converted once
+            new_jobs, reused = split_emptyroom(new_jobs, target, registry)
+
+            def _job_failed(job, e):
+                failed.setdefault(owners[id(job)], e)
+
+            with self._timed('convert'):
+                convert_jobs(new_jobs, target,
+                             workers=self.settings.get('CONVERSION_WORKERS',
+                                                       1),
+                             errback=_job_failed, log_file=self.log_file,
+                             history=get_history())
+
+            new_ids = set(id(job) for job in new_jobs)
+            reused_ids = set(id(job) for job in reused)
+            with self._timed('finalise'):
+                for container, jobs in items:
+                    if container in failed:
+                        self._skip(container.file, failed[container])
+                        continue
+                    converted = [job for job in jobs if id(job) in new_ids]
+                    try:
+                        if len(converted) != 0:
+                            finalise_conversion(jobs, container, target,
+                                                converted)
+                            copy_extra_files(
+                                container, target,
+                                allow_hardlink=self.settings.get(
+                                    'LINK_EXTRAS', False))
+                        # only record the jobs once their metadata is
+                        # written
+                        record_converted(
+                            converted,
+                            [job for job in jobs if id(job) in reused_ids],
+                            target, manifest, registry)
+                    except Exception as e:
+                        self._skip(container.file, e)
+                        continue
+                    self.converted.append(
+                        {'path': container.file,
+                         'target': target,
+                         'jobs': [job['name'] for job in converted],
+                         'unchanged': [job['name'] for job in jobs if
+                                       id(job) not in new_ids]})
+
+    def _load_container(self, fpath):
+        """Create and load the container for the file or folder."""
+        if not op.exists(fpath):
+            raise FileNotFoundError('No such file or folder.')
+        sid = self.file_treeview.sid_from_filepath(fpath)
+        if op.isdir(fpath):
+            container = KITData(id_=sid, file=fpath,
+                                settings=self.proj_settings, parent=self)
+            self.preloaded_data[sid] = container
+            container.initial_processing()
+            if not container.contains_required_files:
+                raise ValueError('Folder does not contain all the required '
+                                 'KIT files (.con, .mrk, .elp, .hsp).')
+        elif op.splitext(fpath)[1] == '.fif':
+            container = FIFData(id_=sid, file=fpath,
+                                settings=self.proj_settings, parent=self)
+            self.preloaded_data[sid] = container
+            container.load_data()
+            if container.mainfile_name is not None:
+                raise ValueError('File is part of {0}.fif, which is converted '
+                                 'instead.'.format(container.mainfile_name))
+        else:
+            raise ValueError('Only folders of KIT data and .fif files can be '
+                             'converted.')
+        return container
+
+    def _skip(self, path, reason):
+        if isinstance(reason, Exception):
+            reason = '{0}: {1}'.format(type(reason).__name__, reason)
+        self.skipped.append({'path': path, 'reason': reason})
+
+    def _timed(self, stage):
+        return _Timer(self.timings, stage)
+
+
+class FileTree():
+    """Minimal replacement for the FileTreeview of the GUI.
+
+    The ids of the entries are simply their normalised paths, except for the
+    root folder which has the id ''.
+    """
+    def __init__(self, directory):
+        self.root_path = op.normpath(directory)
+
+    def get_children(self, sid=''):
+        fpath = self.get_filepath(sid)
+        if not op.isdir(fpath):
+            return ()
+        return tuple(op.join(fpath, fname) for fname in
+                     sorted(os.listdir(fpath)))
+
+    def get_filepath(self, sid):
+        if sid == '':
+            return self.root_path
+        return sid
+
+    def item(self, sid):
+        fpath = self.get_filepath(sid)
+        if op.isdir(fpath):
+            return {'text': op.basename(fpath), 'values': ['', fpath]}
+        fname, ext = op.splitext(op.basename(fpath))
+        return {'text': fname, 'values': [ext, fpath]}
+
+    def parent(self, sid):
+        if sid == '':
+            return ''
+        parent = op.dirname(sid)
+        if parent == self.root_path:
+            return ''
+        return parent
+
+    def populate(self, sid):
+        return []
+
+    def sid_from_filepath(self, fpath, search=True):
+        fpath = op.normpath(fpath)
+        if fpath == self.root_path:
+            return ''
+        if (not fpath.startswith(self.root_path + os.sep) or
+                not op.exists(fpath)):
+            raise KeyError(fpath)
+        return fpath
+
+    def add_tags(self, sid, tags):
+        pass
+
+    def remove_tags(self, sid, tags):
+        pass
+
+
+class _Timer():
+    """Context manager to add the time taken to the total for a stage."""
+    def __init__(self, timings, stage):
+        self.timings = timings
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *args):
+        self.timings[self.stage] += time.perf_counter() - self.start
+
+
+def _apply_spec(container, spec):
+    """Apply the values in the container specification to the container."""
+    if 'project' in spec:
+        container.proj_name.set(spec['project'])
+    if 'subject' in spec:
+        container.subject_ID.set(str(spec['subject']))
+    if 'session' in spec:
+        container.session_ID.set(str(spec['session']))
+    if 'group' in spec:
+        _set_option(container.subject_group, spec['group'])
+    if 'age' in spec:
+        for var, value in zip(container.subject_age, spec['age']):
+            var.set(str(value))
+    if 'sex' in spec:
+        container.subject_gender.set(spec['sex'])
+    if 'dewar_position' in spec:
+        container.dewar_position.set(spec['dewar_position'])
+    if 'extra_files' in spec:
+        base = op.dirname(container.file)
+        container.extra_files = [op.join(base, fname) for fname in
+                                 spec['extra_files']]
+
+    file_specs = spec.get('files', dict())
+    emptyrooms = [job for job in container.jobs if
+                  file_specs.get(op.basename(job.file), spec).get(
+                      'emptyroom', job.is_empty_room.get())]
+    if len(emptyrooms) > 1:
+        raise ValueError('Only one empty room file can be specified.')
+
+    for job in container.jobs:
+        job_spec = dict((key, value) for key, value in spec.items() if
+                        key in ('task', 'run', 'emptyroom', 'markers',
+                                'triggers', 'bads'))
+        job_spec.update(file_specs.get(op.basename(job.file), dict()))
+        _apply_job_spec(job, job_spec, container)
+    container.validate()
+
+
+def _apply_job_spec(job, spec, container):
+    """Apply the values in the file specification to the job."""
+    if 'task' in spec:
+        _set_option(job.task, spec['task'])
+    if 'run' in spec:
+        job.run.set(str(spec['run']))
+    if 'emptyroom' in spec:
+        job.is_empty_room.set(spec['emptyroom'])
+    if 'triggers' in spec:
+        for event, description in spec['triggers'].items():
+            if isinstance(job, FIFData):
+                if int(event) not in job.interesting_events:
+                    job.event_info.append(EventState(int(event), description))
+                    job.interesting_events.add(int(event))
+            else:
+                job.channel_state(int(event)).trigger = True
+                job.channel_state(int(event)).description = description
+    if 'bads' in spec and not isinstance(job, FIFData):
+        for ch in spec['bads']:
+            job.channel_state(int(ch)).bad = True
+    if isinstance(container, KITData):
+        mrk_files = container.contained_files['.mrk']
+        if 'markers' in spec:
+            job.hpi = [mrk for mrk in mrk_files if
+                       op.basename(mrk.file) in spec['markers']]
+        elif job.hpi == []:
+            job.hpi = list(mrk_files)
+    job.validate()
+
+
+def _set_option(var, value):
+    """Set the value of an OptionsVar, adding it to the options if needed."""
+    if value not in var.options:
+        var.append(value)
+    var.set(value)
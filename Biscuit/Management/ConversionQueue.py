@@ -0,0 +1,347 @@
+"""
+Queue of containers (KIT folders or .fif files) to be converted to BIDS.
+
+The queue is saved to the user folder every time it changes so that any
+queued conversions are still queued after Biscuit is restarted.
+"""
+
+import json
+import os
+import os.path as op
+from queue import Queue
+from time import time
+
+from Biscuit.FileTypes.headers import header_files, read_headers
+from Biscuit.Management.BIDSConvert import (check_container,
+                                            get_session_folder,
+                                            get_target_folder, run_conversion,
+                                            show_converted, LOG_NAME)
+from Biscuit.utils.constants import OSCONST
+from Biscuit.utils.executor import get_executor
+from Biscuit.utils.progress import drain, FINISHED, ERROR
+from Biscuit.utils.utils import atomic_write_json
+
+QUEUE_NAME = 'conversion_queue.json'
+# how often the running conversions are checked (ms)
+POLL_INTERVAL = 500
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class QueueEntry():
+    """A container in the conversion queue.
+
+    Parameters
+    ----------
+    path : str
+        Path to the container (the KIT folder or .fif file).
+    state : str
+        One of 'queued', 'running', 'done' or 'failed'.
+    started : float | None
+        The time the conversion started.
+    finished : float | None
+        The time the conversion finished.
+    error : str | None
+        Why the conversion failed.
+    """
+    def __init__(self, path, state=QUEUED, started=None, finished=None,
+                 error=None):
+        self.path = path
+        self.state = state
+        self.started = started
+        self.finished = finished
+        self.error = error
+
+    @property
+    def duration(self):
+        """The number of seconds the conversion took (or has taken so far)."""
+        if self.started is None:
+            return None
+        if self.finished is None:
+            return time() - self.started
+        return self.finished - self.started
+
+    def __getstate__(self):
+        return {'path': self.path, 'state': self.state,
+                'started': self.started, 'finished': self.finished,
+                'error': self.error}
+
+
+class ConversionQueue():
+    """The queue of containers to be converted.
+
+    Parameters
+    ----------
+    fname : str
+        The file the queue is saved to. If None the queue isn't saved.
+    """
+    def __init__(self, fname=None):
+        self.fname = fname
+        self.entries = []
+        # whether the queue is being run
+        self.active = False
+        self.load()
+
+    def add(self, path):
+        """Add the container with the path to the end of the queue.
+
+        If it is already waiting to be converted the existing entry is
+        returned instead.
+        """
+        for entry in self.entries:
+            if entry.path == path and entry.state in (QUEUED, RUNNING):
+                return entry
+        entry = QueueEntry(path)
+        self.entries.append(entry)
+        self.save()
+        return entry
+
+    def remove(self, entry):
+        """Remove the entry from the queue. Running entries can't be
+        removed."""
+        if entry.state != RUNNING:
+            self.entries.remove(entry)
+            self.save()
+
+    def clear_finished(self):
+        """Remove all the entries which have been converted or failed."""
+        self.entries = [entry for entry in self.entries if
+                        entry.state in (QUEUED, RUNNING)]
+        self.save()
+
+    def next_entries(self, limit, target_of):
+        """Return the queued entries which can be started now.
+
+        Parameters
+        ----------
+        limit : int
+            The maximum number of entries which may be running at once.
+        target_of : function
+            Function returning the folder an entry will be converted into, or
+            None if this isn't known yet, in which case the entry is skipped.
+            Two entries are never run into the same folder at once as they
+            both update the same files.
+        """
+        running = [entry for entry in self.entries if entry.state == RUNNING]
+        targets = set(target_of(entry) for entry in running)
+        entries = []
+        for entry in self.entries:
+            if len(running) + len(entries) >= limit:
+                break
+            if entry.state != QUEUED:
+                continue
+            target = target_of(entry)
+            if target is not None and target not in targets:
+                targets.add(target)
+                entries.append(entry)
+        return entries
+
+    def start(self, entry):
+        entry.state = RUNNING
+        entry.started = time()
+        entry.finished = entry.error = None
+        self.save()
+
+    def finish(self, entry, error=None):
+        """Mark the entry as finished. If an error is provided the
+        conversion is marked as failed."""
+        entry.state = DONE if error is None else FAILED
+        entry.finished = time()
+        entry.error = error
+        self.save()
+
+    @property
+    def is_running(self):
+        return any(entry.state == RUNNING for entry in self.entries)
+
+    def load(self):
+        if self.fname is None or not op.exists(self.fname):
+            return
+        try:
+            with open(self.fname, 'r') as f:
+                data = json.load(f)
+        except ValueError:
+            return
+        self.active = data.get('active', False)
+        self.entries = [QueueEntry(**entry) for entry in data['entries']]
+        # anything that was running when Biscuit was closed was never
+        # finished so needs to be converted again
+        for entry in self.entries:
+            if entry.state == RUNNING:
+                entry.state = QUEUED
+                entry.started = None
+
+    def save(self):
+        if self.fname is None:
+            return
+        if not op.exists(op.dirname(self.fname)):
+            os.makedirs(op.dirname(self.fname))
+        atomic_write_json(self.fname,
+                          {'active': self.active,
+                           'entries': [entry.__getstate__() for entry in
+                                       self.entries]},
+                          indent=4)
+
+
+class QueueRunner():
+    """Run the conversion queue from the GUI.
+
+    The containers are converted in separate threads, up to the number set
+    by the QUEUE_CONCURRENCY setting at once. The headers of the files of
+    each queued container are read in the background before it is loaded.
+    Everything else happens on the tkinter thread.
+
+    Parameters
+    ----------
+    parent : instance of MainWindow
+        The main window.
+    executor : instance of TaskExecutor
+        The executor the headers are read by. Defaults to the executor of
+        the GUI.
+    """
+    def __init__(self, parent, executor=None):
+        self.parent = parent
+        self.executor = executor or get_executor()
+        self.queue = ConversionQueue(op.join(OSCONST.USRDIR, QUEUE_NAME))
+        # the progress queue of each running entry
+        self.progress = dict()
+        # the entries whose containers are being loaded
+        self._loading = set()
+        self._after_id = None
+        if self.queue.active:
+            # continue with the queue from the last time Biscuit was run
+            self.start()
+
+    def add(self, container):
+        """Add the container to the queue.
+
+        Returns the reason the container can't be converted, or None if it
+        was added.
+        """
+        reason = check_container(container)
+        if reason is None:
+            self.queue.add(container.file)
+        return reason
+
+    def start(self):
+        self.queue.active = True
+        self.queue.save()
+        if self._after_id is None:
+            # the queue is run from tkinter's event loop, so nothing is
+            # started until the mainloop is running
+            self._after_id = self.parent.after(0, self._poll)
+
+    def stop(self):
+        """Stop starting new conversions. Any which are running are
+        finished."""
+        self.queue.active = False
+        self.queue.save()
+
+    def _sid(self, entry):
+        try:
+            return self.parent.file_treeview.sid_from_filepath(entry.path)
+        except KeyError:
+            raise FileNotFoundError('{0} is not in the data folder.'.format(
+                entry.path))
+
+    def _container(self, entry):
+        return self.parent.preload(self._sid(entry))
+
+    def _target(self, entry):
+        try:
+            container = self.parent.preloaded_data.get(self._sid(entry))
+            if container is None:
+                # not loaded yet
+                return None
+            return get_target_folder(container, self.parent.settings)[1]
+        except Exception:
+            # the entry will fail when it is started
+            return entry.path
+
+    def _load(self, limit):
+        """Start loading the containers of the queued entries which aren't
+        loaded yet, up to the limit at once."""
+        for entry in self.queue.entries:
+            if len(self._loading) >= limit:
+                break
+            if entry.state != QUEUED or entry in self._loading:
+                continue
+            try:
+                sid = self._sid(entry)
+            except FileNotFoundError:
+                # the entry will fail when it is started
+                continue
+            if sid in self.parent.preloaded_data:
+                continue
+            # the folder is listed here as the treeview can only be modified
+            # from this thread
+            self.parent.file_treeview.populate(sid)
+            fpaths = header_files(self.parent.file_treeview, [sid])
+            self._loading.add(entry)
+            self.executor.submit(
+                read_headers, fpaths,
+                callback=lambda _, entry=entry: self._loaded(entry))
+
+    def _loaded(self, entry):
+        """Load the container of the entry now its headers are read."""
+        self._loading.discard(entry)
+        try:
+            self._container(entry)
+        except Exception as e:
+            self.queue.start(entry)
+            self.queue.finish(entry, str(e))
+
+    def _poll(self):
+        self._after_id = None
+        for entry, (progress, on_finish) in list(self.progress.items()):
+            for event in drain(progress):
+                if event.stage == FINISHED:
+                    on_finish()
+                    self.queue.finish(entry)
+                elif event.stage == ERROR:
+                    self.queue.finish(entry, 'An error occurred during the '
+                                             'conversion. Please check the '
+                                             'log for details.')
+                else:
+                    continue
+                del self.progress[entry]
+                break
+
+        if self.queue.active:
+            limit = max(1, self.parent.settings.get('QUEUE_CONCURRENCY', 1))
+            self._load(limit)
+            for entry in self.queue.next_entries(limit, self._target):
+                self._start(entry)
+
+        if (self.queue.active or len(self.progress) != 0 or
+                len(self._loading) != 0):
+            self._after_id = self.parent.after(POLL_INTERVAL, self._poll)
+
+    def _start(self, entry):
+        """Start converting the entry."""
+        try:
+            container = self._container(entry)
+            reason = check_container(container)
+            if reason is not None:
+                raise ValueError(reason)
+            bids_folder_path, target_folder = get_target_folder(
+                container, self.parent.settings)
+        except Exception as e:
+            self.queue.start(entry)
+            self.queue.finish(entry, str(e))
+            return
+        bidstree_folder_exists = op.exists(bids_folder_path)
+        session_folder = get_session_folder(container, target_folder)
+
+        def _on_finish():
+            show_converted(bids_folder_path, bidstree_folder_exists,
+                           self.parent, session_folder)
+
+        progress = Queue()
+        self.progress[entry] = (progress, _on_finish)
+        self.queue.start(entry)
+        run_conversion(container, self.parent.settings, target_folder,
+                       progress, op.join(OSCONST.USRDIR, LOG_NAME))
@@ -1,4 +1,4 @@
-from tkinter import Variable, StringVar, IntVar
+from tkinter import Variable, StringVar, IntVar, TclError
 
 
 class OptionsVar(Variable):
@@ -31,7 +31,9 @@ class OptionsVar(Variable):
 
     def copy(self):
         """Return a copy of the Variable."""
-        return OptionsVar(options=self.options)
+        value = self.get()
+        return OptionsVar(value=value if value != '' else None,
+                          options=self.options)
 
     def get(self):
         value = self._tk.globalgetvar(self._name)
@@ -184,3 +186,82 @@ class RangeVar(IntVar):
         self._max = value
         if self._max_val_callback is not None:
             self._max_val_callback()
+
+
+def bind_var(var, obj, attr):
+    """Bind a Variable to an attribute of an object.
+
+    The Variable is set to the current value of the attribute and the
+    attribute is updated whenever a new value is written to the Variable.
+
+    Parameters
+    ----------
+    var : instance of Variable
+        The Variable to bind.
+    obj : object
+        The object which holds the value.
+    attr : str
+        The name of the attribute of `obj`.
+
+    Returns
+    -------
+    var : instance of Variable
+        The bound Variable.
+    """
+    var.set(getattr(obj, attr))
+
+    def _update(*args):
+        try:
+            setattr(obj, attr, var.get())
+        except (TclError, ValueError):
+            # the value isn't valid yet (eg. an empty IntVar while a number
+            # is being entered)
+            pass
+    var.trace('w', _update)
+    return var
+
+
+def bind_value(var, value):
+    """Bind a Variable to a `Value` of a file object.
+
+    Unlike `bind_var` the binding goes both ways, as the value may also be
+    changed by the file object while it is displayed (eg. when an empty room
+    file is detected).
+
+    Parameters
+    ----------
+    var : instance of Variable
+        The Variable to bind.
+    value : instance of Value
+        The value to bind it to.
+
+    Returns
+    -------
+    unbind : function
+        Function which removes the binding. This should be called once the
+        value is no longer displayed.
+    """
+    var.set(value.get())
+
+    def _update_value(*args):
+        try:
+            new_value = var.get()
+        except (TclError, ValueError):
+            return
+        if new_value != value.get():
+            value.set(new_value)
+
+    def _update_var():
+        try:
+            if var.get() == value.get():
+                return
+        except (TclError, ValueError):
+            pass
+        var.set(value.get())
+    cbname = var.trace('w', _update_value)
+    value.trace('w', _update_var)
+
+    def unbind():
+        var.trace_vdelete('w', cbname)
+        value.untrace(_update_var)
+    return unbind
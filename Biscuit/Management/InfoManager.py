@@ -1,6 +1,5 @@
 from tkinter import HIDDEN, NORMAL, TclError
 from tkinter.ttk import Notebook
-from bidshandler import BIDSTree
 
 from Biscuit.FileTypes import FileInfo, Folder, FIFData
 # TODO: import just InfoTabs and then . these to make this cleaner?
@@ -8,6 +7,7 @@ from Biscuit.InfoTabs import (FifFileFrame, SessionInfoFrame, ConFileFrame,
                               EventInfoFrame, GenericInfoFrame,
                               ScrolledTextInfoFrame, ChannelInfoFrame,
                               BIDSSearchFrame)
+from Biscuit.utils.utils import is_bids_object
 
 # some global names:
 T_CON = 'con_tab'
@@ -128,7 +128,7 @@ class InfoManager(Notebook):
                 else:
                     self.display_tabs(T_MISC)
             else:
-                if isinstance(self.data[0], BIDSTree):
+                if is_bids_object(self.data[0], 'BIDSTree'):
                     self.display_tabs(T_SEARCH)
                     self.bids_search_tab.file = self.data[0]
                     self.bids_search_tab.set_text(str(self.data[0]))
@@ -264,13 +264,9 @@ class InfoManager(Notebook):
     def data(self, new_data):
         """Replace the old data with the new data.
 
-        To get around the race condition indtroduced by the _preload_data
-        function being threaded which in turn causes this to be called in a
-        separate thread, we will check that the id of the suggested new data
+        The data is loaded in the background, so in case the selection has
+        changed since, we will check that the id of the suggested new data
         matches the id of the currently selected object in the file tree.
-        This doesn't completely fix it but it should help a little.
-        Other race condition occurs when performing syntax highlighting of
-        text data drawn in the ScrolledTextInfoFrame
         """
         if new_data != []:
             if isinstance(new_data[0], FileInfo):
@@ -0,0 +1,119 @@
+"""
+Loading of the recordings the user is likely to select next.
+
+When a KIT folder or a .fif file is selected, the other .fif files in the
+same folder and the next few folders in the file tree are loaded one at a
+time, so that they are already loaded when they are selected. The headers of
+their files are read by the background thread of the executor, so that this
+never holds up loading the selection, and each object is then created in the
+tkinter thread. This stops as soon as anything else is selected, or once the
+memory used by Biscuit exceeds the budget set by the PREFETCH_MEMORY setting.
+"""
+
+import os.path as op
+from threading import Event
+
+from Biscuit.FileTypes import KITData
+from Biscuit.FileTypes.headers import header_files, read_headers
+from Biscuit.utils.executor import get_executor
+from Biscuit.utils.settings import PREFETCH_MEMORY
+from Biscuit.utils.utils import memory_usage
+
+# number of folders after the selected one to load
+PREFETCH_FOLDERS = 3
+
+
+class Prefetcher():
+    """Load the recordings near the selected one in the background.
+
+    Parameters
+    ----------
+    parent : instance of MainWindow
+        The main window. Its `preload` method is used to load each file or
+        folder.
+    executor : instance of TaskExecutor
+        The executor the headers are read by. Defaults to the executor of
+        the GUI.
+    """
+    def __init__(self, parent, executor=None):
+        self.parent = parent
+        self.executor = executor or get_executor()
+        self._cancelled = None
+
+    def start(self, obj):
+        """Start loading the recordings near the selected object, if
+        prefetching is enabled."""
+        self.cancel()
+        if not self.parent.settings.get('PREFETCH', False):
+            return
+        sids = self.targets(obj)
+        if len(sids) == 0:
+            return
+        self._cancelled = Event()
+        budget = self.parent.settings.get('PREFETCH_MEMORY', PREFETCH_MEMORY)
+        self._prefetch(sids, self._cancelled, budget * 1024 ** 2)
+
+    def cancel(self):
+        """Stop loading any more recordings."""
+        if self._cancelled is not None:
+            self._cancelled.set()
+            self._cancelled = None
+
+    def targets(self, obj):
+        """Return the sids to load in order for the selected object.
+
+        For a .fif file these are the other .fif files in the same folder,
+        followed by the next few folders (and the .fif files in them). For a
+        KIT folder these are just the next few folders, as the files in a
+        folder are loaded with it.
+        """
+        tree = self.parent.file_treeview
+        ext, fpath = tree.item(obj.ID)['values']
+        if ext == '.fif':
+            folder = tree.parent(obj.ID)
+            sids = [sid for sid in self._fif_files(folder) if sid != obj.ID]
+        elif isinstance(obj, KITData):
+            folder = obj.ID
+            sids = []
+        else:
+            return []
+        if folder != '':
+            siblings = tree.get_children(tree.parent(folder))
+            idx = siblings.index(folder)
+            folders = [sid for sid in siblings[idx + 1:] if
+                       op.isdir(tree.get_filepath(sid))]
+            for sid in folders[:PREFETCH_FOLDERS]:
+                tree.populate(sid)
+                sids.append(sid)
+                sids.extend(self._fif_files(sid))
+        return [sid for sid in sids if sid not in self.parent.preloaded_data]
+
+    def _fif_files(self, folder):
+        tree = self.parent.file_treeview
+        return [sid for sid in tree.get_children(folder) if
+                tree.item(sid)['values'][0] == '.fif']
+
+    def _prefetch(self, sids, cancelled, budget):
+        """Read the headers of the first recording which isn't loaded in the
+        background, and then load it and go on to the rest."""
+        sids = [sid for sid in sids if sid not in self.parent.preloaded_data]
+        if cancelled.is_set() or len(sids) == 0:
+            return
+        usage = memory_usage()
+        if usage is not None and usage > budget:
+            return
+        fpaths = header_files(self.parent.file_treeview, sids[:1])
+        self.executor.submit(
+            read_headers, fpaths, group='prefetch', background=True,
+            callback=lambda _: self._load(sids, cancelled, budget))
+
+    def _load(self, sids, cancelled, budget):
+        if cancelled.is_set():
+            return
+        if sids[0] not in self.parent.preloaded_data:
+            try:
+                self.parent.preload(sids[0])
+            except Exception:
+                # any error will be shown if the file is selected
+                pass
+        self._prefetch(sids[1:], cancelled, budget)
@@ -2,10 +2,10 @@ from tkinter import Menu, StringVar, messagebox, simpledialog, filedialog
 import os.path as path
 import re
 
-from bidshandler import BIDSTree, Project, Subject, Session
 
 from Biscuit.FileTypes import con_file, Folder, BIDSContainer
-from Biscuit.utils.utils import create_folder, assign_bids_folder
+from Biscuit.utils.utils import (create_folder, assign_bids_folder,
+                                 is_bids_object)
 from Biscuit.Windows.SendFilesWindow import SendFilesWindow
 from Biscuit.utils.authorise import authorise
 from Biscuit.utils.utils import validate_markers
@@ -105,8 +105,8 @@ class RightClick():
                     command=lambda: self._upload())
             # allow any folder to be sent to another location using the
             # BIDSMERGE functionality
-            if isinstance(selected_obj,
-                          (BIDSTree, Project, Subject, Session)):
+            if is_bids_object(selected_obj, 'BIDSTree', 'Project',
+                              'Subject', 'Session'):
                 self.popup_menu.add_command(
                     label="Send to...",
                     command=lambda: self._send_to())
@@ -262,9 +262,10 @@ class RightClick():
                     # we have clicked outside the tree. Set the parent as the
                     # root
                     parent = ''
-                self.parent.file_treeview.ordered_insert(
+                sid = self.parent.file_treeview.ordered_insert(
                     parent, values=['', str(full_path)], text=folder_name,
                     open=False)
+                self.parent.file_treeview.generate(sid, str(full_path))
                 print('folder created!!')
             else:
                 print('Folder already exists!')
@@ -296,7 +297,8 @@ class RightClick():
         src_obj = self.parent.preloaded_data[self.curr_selection[0]]
         dst = filedialog.askdirectory(title="Select BIDS folder")
         if dst != '':
-            if isinstance(src_obj, (BIDSTree, Project, Subject, Session)):
+            if is_bids_object(src_obj, 'BIDSTree', 'Project', 'Subject',
+                              'Session'):
                 SendFilesWindow(self.parent, src_obj, dst, opt_verify=True)
             else:
                 # try and convert the object to a BIDSTree
@@ -339,7 +341,7 @@ class RightClick():
                                  "No Archive path has been set. Please set "
                                  "one in the settings.")
             return
-        if not isinstance(src_obj, BIDSTree):
+        if not is_bids_object(src_obj, 'BIDSTree'):
             # automatically convert to a BIDSTree object
             try:
                 self._toggle_bids_folder()
@@ -5,11 +5,10 @@ from tkinter import StringVar
 from datetime import datetime
 from warnings import warn
 
-from bidshandler import BIDSTree
 
 from Biscuit.FileTypes import FIFData, con_file, mrk_file, KITData
 from Biscuit.utils.constants import OSCONST
-from Biscuit.utils.utils import assign_bids_folder
+from Biscuit.utils.utils import assign_bids_folder, is_bids_object
 
 """ Save format specification/taken names:
     # FileInfo:
@@ -69,15 +68,17 @@ class SaveManager():
         path.
         """
         try:
-            return self.parent.file_treeview.sid_from_filepath(path_, False)
+            return self.parent.file_treeview.sid_from_filepath(path_)
         except KeyError:
             raise FileNotFoundError
 
     # TODO: clean this up a bit? Not sure what can be re-factored, but it
     # should be able to be made a bit nicer...
-    def load(self):
+    def load(self, load_bids=True):
         """
         This needs some error handling!!
+
+        If load_bids is False any BIDS folders in the save data are ignored.
         """
         _data = self.parent.preloaded_data
 
@@ -113,7 +114,7 @@ class SaveManager():
                         file.load_data()
                         # then add the file to the preloaded data
                         _data[file.ID] = file
-                    elif isinstance(file, list):
+                    elif isinstance(file, list) and load_bids:
                         # TODO: improve...
                         # In this case it is the BIDSTree data
                         # load all the info (I guess?)
@@ -128,6 +129,7 @@ class SaveManager():
             for file in containers_to_load:
                 try:
                     sid = self.get_file_id(file.file)
+                    self.parent.file_treeview.populate(sid)
                     file.ID = sid
                     file.parent = self.parent
                     file.load_data()
@@ -194,7 +196,7 @@ class SaveManager():
                         except (TypeError, AttributeError):
                             warn('error saving file: {0}'.format(file))
                             raise
-                if isinstance(file, BIDSTree):
+                if is_bids_object(file, 'BIDSTree'):
                     BIDSTree_paths.append(file.path)
             pickle.dump(BIDSTree_paths, f)
 
@@ -1,6 +1,7 @@
 from .ClickContext import ClickContext  # noqa
 #from .InfoManager import InfoManager  # noqa
-from .CustomVars import OptionsVar, StreamedVar, RangeVar  # noqa
+from .CustomVars import (OptionsVar, StreamedVar, RangeVar, bind_var,  # noqa
+                         bind_value)
 #from .SaveManager import SaveManager  # noqa
 from .wckToolTips import ToolTipManager  # noqa
 from .BIDSConvert import convert  # noqa
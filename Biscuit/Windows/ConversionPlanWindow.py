@@ -0,0 +1,83 @@
+from tkinter import Toplevel, Text, END, DISABLED, WORD
+from tkinter.ttk import Frame, Button, Scrollbar
+import os.path as op
+
+from Biscuit.utils.constants import OSCONST
+from Biscuit.utils.utils import get_fsize
+
+
+class ConversionPlanWindow(Toplevel):
+    """
+    Window showing what converting a container would do.
+
+    Parameters
+    ----------
+    master : instance of Tk
+        The parent window.
+    plan : dict
+        The plan produced by `BIDSConvert.plan`.
+    """
+    def __init__(self, master, plan):
+        self.master = master
+        Toplevel.__init__(self, self.master)
+        self.title('Conversion Preview')
+
+        self.plan = plan
+
+        self._create_widgets()
+
+    def _create_widgets(self):
+        frame = Frame(self)
+        frame.grid(sticky='nsew')
+
+        text = Text(frame, wrap=WORD, width=100, height=30,
+                    background=OSCONST.TEXT_BG)
+        text.grid(column=0, row=0, sticky='nsew')
+        yscroll = Scrollbar(frame, orient='vertical', command=text.yview)
+        yscroll.grid(column=1, row=0, sticky='ns')
+        text.configure(yscrollcommand=yscroll.set)
+        text.insert(END, format_plan(self.plan))
+        text.config(state=DISABLED)
+
+        Button(frame, text='Close', command=self.destroy).grid(column=0,
+                                                               row=1)
+
+        frame.grid_rowconfigure(0, weight=1)
+        frame.grid_columnconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+
+
+def format_plan(plan):
+    """Return a readable description of the conversion plan."""
+    jobs = [job for job in plan['jobs'] if job['action'] == 'convert']
+    lines = ['Project folder: {0}'.format(plan['root'])]
+    if plan['chunk'] is not None:
+        lines.append('Chunk folder: {0}'.format(plan['chunk']))
+    lines.append('Files to convert: {0} ({1} unchanged)'.format(
+        len(jobs), len(plan['jobs']) - len(jobs)))
+    if plan['total_bytes'] != 0:
+        lines.append('Data to write: {0}'.format(
+            get_fsize(plan['total_bytes'])))
+    if plan['estimated_seconds'] is None:
+        lines.append('Estimated time: unknown (no previous conversions)')
+    else:
+        lines.append('Estimated time: {0}m {1:02d}s'.format(
+            *divmod(int(round(plan['estimated_seconds'])), 60)))
+    for job in plan['jobs']:
+        lines.append('')
+        lines.append('{0} ({1}): {2}'.format(
+            job['name'], op.basename(job['source']), job['action']))
+        if job['action'] != 'convert':
+            continue
+        for fname in job['files']:
+            line = '    ' + op.relpath(fname, plan['root'])
+            if fname in job['overwrites']:
+                line += ' (overwritten)'
+            lines.append(line)
+    if len(jobs) != 0:
+        lines.append('')
+        lines.append('Dataset files updated:')
+        for fname in plan['dataset_files']:
+            lines.append('    ' + op.relpath(fname, plan['root']))
+    return '\n'.join(lines)
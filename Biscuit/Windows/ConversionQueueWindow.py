@@ -0,0 +1,166 @@
+from tkinter import Toplevel, IntVar, TclError, messagebox
+from tkinter.ttk import Frame, Label, Button, Treeview, Scrollbar
+import os.path as op
+import pickle
+
+from Biscuit.CustomWidgets.InfoEntries import ValidatedEntry
+from Biscuit.FileTypes import BIDSContainer, BIDSFile
+from Biscuit.Management.ConversionQueue import RUNNING
+from Biscuit.Management.wckToolTips import ToolTipManager
+from Biscuit.utils.constants import OSCONST
+
+ttm = ToolTipManager()
+
+# how often the displayed queue is updated (ms)
+REFRESH_INTERVAL = 1000
+
+
+class ConversionQueueWindow(Toplevel):
+    """
+    Window showing the queue of containers to be converted.
+
+    Any containers selected in the file treeview can be added to the queue.
+    The queue keeps running if this window is closed.
+
+    Parameters
+    ----------
+    master : instance of MainWindow
+        The main window. This owns the `QueueRunner`.
+    """
+    def __init__(self, master):
+        self.master = master
+        Toplevel.__init__(self, self.master)
+        self.title('Conversion Queue')
+
+        self.runner = self.master.queue_runner
+        self.settings_file = op.join(OSCONST.USRDIR, 'settings.pkl')
+
+        self.concurrency = IntVar(
+            value=self.master.settings.get('QUEUE_CONCURRENCY', 1))
+        self.concurrency.trace('w', self._set_concurrency)
+
+        self._refresh_id = None
+
+        self._create_widgets()
+        self._refresh()
+
+    def _create_widgets(self):
+        frame = Frame(self)
+        frame.grid(sticky='nsew')
+
+        self.queue_tree = Treeview(frame, columns=['state', 'duration'],
+                                   selectmode='extended')
+        self.queue_tree.heading('#0', text='Data')
+        self.queue_tree.heading('state', text='State')
+        self.queue_tree.heading('duration', text='Duration')
+        self.queue_tree.column('state', width=80, stretch=False)
+        self.queue_tree.column('duration', width=80, stretch=False)
+        self.queue_tree.grid(column=0, row=0, columnspan=5, sticky='nsew')
+        yscroll = Scrollbar(frame, orient='vertical',
+                            command=self.queue_tree.yview)
+        yscroll.grid(column=5, row=0, sticky='ns')
+        self.queue_tree.configure(yscrollcommand=yscroll.set)
+
+        Button(frame, text='Add selected',
+               command=self._add_selected).grid(column=0, row=1)
+        Button(frame, text='Remove',
+               command=self._remove_selected).grid(column=1, row=1)
+        Button(frame, text='Clear finished',
+               command=self._clear_finished).grid(column=2, row=1)
+        self.run_btn = Button(frame, command=self._toggle_running)
+        self.run_btn.grid(column=3, row=1)
+
+        concurrency_lbl = Label(frame, text='Conversions at once:')
+        concurrency_lbl.grid(column=0, row=2, columnspan=2, sticky='w')
+        ttm.register(concurrency_lbl,
+                     'The number of folders or files in the queue that are '
+                     'converted at the same time.\nEach of these also uses '
+                     'the number of conversion processes set in the '
+                     'settings.')
+        ValidatedEntry(frame, textvariable=self.concurrency,
+                       force_dtype='int',
+                       highlightbackground=OSCONST.ENTRY_HLBG).grid(
+            column=2, row=2, sticky='ew', padx=2)
+
+        frame.grid_rowconfigure(0, weight=1)
+        frame.grid_columnconfigure(4, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+
+    def _refresh(self):
+        """Redraw the queue."""
+        if not self.winfo_exists():
+            return
+        self.queue_tree.delete(*self.queue_tree.get_children())
+        for i, entry in enumerate(self.runner.queue.entries):
+            duration = ''
+            if entry.duration is not None:
+                duration = '{0}:{1:02d}'.format(*divmod(int(entry.duration),
+                                                        60))
+            self.queue_tree.insert('', 'end', iid=str(i),
+                                   text=op.basename(entry.path),
+                                   values=[entry.state, duration])
+        if self.runner.queue.active:
+            self.run_btn.config(text='Stop')
+        else:
+            self.run_btn.config(text='Start')
+        self._refresh_id = self.after(REFRESH_INTERVAL, self._refresh)
+
+    def _add_selected(self):
+        """Add the containers selected in the file treeview to the queue."""
+        problems = []
+        for sid in self.master.file_treeview.selection():
+            obj = self.master.preload(sid)
+            # allow a file within a KIT folder to be selected
+            if (isinstance(obj, BIDSFile) and
+                    not isinstance(obj, BIDSContainer)):
+                obj = self.master.preload(
+                    self.master.file_treeview.parent(sid))
+            if not isinstance(obj, BIDSContainer):
+                continue
+            reason = self.runner.add(obj)
+            if reason is not None:
+                problems.append('{0}: {1}'.format(op.basename(obj.file),
+                                                  reason))
+        if len(problems) != 0:
+            messagebox.showwarning(
+                'Not added',
+                'The following could not be added to the queue:\n' +
+                '\n'.join(problems),
+                parent=self)
+        self._redraw()
+
+    def _remove_selected(self):
+        entries = [self.runner.queue.entries[int(iid)] for iid in
+                   self.queue_tree.selection()]
+        for entry in entries:
+            if entry.state != RUNNING:
+                self.runner.queue.remove(entry)
+        self._redraw()
+
+    def _clear_finished(self):
+        self.runner.queue.clear_finished()
+        self._redraw()
+
+    def _toggle_running(self):
+        if self.runner.queue.active:
+            self.runner.stop()
+        else:
+            self.runner.start()
+        self._redraw()
+
+    def _redraw(self):
+        """Redraw the queue now rather than waiting for the next refresh."""
+        if self._refresh_id is not None:
+            self.after_cancel(self._refresh_id)
+        self._refresh()
+
+    def _set_concurrency(self, *args):
+        try:
+            value = max(1, self.concurrency.get())
+        except TclError:
+            # the entry is being edited
+            return
+        self.master.settings['QUEUE_CONCURRENCY'] = value
+        with open(self.settings_file, 'wb') as settings:
+            pickle.dump(self.master.settings, settings)
@@ -13,10 +13,10 @@ from os import makedirs
 
 import webbrowser
 
-from bidshandler import BIDSTree, MappingError
 
 from Biscuit.FileTypes import (generic_file, Folder, KITData, BIDSFile,
                                BIDSContainer)
+from Biscuit.FileTypes.headers import header_files, read_headers
 
 from Biscuit.CustomWidgets import FileTreeview
 
@@ -24,18 +24,19 @@ from Biscuit.Management import ClickContext
 from Biscuit.Management.RightClickManager import RightClick
 from Biscuit.Management.InfoManager import InfoManager
 from Biscuit.Management.SaveManager import SaveManager
+from Biscuit.Management.ConversionQueue import QueueRunner
+from Biscuit.Management.Prefetcher import Prefetcher
 from Biscuit.Windows import (ProjectListWindow, ProgressPopup, CheckSavePopup,
-                             CreditsPopup, SettingsWindow, SendFilesWindow)
-from Biscuit.utils.utils import threaded, get_object_class, assign_bids_data
+                             CreditsPopup, SettingsWindow, SendFilesWindow,
+                             ConversionQueueWindow)
+from Biscuit.utils.dispatcher import get_dispatcher
+from Biscuit.utils.executor import get_executor, print_error
+from Biscuit.utils.settings import DEFAULTSETTINGS
+from Biscuit.utils.startup import phase
+from Biscuit.utils.utils import get_object_class, assign_bids_data
 from Biscuit.utils.constants import OSCONST
 
 # TODO: move into the SettingsWindow
-DEFAULTSETTINGS = {"DATA_PATH": "",
-                   "SHOW_ASSOC_MESSAGE": True,
-                   "ARCHIVE_PATH": OSCONST.SVR_PATH,
-                   "CHUNK_FREQ": 14}
-
-
 class MainWindow(Frame):
     def __init__(self, master):
         self.master = master
@@ -69,7 +70,18 @@ class MainWindow(Frame):
         # later as each load of data takes ~0.5s
         self.preloaded_data = dict()
 
-        self._load_settings()
+        # anything slow (loading data, conversions etc.) is run in the
+        # background by the executor, which calls back into the GUI from the
+        # tkinter thread
+        self.executor = get_executor()
+        self.executor.attach(self, on_error=self._show_task_error)
+        # and any changes they make to the GUI are applied by the dispatcher
+        get_dispatcher().attach(self)
+        # loads the recordings near the selected one before they are selected
+        self.prefetcher = Prefetcher(self)
+
+        with phase('settings load'):
+            self._load_settings()
 
         self.save_handler = SaveManager(self)
 
@@ -88,8 +100,8 @@ class MainWindow(Frame):
         self._drag_mode = None
         self.progress_popup = None
 
-        self.file_treeview.generate('', self.settings["DATA_PATH"])
-        self.file_treeview.index()
+        with phase('tree generate'):
+            self.file_treeview.generate('', self.settings["DATA_PATH"])
 
         # This dictionary will consist of keys which are the file paths to the
         # .con files, and the values will be a list of associated .mrk files.
@@ -111,7 +123,12 @@ class MainWindow(Frame):
             'JUNK_FILE', font=("TkTextFont", self.treeview_text_size,
                                'overstrike'))
 
-        self.save_handler.load()
+        with phase('save load'):
+            self.save_handler.load()
+
+        # the queue is created once the saved data is loaded so that any
+        # queued containers from the last session can be converted
+        self.queue_runner = QueueRunner(self)
 
         self.master.deiconify()
         self.focus_set()
@@ -200,6 +217,8 @@ class MainWindow(Frame):
 
         self.tools_menu.add_command(label="Import BIDS data",
                                     command=self._import_bids_data)
+        self.tools_menu.add_command(label="Conversion queue",
+                                    command=self._open_conversion_queue)
 
         # Info menu
         self.info_menu = Menu(self.menu_bar, tearoff=0)
@@ -240,6 +259,8 @@ class MainWindow(Frame):
         self.file_treeview.heading("dtype", text="Type")
         self.file_treeview.column("dtype", width=50, minwidth=35,
                                   stretch=False)
+        # the contents of folders are only listed once they are opened
+        self.file_treeview.bind('<<TreeviewOpen>>', self._open_folder)
 
         # self.file_treeview.bind('<ButtonPress-1>', self.column_check)
         # self.file_treeview.bind("<B1-Motion>", self.column_drag, add='+')
@@ -319,6 +340,15 @@ class MainWindow(Frame):
                 "until this has completed before trying to right-click the "
                 "folder")
 
+    def _open_folder(self, event):
+        # the opened folder is given the focus before it is opened
+        self._populate(self.file_treeview.focus())
+
+    def _populate(self, sid):
+        """List the contents of the folder if they haven't been already."""
+        new_sids = self.file_treeview.populate(sid)
+        assign_bids_data(new_sids, self.file_treeview, self.preloaded_data)
+
     def _select_single(self, event):
         sid = self.file_treeview.identify_row(event.y)
         self.file_treeview.selection_set(sid)
@@ -342,6 +372,8 @@ class MainWindow(Frame):
         sids = self.file_treeview.selection()
         self.set_context()
         self._clear_tags(event)
+        # don't load anything else until the selection is loaded
+        self.prefetcher.cancel()
         self._preload_data(sids)
 
         # we won't have a problem with this yet since the data *has* to be
@@ -416,65 +448,95 @@ class MainWindow(Frame):
             # set it as no context
             self.context.set()
 
-    @threaded
     def _preload_data(self, sids):
-        # this function will load the file information
+        # this function will load the file information in the background
         # This takes a list of sids (should be the files that are selected, but
         # doesn't have to) and loads any that aren't already in the preloaded
-        # data
-
-        for id_ in sids:
-            data = self.preloaded_data.get(id_, None)
-            if data is not None:
-                if hasattr(data, 'loaded'):
-                    if not data.loaded:
-                        data.load_data()
-            else:
-                ext, path_ = self.file_treeview.item(id_)['values']
-                if op.isdir(path_):
-                    # create a Folderlike object (Folder or KITData)
-                    is_KIT = KITData.generate_file_list(
-                        id_, self.file_treeview, validate=True)
-                    if is_KIT:
-                        folder = KITData(id_, path_, self.proj_settings, self)
-                    else:
-                        folder = Folder(id_, path_, self)
-                    if hasattr(folder, 'initial_processing'):
-                        folder.initial_processing()
-                    # then add it to the list of preloaded data
-                    self.preloaded_data[id_] = folder
+        # data. If the selection changes before they are loaded only the new
+        # selection is shown.
+        # The objects use the treeview, so only the headers of the files are
+        # read in the background. The folders are listed and the files to
+        # read are found here, and the objects are created once the headers
+        # are cached.
+        for sid in sids:
+            self._populate(sid)
+        fpaths = header_files(self.file_treeview, sids)
+        self.executor.submit(self._load_selection, sids, fpaths,
+                             group='selection', callback=self._show_selection)
+
+    @staticmethod
+    def _load_selection(sids, fpaths):
+        read_headers(fpaths)
+        return sids
+
+    def _show_selection(self, sids):
+        data = [self.preload(id_) for id_ in sids]
+        # set the info tab's data to be the list of selected data
+        data = [obj for obj in data if obj is not None]
+        self.info_notebook.data = data
+        if len(data) == 1:
+            self.prefetcher.start(data[0])
+
+    def _show_task_error(self, error):
+        """Show an error raised by a task run in the background."""
+        print_error(error)
+        messagebox.showerror("Error", "An error occurred:\n{0}".format(error))
+
+    def preload(self, id_):
+        """Load the file or folder with the sid if it isn't already and
+        return its object.
+
+        The objects use the treeview, so this must only be called from the
+        tkinter thread. Any headers it reads should be read beforehand in the
+        background (see `Biscuit.FileTypes.headers`).
+        """
+        data = self.preloaded_data.get(id_, None)
+        if data is not None:
+            if hasattr(data, 'loaded'):
+                if not data.loaded:
+                    data.load_data()
+        else:
+            ext, path_ = self.file_treeview.item(id_)['values']
+            if op.isdir(path_):
+                # list the folder if it wasn't selected first (eg. when it is
+                # converted from the conversion queue)
+                self.file_treeview.populate(id_)
+                # create a Folderlike object (Folder or KITData)
+                is_KIT = KITData.generate_file_list(
+                    id_, self.file_treeview, validate=True)
+                if is_KIT:
+                    folder = KITData(id_, path_, self.proj_settings, self)
                 else:
-                    # get the class for the extension
-                    cls_ = get_object_class(ext)
-                    # if we don't have a folder then instantiate the class
-                    if not isinstance(cls_, str):
-                        if issubclass(cls_, BIDSFile):
-                            obj = cls_(id_=id_, file=path_,
-                                       settings=self.proj_settings,
-                                       parent=self)
-                        else:
-                            obj = cls_(id_=id_, file=path_, parent=self)
-                        # if it is of generic type, give it it's data type and
-                        # let it determine whether it is an unknown file type
-                        # or not
-                        if isinstance(obj, generic_file):
-                            obj.dtype = ext
-                        try:
-                            obj.load_data()
-                        except IOError:
-                            pass
+                    folder = Folder(id_, path_, self)
+                if hasattr(folder, 'initial_processing'):
+                    folder.initial_processing()
+                # then add it to the list of preloaded data
+                self.preloaded_data[id_] = folder
+            else:
+                # get the class for the extension
+                cls_ = get_object_class(ext)
+                # if we don't have a folder then instantiate the class
+                if not isinstance(cls_, str):
+                    if issubclass(cls_, BIDSFile):
+                        obj = cls_(id_=id_, file=path_,
+                                   settings=self.proj_settings,
+                                   parent=self)
                     else:
-                        obj = generic_file(id_=id_, file=path_,
-                                           parent=self)
+                        obj = cls_(id_=id_, file=path_, parent=self)
+                    # if it is of generic type, give it it's data type and let
+                    # it determine whether it is an unknown file type or not
+                    if isinstance(obj, generic_file):
                         obj.dtype = ext
-                    # finally, add the object to the preloaded data
-                    self.preloaded_data[id_] = obj
-
-        # set the info tab's data to be the list of selected data
-        self.info_notebook.data = [
-            self.preloaded_data.get(id_, None) for id_ in
-            sids if self.preloaded_data.get(id_, None) is not None]
-        return
+                    try:
+                        obj.load_data()
+                    except IOError:
+                        pass
+                else:
+                    obj = generic_file(id_=id_, file=path_, parent=self)
+                    obj.dtype = ext
+                # finally, add the object to the preloaded data
+                self.preloaded_data[id_] = obj
+        return self.preloaded_data[id_]
 
     def _check_KIT_folder(self, id_):
         """ Determine whether the folder contains valid KIT data """
@@ -512,7 +574,6 @@ class MainWindow(Frame):
             # but now we want to re-draw the treeview after clearing it
             self.file_treeview.delete(*self.file_treeview.get_children())
             self.file_treeview.generate('', self.settings["DATA_PATH"])
-            self.file_treeview.index()
 
     def _get_matlab_location(self):
         self.settings["MATLAB_PATH"] = filedialog.askopenfilename(
@@ -533,6 +594,7 @@ class MainWindow(Frame):
         src_dir = filedialog.askdirectory(
             title="Select the BIDS folder to import")
         if src_dir != '':
+            from bidshandler import BIDSTree, MappingError
             try:
                 bt = BIDSTree(src_dir)
             except MappingError:
@@ -556,6 +618,9 @@ class MainWindow(Frame):
         # this will modify self.settings with any changed values
         SettingsWindow(self, self.settings)
 
+    def _open_conversion_queue(self):
+        ConversionQueueWindow(self)
+
     def _open_settings_folder(self):
         if OSCONST.os != 'LNX':
             webbrowser.open('file://{0}'.format(OSCONST.USRDIR))
@@ -1,26 +1,55 @@
-from tkinter import Toplevel, Frame, Label, Button
+from tkinter import Toplevel, Frame, Label, Button, StringVar
+import os.path as op
+
+from Biscuit.utils.progress import (drain, STARTED, FINISHED, ERROR,
+                                    JOB_DONE, JOB_FAILED)
+
+# how often the progress is checked (ms)
+POLL_INTERVAL = 100
 
 
 class ProgressPopup(Toplevel):
     """
-    TODO: completely overhaul
-    - add a tab system (Basic/Advanced output tabs)
-    Basic tab:
-        - maybe a condensed version of the output? Just the 'writeline' parts
-    Advanced tab:
-        - full output directly from mne-bids
+    Popup showing the progress of a conversion.
+
+    The progress events are read from the queue on the tkinter thread so the
+    conversion itself never has to touch tkinter.
+
+    Parameters
+    ----------
+    master : instance of Tk
+        The parent window.
+    queue : queue.Queue
+        The queue the `ProgressEvent`s of the conversion are put into.
+    on_finish : function
+        Function called (on the tkinter thread) once the conversion has
+        finished successfully.
+    log_file : str
+        The file the output of the conversion is written to.
     """
-    def __init__(self, master, progress_var, job_name_var):
+    def __init__(self, master, queue, on_finish=None, log_file=None):
         self.master = master
         Toplevel.__init__(self, self.master)
 
         self.title('Conversion Progress')
 
-        self.job_name_var = job_name_var
-        self.progress_var = progress_var.curr_value
+        self.queue = queue
+        self.on_finish = on_finish
+        self.log_file = log_file
+
+        self.job_name_var = StringVar()
+        self.progress_var = StringVar()
+
+        # total number of bytes to convert and the number done for each job
+        # (or extra file copied)
+        self.total_bytes = 0
+        self.bytes_done = dict()
+        self.jobs_done = 0
 
         self._create_widgets()
 
+        self._poll()
+
     def _create_widgets(self):
         main_frame = Frame(self)
         Label(main_frame,
@@ -34,5 +63,57 @@ class ProgressPopup(Toplevel):
                command=self._exit).grid(column=0, row=3)
         main_frame.grid()
 
+    def _poll(self):
+        """Update the display with all the events received so far."""
+        for event in drain(self.queue):
+            if event.stage == STARTED:
+                self.total_bytes = event.bytes_done
+            elif event.stage == FINISHED:
+                self._finish()
+                return
+            elif event.stage == ERROR:
+                self._error()
+                return
+            elif event.job is None:
+                self.job_name_var.set(event.stage.capitalize())
+            else:
+                self.bytes_done[event.job] = event.bytes_done
+                if event.stage == JOB_DONE:
+                    self.jobs_done += 1
+                if event.stage not in (JOB_DONE, JOB_FAILED):
+                    self.job_name_var.set("{0} ({1})".format(
+                        op.basename(event.job), event.stage))
+                self.progress_var.set(self._progress_text())
+        self.after(POLL_INTERVAL, self._poll)
+
+    def _progress_text(self):
+        done = sum(self.bytes_done.values())
+        if self.total_bytes == 0:
+            return ''
+        return "{0:.0f}% ({1:.1f} of {2:.1f} MB)".format(
+            100 * done / self.total_bytes, done / 1e6, self.total_bytes / 1e6)
+
+    def _finish(self):
+        if self.jobs_done == 0:
+            self.job_name_var.set("No changes since the last conversion")
+        if self.on_finish is not None:
+            self.on_finish()
+        self._countdown(3)
+
+    def _countdown(self, seconds):
+        if seconds == 0:
+            self._exit()
+            return
+        self.progress_var.set(
+            "Conversion done! Closing window in {0}...".format(seconds))
+        self.after(1000, self._countdown, seconds - 1)
+
+    def _error(self):
+        msg = ("An error occurred during the conversion process.\nPlease "
+               "check the python console to see the error.")
+        if self.log_file is not None:
+            msg += "\nThe full output is in {0}".format(self.log_file)
+        self.progress_var.set(msg)
+
     def _exit(self):
         self.destroy()
@@ -3,10 +3,10 @@ from tkinter.ttk import Frame, Label, Button, Progressbar, Checkbutton
 import os
 import os.path as op
 
-from bidshandler import BIDSTree
-
 from Biscuit.Management import RangeVar, ToolTipManager
-from Biscuit.utils.utils import get_fsize, threaded
+from Biscuit.utils.dispatcher import DispatchedVar, get_dispatcher
+from Biscuit.utils.executor import get_executor
+from Biscuit.utils.utils import get_fsize, is_bids_object
 from Biscuit.utils.BIDSCopy import BIDSCopy
 
 ttm = ToolTipManager()
@@ -133,19 +133,32 @@ class SendFilesWindow(Toplevel):
         btn_exit.grid(column=3, row=0, sticky='w')
         btn_frame.grid(column=0, row=4, columnspan=2)
 
-    @threaded
     def _transfer(self):
-        """Transfer all the files in each of the sources to the destination."""
-        copy_func = BIDSCopy(overwrite=self.force_override.get(),
-                             verify=self.verify.get(),
-                             file_name_tracker=self.curr_file,
-                             file_num_tracker=self.transferred_count,
-                             file_prog_tracker=self.curr_file_progress)
+        """Transfer all the files in each of the sources to the destination
+        in the background."""
         self.curr_file.set('Mapping destination BIDS structure...')
+        # the progress is set from the copying thread
+        copy_func = BIDSCopy(
+            overwrite=self.force_override.get(),
+            verify=self.verify.get(),
+            file_name_tracker=DispatchedVar(self.curr_file),
+            file_num_tracker=DispatchedVar(self.transferred_count),
+            file_prog_tracker=DispatchedVar(self.curr_file_progress))
+        get_executor().submit(self._copy_files, copy_func,
+                              callback=self._transfer_complete,
+                              long_running=True)
+
+    def _copy_files(self, copy_func):
+        from bidshandler import BIDSTree
         dst_folder = BIDSTree(self.dst)
         for src in self.srcs:
             dst_folder.add(src, copier=copy_func.copy_files)
-            if self.set_copied:
+
+    def _transfer_complete(self, _):
+        # apply any progress still waiting so it isn't shown after this
+        get_dispatcher().flush()
+        if self.set_copied:
+            for src in self.srcs:
                 self._rename_complete(src)
         self.transferred_count.set(self.file_count)
         self.curr_file.set('Complete!')
@@ -161,7 +174,7 @@ class SendFilesWindow(Toplevel):
             new_path = "{0}_copied".format(src.path)
             os.rename(src.path, new_path)
             # fix the path in the BIDSTree object also
-            if isinstance(src, BIDSTree):
+            if is_bids_object(src, 'BIDSTree'):
                 src.path = new_path
             # also rename the branch in the filetree
             sid = self.master.file_treeview.sid_from_text(fname)
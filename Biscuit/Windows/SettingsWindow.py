@@ -3,7 +3,6 @@ from tkinter import Button as tkButton
 from tkinter.ttk import Frame, Label, Button, Checkbutton, Entry
 import os.path as op
 import pickle
-from PIL import Image, ImageTk
 
 from Biscuit.utils.constants import OSCONST
 from Biscuit.CustomWidgets.InfoEntries import ValidatedEntry
@@ -32,6 +31,7 @@ class SettingsWindow(Toplevel):
 
         self.protocol('WM_DELETE_WINDOW', self.exit)
 
+        from PIL import Image, ImageTk
         self.lock_icon = Image.open(OSCONST.ICON_LOCK)
         self.lock_icon = ImageTk.PhotoImage(self.lock_icon)
 
@@ -43,6 +43,14 @@ class SettingsWindow(Toplevel):
         self.archive_path = StringVar(
             value=self.settings.get('ARCHIVE_PATH', None))
         self.chunk_freq = IntVar(value=self.settings.get('CHUNK_FREQ', 14))
+        self.conversion_workers = IntVar(
+            value=self.settings.get('CONVERSION_WORKERS', 1))
+        self.link_extras = BooleanVar(
+            value=self.settings.get('LINK_EXTRAS', False))
+        self.prefetch = BooleanVar(
+            value=self.settings.get('PREFETCH', False))
+        self.prefetch_memory = IntVar(
+            value=self.settings.get('PREFETCH_MEMORY', 1024))
 
         self._create_widgets()
 
@@ -122,9 +130,59 @@ class SettingsWindow(Toplevel):
         unlock_archive_btn.grid(column=3, row=2, rowspan=2, padx=2,
                                 sticky='nsew')
 
+        workers_lbl = Label(frame, text='Conversion processes:')
+        workers_lbl.grid(column=0, row=4, sticky='ew')
+        ttm.register(workers_lbl,
+                     'The maximum number of files to convert to BIDS at the '
+                     'same time.\nEach file is converted in a separate '
+                     'process so this should be no more than\nthe number of '
+                     'processors on this computer.')
+        self.workers_entry = ValidatedEntry(
+            frame,
+            textvariable=self.conversion_workers,
+            force_dtype='int',
+            highlightbackground=OSCONST.ENTRY_HLBG)
+        self.workers_entry.grid(column=1, row=4, columnspan=2, sticky='ew',
+                                padx=2)
+
+        link_lbl = Label(frame, text='Link extra files:')
+        link_lbl.grid(column=0, row=5, sticky='ew')
+        ttm.register(link_lbl,
+                     'Whether extra files (eg. videos and code) may be '
+                     'hardlinked into the BIDS folder\ninstead of copied when '
+                     'they are on the same drive.\nThis is much faster for '
+                     'large files, however any changes made to either\nthe '
+                     'original or the BIDS copy will also change the other.')
+        link_chk = Checkbutton(frame, variable=self.link_extras)
+        link_chk.grid(column=1, row=5, columnspan=2, sticky='w', padx=2)
+
+        prefetch_lbl = Label(frame, text='Load nearby recordings:')
+        prefetch_lbl.grid(column=0, row=6, sticky='ew')
+        ttm.register(prefetch_lbl,
+                     'Whether to load the other recordings in the same '
+                     'folder and the next few folders\nin the background '
+                     'when a KIT folder or .fif file is selected, so that '
+                     'they\nare already loaded when they are selected.')
+        prefetch_chk = Checkbutton(frame, variable=self.prefetch)
+        prefetch_chk.grid(column=1, row=6, columnspan=2, sticky='w', padx=2)
+
+        memory_lbl = Label(frame, text='Memory limit for loading:')
+        memory_lbl.grid(column=0, row=7, sticky='ew')
+        ttm.register(memory_lbl,
+                     'Nearby recordings stop being loaded in the background '
+                     'once Biscuit uses this much memory.')
+        self.memory_entry = ValidatedEntry(
+            frame,
+            textvariable=self.prefetch_memory,
+            force_dtype='int',
+            highlightbackground=OSCONST.ENTRY_HLBG)
+        self.memory_entry.grid(column=1, row=7, padx=2, sticky='ew')
+        mb_lbl = Label(frame, text='(MB)')
+        mb_lbl.grid(column=2, row=7, sticky='e')
+
         exit_btn = Button(frame, text='Save and Exit',
                           command=self.save_and_exit)
-        exit_btn.grid(column=0, row=4)
+        exit_btn.grid(column=0, row=8)
 
         frame.grid_columnconfigure(0, weight=0)
         frame.grid_columnconfigure(1, weight=1)
@@ -154,5 +212,10 @@ class SettingsWindow(Toplevel):
         self.settings['ARCHIVE_PATH'] = self.archive_path.get()
         self.settings['CHUNK_FREQ'] = self.chunk_freq.get()
         self.settings['PROJ_ROWS'] = self.proj_lines.get()
+        self.settings['CONVERSION_WORKERS'] = max(
+            1, self.conversion_workers.get())
+        self.settings['LINK_EXTRAS'] = self.link_extras.get()
+        self.settings['PREFETCH'] = self.prefetch.get()
+        self.settings['PREFETCH_MEMORY'] = self.prefetch_memory.get()
         with open(self.settings_file, 'wb') as settings:
             pickle.dump(self.settings, settings)
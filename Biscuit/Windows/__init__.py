@@ -6,4 +6,6 @@ from .CreditsPopup import CreditsPopup  # noqa
 from .SettingsWindow import SettingsWindow  # noqa
 from .SendFilesWindow import SendFilesWindow  # noqa
 from .AuthPopup import AuthPopup  # noqa
+from .ConversionQueueWindow import ConversionQueueWindow  # noqa
+from .ConversionPlanWindow import ConversionPlanWindow  # noqa
 from .MainWindow import MainWindow  # noqa
\ No newline at end of file
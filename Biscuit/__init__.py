@@ -2,16 +2,41 @@ __version__ = '0.9.8'
 name = "Biscuit"  # noqa
 
 
-def run():
+def run(argv=None):
     # main entry point to run the Biscuit GUI
+    from argparse import ArgumentParser
     from tkinter import Tk
     import os
     from os.path import dirname
-    os.chdir(dirname(__file__))
 
-    from .Windows import MainWindow
+    parser = ArgumentParser(prog='Biscuit',
+                            description='Convert MEG data to BIDS format.')
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='Print how long each part of starting up takes '
+                             'once the window appears.')
+    args = parser.parse_args(argv)
+
+    from .utils import startup
+    if args.profile_startup:
+        startup.start_profiling()
+
+    os.chdir(dirname(__file__))
 
-    root = Tk()
+    with startup.phase('import GUI'):
+        from .Windows import MainWindow
 
-    m = MainWindow(master=root)
+    with startup.phase('create window'):
+        root = Tk()
+        m = MainWindow(master=root)
+    with startup.phase('first paint'):
+        root.update()
+    startup.report()
     m.mainloop()
+
+
+def run_convert():
+    # entry point to convert data to BIDS without the GUI
+    import sys
+    from .Management.BatchConvert import main
+
+    sys.exit(main())
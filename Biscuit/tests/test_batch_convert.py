@@ -0,0 +1,38 @@
+import os.path as op
+
+from Biscuit.Management.BatchConvert import FileTree, load_spec
+
+
+def test_filetree(tmpdir):
+    folder = tmpdir.mkdir('1234_ABC_WS001')
+    folder.join('1234_ABC_rest.con').write('')
+    folder.join('1234_ABC.mrk').write('')
+    tree = FileTree(str(tmpdir))
+
+    sid = tree.sid_from_filepath(str(folder))
+    assert tree.parent(sid) == ''
+    assert tree.item(sid) == {'text': '1234_ABC_WS001',
+                              'values': ['', str(folder)]}
+    children = tree.get_children(sid)
+    assert [tree.item(child)['values'][0] for child in children] == [
+        '.mrk', '.con']
+    assert tree.parent(children[0]) == sid
+    try:
+        tree.sid_from_filepath(op.join(str(folder), 'missing.con'))
+    except KeyError:
+        pass
+    else:
+        raise AssertionError('missing file should not be found')
+
+
+def test_load_spec(tmpdir):
+    spec = {'workers': 2,
+            'containers': [{'path': 'raw/test_raw.fif', 'run': '1'}]}
+    tmpdir.join('spec.json').write(
+        '{"workers": 2, "containers": [{"path": "raw/test_raw.fif", '
+        '"run": "1"}]}')
+    assert load_spec(str(tmpdir.join('spec.json'))) == spec
+    tmpdir.join('spec.toml').write(
+        'workers = 2\n\n[[containers]]\npath = "raw/test_raw.fif"\n'
+        'run = "1"\n')
+    assert load_spec(str(tmpdir.join('spec.toml'))) == spec
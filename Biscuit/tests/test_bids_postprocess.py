@@ -0,0 +1,83 @@
+import json
+import os
+import os.path as op
+
+from Biscuit.utils.bids_postprocess import (merge_bids_folder,
+                                            BIDSMetadataWriter)
+
+
+def _write(fname, text):
+    if not op.exists(op.dirname(fname)):
+        os.makedirs(op.dirname(fname))
+    with open(fname, 'w') as f:
+        f.write(text)
+
+
+def _read(fname):
+    with open(fname, 'r') as f:
+        return f.read()
+
+
+def test_merge_bids_folder(tmpdir):
+    src = str(tmpdir.mkdir('src'))
+    dst = str(tmpdir.mkdir('dst'))
+    _write(op.join(dst, 'participants.tsv'),
+           'participant_id\tage\nsub-1\t20\nsub-2\t30\n')
+    _write(op.join(dst, 'dataset_description.json'), '{"Name": "old"}')
+    _write(op.join(src, 'participants.tsv'),
+           'participant_id\tage\tsex\nsub-2\t31\tF\n')
+    _write(op.join(src, 'dataset_description.json'), '{"Name": "new"}')
+    _write(op.join(src, 'sub-2', 'meg', 'sub-2_meg.json'), '{}')
+
+    merge_bids_folder(src, dst)
+
+    assert _read(op.join(dst, 'participants.tsv')) == (
+        'participant_id\tage\tsex\nsub-1\t20\tn/a\nsub-2\t31\tF\n')
+    assert _read(op.join(dst, 'dataset_description.json')) == (
+        '{"Name": "old"}')
+    assert op.exists(op.join(dst, 'sub-2', 'meg', 'sub-2_meg.json'))
+
+
+def test_metadata_writer(tmpdir):
+    root = str(tmpdir)
+    _write(op.join(root, 'participants.tsv'),
+           'participant_id\tage\nsub-1\t20\nsub-2\t30\n')
+    _write(op.join(root, 'dataset_description.json'),
+           '{"Name": "old", "BIDSVersion": "1.4.0"}')
+    sidecar = op.join(root, 'sub-1', 'meg', 'sub-1_meg.json')
+    _write(sidecar, '{"SamplingFrequency": 1000, "DewarPosition": "n/a"}')
+
+    writer = BIDSMetadataWriter(root)
+    writer.add_participant('sub-1', 'control')
+    writer.add_participant('sub-2', 'patient')
+    writer.add_sidecar(sidecar, {'DewarPosition': 'supine',
+                                 'InstitutionName': None})
+    writer.add_sidecar(sidecar, {'DeviceSerialNumber': '1234'})
+    writer.set_readme('readme')
+    writer.set_name('new')
+    writer.write()
+
+    assert _read(op.join(root, 'participants.tsv')) == (
+        'participant_id\tage\tgroup\nsub-1\t20\tcontrol\n'
+        'sub-2\t30\tpatient\n')
+    assert json.loads(_read(op.join(root, 'dataset_description.json'))) == {
+        'Name': 'new', 'BIDSVersion': '1.4.0'}
+    assert json.loads(_read(sidecar)) == {'SamplingFrequency': 1000,
+                                          'DewarPosition': 'supine',
+                                          'DeviceSerialNumber': '1234'}
+    assert _read(op.join(root, 'README')) == 'readme'
+    # no temporary files are left behind
+    assert sorted(os.listdir(root)) == ['README', 'dataset_description.json',
+                                        'participants.tsv', 'sub-1']
+
+
+def test_metadata_writer_no_groups(tmpdir):
+    # a folder containing only empty room data has no groups yet
+    root = str(tmpdir)
+    _write(op.join(root, 'participants.tsv'),
+           'participant_id\tgroup\nsub-emptyroom\tn/a\nsub-1\tn/a\n')
+    writer = BIDSMetadataWriter(root)
+    writer.add_participant('sub-1', 'control')
+    writer.write()
+    assert _read(op.join(root, 'participants.tsv')) == (
+        'participant_id\tgroup\nsub-emptyroom\tn/a\nsub-1\tcontrol\n')
@@ -0,0 +1,82 @@
+import os
+import os.path as op
+from queue import Queue
+
+import numpy as np
+import pytest
+
+from Biscuit.utils.bids_writer import convert_jobs
+from Biscuit.utils.progress import READ_RAW
+
+
+def test_convert_jobs_stops_on_error(tmpdir):
+    # none of the files exist so every job fails as soon as it starts
+    jobs = [{'raw': {'file': op.join(str(tmpdir), '{0}_raw.fif'.format(i)),
+                     'dtype': '.fif', 'allow_maxshield': False}}
+            for i in range(40)]
+    progress = Queue()
+    with pytest.raises(FileNotFoundError):
+        convert_jobs(jobs, op.join(str(tmpdir), 'BIDS'), workers=2,
+                     progress=progress)
+    started = set()
+    while not progress.empty():
+        event = progress.get()
+        if event.stage == READ_RAW:
+            started.add(event.job)
+    # the jobs which were still waiting aren't converted once one fails
+    assert 0 < len(started) < len(jobs) // 2
+
+
+def _fif_jobs(tmpdir):
+    from mne import create_info
+    from mne.io import RawArray
+    jobs = []
+    for i, (subject, run) in enumerate([('01', '1'), ('02', '1'),
+                                        ('01', '2')]):
+        fname = str(tmpdir.join('{0}_raw.fif'.format(i)))
+        info = create_info(['MEG0111', 'MEG0112'], 100., 'mag')
+        raw = RawArray(np.zeros((2, 100)), info, verbose='ERROR')
+        raw.set_meas_date(1600000000 + 100 * i)
+        raw.save(fname, verbose='ERROR')
+        jobs.append({'raw': {'file': fname, 'dtype': '.fif',
+                             'allow_maxshield': False, 'ch_names': dict(),
+                             'ch_types': dict(), 'subject_info': None},
+                     'bids': {'subject': subject, 'session': '1',
+                              'task': 'rest', 'run': run},
+                     'trigger_channels': [], 'event_id': None,
+                     'markers': []})
+    return jobs
+
+
+def _bids_tree(root):
+    files = dict()
+    for dirpath, _, fnames in os.walk(root):
+        for fname in fnames:
+            path = op.join(dirpath, fname)
+            if fname.endswith('.tsv'):
+                with open(path, 'r') as f:
+                    lines = f.read().splitlines()
+                # the jobs can be merged in any order
+                files[op.relpath(path, root)] = [lines[0]] + sorted(lines[1:])
+            else:
+                files[op.relpath(path, root)] = None
+    return files
+
+
+def test_convert_jobs_parallel(tmpdir):
+    jobs = _fif_jobs(tmpdir)
+    serial = str(tmpdir.join('serial', 'BIDS'))
+    convert_jobs(jobs, serial, workers=1, log_file=str(tmpdir.join('log')))
+    parallel = str(tmpdir.join('parallel', 'BIDS'))
+    converted = []
+    convert_jobs(jobs, parallel, workers=2,
+                 callback=lambda job, events: converted.append(job),
+                 log_file=str(tmpdir.join('log')))
+    assert len(converted) == 3
+
+    tree = _bids_tree(parallel)
+    assert tree == _bids_tree(serial)
+    assert len(tree['participants.tsv']) == 3
+    assert len(tree[op.join('sub-01', 'ses-1', 'sub-01_ses-1_scans.tsv')]) == 3
+    # the staging folders are removed
+    assert os.listdir(str(tmpdir.join('parallel'))) == ['BIDS']
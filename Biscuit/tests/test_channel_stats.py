@@ -0,0 +1,45 @@
+import numpy as np
+from mne.io.kit.constants import KIT
+
+from Biscuit.FileTypes.channel_stats import kit_channel_stats, suggest_bads
+
+
+def test_kit_channel_stats(tmpdir):
+    n_samples, nchan, offset, sfreq = 5000, 12, 64, 1000.
+    data_info = {'data_offset': offset,
+                 'n_samples': n_samples,
+                 'nchan': nchan,
+                 'dtype': '<i2',
+                 'ad_to_volt': 10.0 / 2 ** 12,
+                 'sfreq': sfreq,
+                 'sysid': 1,
+                 'ch_types': [KIT.CHANNEL_MAGNETOMETER] * 10 +
+                             [KIT.CHANNEL_TRIGGER] * 2}
+    rng = np.random.RandomState(0)
+    data = (rng.randint(-400, 400, (n_samples, nchan)) *
+            rng.uniform(0.8, 1.2, nchan)).astype('<i2')
+    data[:, 1] = 37
+    data[:, 4] *= 20
+    data[:, 7] = (data[:, 7] // 4 + 300 * np.sin(
+        2 * np.pi * 50 * np.arange(n_samples) / sfreq)).astype('<i2')
+    # the trigger channels are never suggested
+    data[:, 10] = 0
+    fname = str(tmpdir.join('test.con'))
+    with open(fname, 'wb') as f:
+        f.write(b'\x00' * offset)
+        f.write(data.tobytes())
+
+    expected = data.astype(float) * data_info['ad_to_volt']
+    for chunk_size in (n_samples, 1000, 1500):
+        stats = kit_channel_stats(fname, data_info, chunk_size=chunk_size)
+        assert stats['n_samples'] == n_samples
+        np.testing.assert_allclose(stats['rms'], expected.std(axis=0))
+        np.testing.assert_allclose(stats['ptp'], np.ptp(expected, axis=0))
+        assert stats['flat'][1] == 1
+        assert stats['flat'][0] < 0.1
+        assert np.argmax(stats['line_ratio']) == 7
+        assert stats['groups'] == [list(range(10)), []]
+
+    assert suggest_bads(stats) == {1: ['flat'],
+                                   4: ['amplitude', 'peak-to-peak'],
+                                   7: ['line noise']}
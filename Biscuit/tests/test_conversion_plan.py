@@ -0,0 +1,54 @@
+import os.path as op
+
+from Biscuit.utils.conversion_plan import ThroughputHistory, plan_conversion
+
+
+def test_throughput_history(tmpdir):
+    fname = op.join(str(tmpdir), 'throughput.json')
+    history = ThroughputHistory(fname)
+    assert history.throughput('.con') is None
+    history.add('.con', 1000, 2)
+    history.add('.fif', 3000, 1)
+    # a job converted instantly isn't recorded
+    history.add('.fif', 1000, 0)
+    history.save()
+
+    history = ThroughputHistory(fname)
+    assert history.throughput('.con') == 500
+    assert history.throughput('.fif') == 3000
+    # unknown data types use the throughput of all the data
+    assert history.throughput('.sqd') == 4000 / 3
+
+
+def test_plan_conversion(tmpdir):
+    raw_file = op.join(str(tmpdir), 'test_raw.fif')
+    with open(raw_file, 'wb') as f:
+        f.write(b'\x00' * 1000)
+    root = op.join(str(tmpdir), 'BIDS')
+    job = {'name': 'Task: rest, Run: 1',
+           'raw': {'dtype': '.fif', 'file': raw_file},
+           'bids': {'subject': '01', 'session': '1', 'task': 'rest',
+                    'run': '1'},
+           'trigger_channels': [],
+           'markers': []}
+    history = ThroughputHistory()
+    history.add('.fif', 500, 1)
+
+    plan = plan_conversion([job], root, history=history, workers=4)
+    assert plan['total_bytes'] == 1000
+    assert plan['estimated_seconds'] == 2
+    entry = plan['jobs'][0]
+    assert entry['action'] == 'convert'
+    assert entry['overwrites'] == []
+    assert op.join(root, 'sub-01', 'ses-1', 'meg',
+                   'sub-01_ses-1_task-rest_run-1_meg.fif') in entry['files']
+    assert op.join(root, 'sub-01', 'ses-1',
+                   'sub-01_ses-1_scans.tsv') in entry['files']
+    assert len(plan['dataset_files']) == 4
+
+    # nothing is written if the job is unchanged
+    plan = plan_conversion([job], root, current=[job])
+    assert plan['jobs'][0]['action'] == 'unchanged'
+    assert plan['total_bytes'] == 0
+    assert plan['estimated_seconds'] is None
+    assert plan['dataset_files'] == []
@@ -0,0 +1,113 @@
+import os.path as op
+from threading import current_thread
+import time
+import tkinter
+
+from Biscuit.Management.BatchConvert import FileTree
+from Biscuit.Management.ConversionQueue import (ConversionQueue, QueueRunner,
+                                                QUEUED, RUNNING, DONE, FAILED)
+from Biscuit.utils.constants import OSCONST
+from Biscuit.utils.executor import TaskExecutor
+
+
+def test_next_entries():
+    queue = ConversionQueue()
+    targets = {'a': 'proj1', 'b': 'proj1', 'c': 'proj2', 'd': 'proj3'}
+    entries = [queue.add(path) for path in 'abcd']
+    # adding an entry again doesn't queue it twice
+    assert queue.add('a') is entries[0]
+
+    def target_of(entry):
+        return targets[entry.path]
+
+    # b can't run at the same time as a as they are in the same project
+    assert queue.next_entries(3, target_of) == [entries[0], entries[2],
+                                                entries[3]]
+    assert queue.next_entries(1, target_of) == [entries[0]]
+    queue.start(entries[0])
+    assert queue.next_entries(2, target_of) == [entries[2]]
+    queue.finish(entries[0])
+    assert entries[0].state == DONE
+    assert queue.next_entries(2, target_of) == [entries[1], entries[2]]
+    queue.start(entries[1])
+    queue.finish(entries[1], 'error')
+    assert entries[1].state == FAILED
+    assert entries[1].duration >= 0
+    queue.clear_finished()
+    assert [entry.path for entry in queue.entries] == ['c', 'd']
+
+
+def test_queue_persistence(tmpdir):
+    fname = op.join(str(tmpdir), 'queue.json')
+    queue = ConversionQueue(fname)
+    queue.add('a')
+    queue.add('b')
+    queue.active = True
+    queue.start(queue.entries[0])
+
+    queue = ConversionQueue(fname)
+    assert queue.active
+    assert [(entry.path, entry.state) for entry in queue.entries] == [
+        ('a', QUEUED), ('b', QUEUED)]
+    assert queue.entries[0].duration is None
+    assert RUNNING not in [entry.state for entry in queue.entries]
+
+
+class _Var():
+    def __init__(self, value):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+
+class _Container():
+    contains_required_files = False
+    proj_name = _Var('proj')
+
+
+class _Parent():
+    def __init__(self, root, directory):
+        self.root = root
+        self.file_treeview = FileTree(directory)
+        self.settings = {'DATA_PATH': directory, 'QUEUE_CONCURRENCY': 2}
+        self.preloaded_data = dict()
+        self.threads = []
+
+    def after(self, ms, func):
+        return self.root.after(ms, func)
+
+    def preload(self, sid):
+        if sid not in self.preloaded_data:
+            self.threads.append(current_thread().name)
+            self.preloaded_data[sid] = _Container()
+        return self.preloaded_data[sid]
+
+
+def test_queue_runner(tmpdir, monkeypatch):
+    monkeypatch.setattr(OSCONST, 'USRDIR', str(tmpdir.join('usr')))
+    for fname in ('a.fif', 'b.fif'):
+        tmpdir.join('data', fname).ensure()
+    root = tkinter.Tcl()
+    executor = TaskExecutor(poll_interval=1)
+    executor.attach(root)
+    parent = _Parent(root, str(tmpdir.join('data')))
+    runner = QueueRunner(parent, executor)
+    for fname in ('a.fif', 'b.fif', 'missing.fif'):
+        runner.queue.add(str(tmpdir.join('data', fname)))
+    # the entries aren't started until their containers are loaded
+    assert runner.queue.next_entries(2, runner._target) == [
+        runner.queue.entries[2]]
+    runner.start()
+    start = time.time()
+    while (any(entry.state == QUEUED for entry in runner.queue.entries) and
+           time.time() - start < 5):
+        root.update()
+        time.sleep(0.001)
+    # the containers are only loaded in the tkinter thread
+    assert parent.threads == [current_thread().name] * 2
+    assert [entry.error for entry in runner.queue.entries] == [
+        'Missing required files.', 'Missing required files.',
+        '{0} is not in the data folder.'.format(
+            tmpdir.join('data', 'missing.fif'))]
+    runner.stop()
@@ -0,0 +1,61 @@
+import os
+import os.path as op
+
+import pytest
+
+from Biscuit.utils.copyutils import (fast_copy, SameFileError, HARDLINK,
+                                     STREAM)
+
+
+def test_fast_copy(tmpdir):
+    tmpdir = str(tmpdir)
+    src = op.join(tmpdir, 'video.mp4')
+    data = os.urandom(3 * 1024 * 1024 + 17)
+    with open(src, 'wb') as f:
+        f.write(data)
+    dst_dir = op.join(tmpdir, 'extras')
+    os.mkdir(dst_dir)
+
+    progress = []
+    dst, method = fast_copy(src, dst_dir, callback=progress.append)
+    assert dst == op.join(dst_dir, 'video.mp4')
+    assert method != HARDLINK
+    assert not op.samefile(src, dst)
+    with open(dst, 'rb') as f:
+        assert f.read() == data
+    assert progress[-1] == len(data)
+    assert progress == sorted(progress)
+
+    # the hardlink is only used if allowed
+    dst, method = fast_copy(src, dst_dir, allow_hardlink=True)
+    if method == HARDLINK:
+        assert op.samefile(src, dst)
+        # copying again without hardlinks replaces the link rather than
+        # writing through it
+        with open(dst, 'r+b') as f:
+            f.write(b'x')
+        dst, method = fast_copy(src, dst_dir)
+        assert not op.samefile(src, dst)
+        os.truncate(dst, 0)
+        with open(src, 'rb') as f:
+            assert f.read(1) == b'x'
+
+    with pytest.raises(SameFileError):
+        fast_copy(src, src)
+
+
+def test_fast_copy_stream(tmpdir, monkeypatch):
+    # the copy falls back to reading and writing the data
+    monkeypatch.delattr(os, 'copy_file_range', raising=False)
+    monkeypatch.setattr('Biscuit.utils.copyutils.fcntl', None)
+    tmpdir = str(tmpdir)
+    src = op.join(tmpdir, 'stim.txt')
+    with open(src, 'wb') as f:
+        f.write(b'abc' * 1000)
+    progress = []
+    dst, method = fast_copy(src, op.join(tmpdir, 'copy.txt'),
+                            callback=progress.append)
+    assert method == STREAM
+    with open(dst, 'rb') as f:
+        assert f.read() == b'abc' * 1000
+    assert progress[-1] == 3000
@@ -0,0 +1,52 @@
+import os
+import os.path as op
+import time
+
+from Biscuit.utils import dir_snapshot
+from Biscuit.utils.dir_snapshot import DirSnapshot, folder_key
+
+
+def _age(path, seconds=60):
+    """Make the folder look like it was last modified a while ago."""
+    mtime = time.time() - seconds
+    os.utime(path, (mtime, mtime))
+
+
+def test_dir_snapshot(tmpdir, monkeypatch):
+    folder = str(tmpdir.mkdir('data'))
+    os.makedirs(op.join(folder, 'sub'))
+    with open(op.join(folder, 'data.con'), 'w'):
+        pass
+    listed = []
+    _scandir = os.scandir
+
+    def scandir(path):
+        listed.append(path)
+        return _scandir(path)
+    monkeypatch.setattr(dir_snapshot.os, 'scandir', scandir)
+
+    fname = str(tmpdir.join('snapshot.sqlite'))
+    snapshot = DirSnapshot(fname)
+    # a folder which was only just modified isn't given a key so it is
+    # listed every time
+    assert folder_key(folder) is None
+    entries, key = snapshot.listdir(folder)
+    assert sorted(entries) == [('data.con', False), ('sub', True)]
+    assert key is None
+    snapshot.listdir(folder)
+    assert len(listed) == 2
+
+    # once it has been left alone it is only listed again if it changes
+    _age(folder)
+    entries, key = snapshot.listdir(folder)
+    assert key == folder_key(folder)
+    assert len(listed) == 3
+    snapshot.close()
+    snapshot = DirSnapshot(fname)
+    assert sorted(snapshot.listdir(folder)[0]) == sorted(entries)
+    assert len(listed) == 3
+
+    os.remove(op.join(folder, 'data.con'))
+    _age(folder, 30)
+    assert snapshot.listdir(folder)[0] == [('sub', True)]
+    assert len(listed) == 4
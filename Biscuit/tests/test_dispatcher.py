@@ -0,0 +1,99 @@
+import time
+import tkinter
+from threading import Thread
+
+from Biscuit.Management import RangeVar
+from Biscuit.utils.dispatcher import UIDispatcher, DispatchedVar
+
+
+def _wait(root, done, timeout=5):
+    start = time.time()
+    while not done() and time.time() - start < timeout:
+        root.update()
+        time.sleep(0.001)
+
+
+def _in_thread(func):
+    thread = Thread(target=func)
+    thread.start()
+    thread.join()
+
+
+def test_ui_dispatcher():
+    # without a widget the changes are applied straight away
+    dispatcher = UIDispatcher()
+    changes = []
+    dispatcher.dispatch(changes.append, 1, key='a')
+    assert changes == [1]
+
+    root = tkinter.Tcl()
+    dispatcher = UIDispatcher(pump_interval=1, idle_interval=1)
+    errors = []
+    dispatcher.attach(root, on_error=errors.append)
+    changes = []
+
+    def _dispatch():
+        for i in range(100):
+            dispatcher.dispatch(changes.append, ('progress', i),
+                                key='progress')
+        dispatcher.dispatch(changes.append, 'other')
+        dispatcher.dispatch(lambda: 1 / 0)
+        dispatcher.dispatch(changes.append, ('progress', 100),
+                            key='progress')
+    _in_thread(_dispatch)
+    # nothing is applied outside the tkinter thread
+    assert changes == []
+    assert dispatcher.metrics()['queue_depth'] == 3
+    _wait(root, lambda: dispatcher.metrics()['queue_depth'] == 0)
+    # only the latest change with each key is applied, in the order they
+    # were last dispatched
+    assert changes == ['other', ('progress', 100)]
+    assert isinstance(errors[0], ZeroDivisionError)
+    metrics = dispatcher.metrics()
+    assert metrics['dispatched'] == 103
+    assert metrics['coalesced'] == 100
+    assert metrics['applied'] == 3
+
+    # changes dispatched in the tkinter thread are applied straight away
+    dispatcher.dispatch(changes.append, 'now')
+    assert changes[-1] == 'now'
+
+
+def test_ui_dispatcher_budget():
+    root = tkinter.Tcl()
+    dispatcher = UIDispatcher(frame_budget=5, pump_interval=1)
+    dispatcher.attach(root)
+    changes = []
+
+    def _slow(i):
+        time.sleep(0.002)
+        changes.append(i)
+    _in_thread(lambda: [dispatcher.dispatch(_slow, i) for i in range(20)])
+    _wait(root, lambda: len(changes) != 0)
+    # the rest of the changes are left until the next batch
+    metrics = dispatcher.metrics()
+    assert 0 < metrics['last_batch'] < 20
+    assert metrics['over_budget'] >= 1
+    dispatcher.flush()
+    assert changes == list(range(20))
+
+
+def test_dispatched_var():
+    root = tkinter.Tcl()
+    dispatcher = UIDispatcher(pump_interval=1, idle_interval=1)
+    dispatcher.attach(root)
+    var = RangeVar(root, value=0, max_val=10)
+    tracker = DispatchedVar(var, dispatcher)
+
+    def _copy():
+        tracker.max = 100
+        for i in range(0, 101, 10):
+            tracker.set(i)
+        # the value is read without using tkinter
+        assert tracker.get() == 100
+    _in_thread(_copy)
+    assert var.get() == 0
+    _wait(root, lambda: var.get() != 0)
+    # the maximum is set before the value so it isn't clipped
+    assert var.max == 100
+    assert var.get() == 100
@@ -0,0 +1,47 @@
+import os
+import os.path as op
+
+from Biscuit.utils.emptyroom import EmptyRoomRegistry, split_emptyroom
+
+
+def _job(fname, subject='emptyroom', session='20200101'):
+    return {'raw': {'dtype': '.con', 'file': fname},
+            'bids': {'subject': subject, 'session': session,
+                     'task': 'noise', 'run': None}}
+
+
+def test_emptyroom_registry(tmpdir):
+    tmpdir = str(tmpdir)
+    root = op.join(tmpdir, 'BIDS', 'proj')
+    # two copies of the same recording and a different one
+    fnames = [op.join(tmpdir, name) for name in ('er1.con', 'er2.con',
+                                                 'er3.con')]
+    for fname, data in zip(fnames, (b'\x01', b'\x01', b'\x02')):
+        with open(fname, 'wb') as f:
+            f.write(data * 100)
+    jobs = [_job(fname) for fname in fnames]
+    subject_job = _job(fnames[0], subject='01')
+
+    registry = EmptyRoomRegistry(op.join(tmpdir, 'emptyroom.json'))
+    new_jobs, reused = split_emptyroom(jobs + [subject_job], root, registry)
+    # the copy only needs to be converted once
+    assert new_jobs == [jobs[0], jobs[2], subject_job]
+    assert reused == [jobs[1]]
+
+    registry.add(jobs[0], root)
+    registry.save()
+    registry = EmptyRoomRegistry(op.join(tmpdir, 'emptyroom.json'))
+    # the data doesn't exist in the folder yet
+    assert registry.find(jobs[1], root) is None
+    path = ('sub-emptyroom/ses-20200101/meg/'
+            'sub-emptyroom_ses-20200101_task-noise_meg.con')
+    os.makedirs(op.dirname(op.join(root, path)))
+    with open(op.join(root, path), 'wb') as f:
+        f.write(b'\x01')
+    assert registry.find(jobs[1], root) == path
+    assert registry.find(jobs[2], root) is None
+    # another folder needs its own copy
+    assert registry.find(jobs[1], op.join(tmpdir, 'BIDS', 'other')) is None
+    new_jobs, reused = split_emptyroom(jobs, root, registry)
+    assert new_jobs == [jobs[2]]
+    assert reused == jobs[:2]
@@ -0,0 +1,85 @@
+import time
+import tkinter
+from threading import Event, current_thread
+
+from Biscuit.utils.executor import TaskExecutor
+
+
+def _wait(root, done, timeout=5):
+    start = time.time()
+    while not done() and time.time() - start < timeout:
+        root.update()
+        time.sleep(0.001)
+
+
+def test_task_executor():
+    root = tkinter.Tcl()
+    executor = TaskExecutor(max_workers=2, poll_interval=1)
+    errors = []
+    executor.attach(root, on_error=errors.append)
+    results = []
+
+    def _callback(result):
+        results.append((result, current_thread().name))
+
+    executor.submit(lambda: 1 + 1, callback=_callback)
+    executor.submit(lambda: 1 / 0)
+    _wait(root, lambda: len(results) + len(errors) == 2)
+    # the callbacks are called in the tkinter thread
+    assert results == [(2, current_thread().name)]
+    assert isinstance(errors[0], ZeroDivisionError)
+
+    # only the latest task in a group has its callback called
+    started, release = Event(), Event()
+
+    def _slow(value):
+        started.set()
+        release.wait(5)
+        return value
+    results = []
+    first = executor.submit(_slow, 'first', group='selection',
+                            callback=results.append)
+    started.wait(5)
+    executor.submit(_slow, 'second', group='selection',
+                    callback=results.append)
+    executor.submit(_slow, 'third', group='selection',
+                    callback=results.append)
+    release.set()
+    _wait(root, lambda: len(results) != 0)
+    _wait(root, lambda: False, timeout=0.1)
+    assert first.result() == 'first'
+    assert results == ['third']
+
+    # background tasks don't hold up the others
+    release.clear()
+    background = executor.submit(_slow, 'prefetch', background=True)
+    results = []
+    executor.submit(lambda: 'selection', callback=results.append)
+    _wait(root, lambda: len(results) != 0)
+    assert results == ['selection']
+    assert not background.done()
+    release.set()
+    assert background.result(5) == 'prefetch'
+
+
+def test_task_executor_once():
+    executor = TaskExecutor(max_workers=4)
+    calls = []
+    release = Event()
+
+    def _load(sid):
+        calls.append(sid)
+        release.wait(5)
+        return sid.upper()
+
+    futures = [executor.submit(executor.once, 'a', _load, 'a') for _ in
+               range(3)]
+    while len(calls) == 0:
+        time.sleep(0.001)
+    time.sleep(0.05)
+    release.set()
+    assert [future.result() for future in futures] == ['A'] * 3
+    assert calls == ['a']
+    # once finished it is loaded again
+    assert executor.once('a', _load, 'a') == 'A'
+    assert calls == ['a', 'a']
@@ -0,0 +1,59 @@
+import os.path as op
+
+import numpy as np
+from mne import create_info
+from mne.io import RawArray, read_raw_fif
+
+from Biscuit.FileTypes.fif_header import read_fif_header, split_fif_index
+from Biscuit.utils import header_cache
+from Biscuit.utils.header_cache import HeaderCache
+
+
+def _make_raw(n_samples):
+    info = create_info(['MEG0111', 'MEG0112', 'EOG061', 'STI101'], 1000.,
+                       ['mag', 'grad', 'eog', 'stim'])
+    rng = np.random.RandomState(0)
+    return RawArray(rng.randn(4, n_samples) * 1e-12, info, verbose='ERROR')
+
+
+def test_read_fif_header(tmpdir):
+    fname = str(tmpdir.join('test_raw.fif'))
+    _make_raw(1000).save(fname, verbose='ERROR')
+    header = read_fif_header(fname)
+    raw = read_raw_fif(fname, verbose='ERROR')
+    assert header['nchan'] == raw.info['nchan']
+    assert header['chs'] == [[ch['scanno'], ch['ch_name'], ch['kind']] for
+                             ch in raw.info['chs']]
+    assert header['maxshield'] is False
+    assert header['next'] is None
+
+
+def test_read_fif_header_split(tmpdir):
+    fname = str(tmpdir.join('split_raw.fif'))
+    _make_raw(600000).save(fname, split_size='10MB', verbose='ERROR')
+    raw = read_raw_fif(fname, verbose='ERROR')
+    assert len(raw.filenames) > 1
+    assert read_fif_header(fname)['next'] == op.basename(raw.filenames[1])
+    assert read_fif_header(str(raw.filenames[-1]))['next'] is None
+
+
+def test_split_fif_index(tmpdir, monkeypatch):
+    monkeypatch.setattr(header_cache, '_cache', HeaderCache())
+    raw = _make_raw(600000)
+    raw.save(str(tmpdir.join('split_raw.fif')), split_size='10MB',
+             verbose='ERROR')
+    # names with a number after a dash which aren't split
+    raw.crop(0, 1).save(str(tmpdir.join('sub-01_task-a_run-1_meg.fif')),
+                        verbose='ERROR')
+    tmpdir.join('test-1.fif').write('not a fif file')
+    raw = read_raw_fif(str(tmpdir.join('split_raw.fif')), verbose='ERROR')
+    index = split_fif_index(str(tmpdir))
+    assert index == {'split_raw.fif': [op.basename(fname) for fname in
+                                       raw.filenames]}
+
+    # the folder is indexed again when a part is removed, and a missing part
+    # ends the recording
+    tmpdir.join(index['split_raw.fif'][-1]).remove()
+    assert split_fif_index(str(tmpdir)) == (
+        {'split_raw.fif': index['split_raw.fif'][:-1]} if
+        len(index['split_raw.fif']) > 2 else dict())
@@ -0,0 +1,86 @@
+import os
+import os.path as op
+import time
+from tkinter import Tk, TclError
+
+import pytest
+
+from Biscuit.CustomWidgets.FileTreeview import FileTreeview
+from Biscuit.utils.dir_snapshot import DirSnapshot
+
+
+@pytest.fixture
+def root():
+    try:
+        root = Tk()
+    except TclError:
+        pytest.skip('No display available.')
+    yield root
+    root.destroy()
+
+
+def test_file_treeview(root, tmpdir):
+    data = str(tmpdir)
+    for proj in ('proj1', 'proj2'):
+        os.makedirs(op.join(data, proj, 'sub'))
+        with open(op.join(data, proj, 'sub', 'data.con'), 'w'):
+            pass
+    with open(op.join(data, 'readme.txt'), 'w'):
+        pass
+
+    tree = FileTreeview(root, data, columns=["dtype", "filepath"])
+    tree.snapshot = DirSnapshot()
+    tree.generate('', data)
+    # only the root folder is listed
+    assert [tree.get_text(sid) for sid in tree.get_children()] == \
+        ['proj1', 'proj2', 'readme']
+    assert op.join(data, 'proj1', 'sub') not in tree.index_cache
+    with pytest.raises(KeyError):
+        tree.sid_from_filepath(op.join(data, 'proj1', 'sub', 'data.con'),
+                               False)
+
+    # the folders containing a file are listed when it is needed
+    fpath = op.join(data, 'proj1', 'sub', 'data.con')
+    sid = tree.sid_from_filepath(fpath)
+    assert tree.get_filepath(sid) == fpath
+    assert tree.get_text(tree.parent(sid)) == 'sub'
+    proj2 = tree.sid_from_filepath(op.join(data, 'proj2'))
+    assert [tree.get_text(sid) for sid in tree.populate(proj2)] == ['sub']
+    assert tree.populate(proj2) == []
+
+    # only the listed folders are refreshed
+    os.remove(fpath)
+    os.makedirs(op.join(data, 'proj3'))
+    added = tree.refresh()
+    assert [tree.get_text(sid) for sid in added] == ['proj3']
+    assert fpath not in tree.index_cache
+    for path, sid in tree.index_cache.items():
+        assert sid == '' or tree.get_filepath(sid) == path
+
+    # folders which haven't been modified since they were listed aren't
+    # listed again
+    mtime = time.time() - 60
+    for folder, _, _ in os.walk(data):
+        os.utime(folder, (mtime, mtime))
+    tree.refresh()
+    listed = []
+    _listdir = tree.snapshot.listdir
+
+    def listdir(directory):
+        listed.append(directory)
+        return _listdir(directory)
+    tree.snapshot.listdir = listdir
+    assert tree.refresh() == []
+    assert listed == []
+    with open(op.join(data, 'proj2', 'new.txt'), 'w'):
+        pass
+    assert [tree.get_text(sid) for sid in tree.refresh()] == ['new']
+    assert op.join(data, 'proj2') in listed
+    assert data not in listed
+
+    # new files are put in order amongst the existing ones
+    with open(op.join(data, 'notes.txt'), 'w'):
+        pass
+    assert [tree.get_text(sid) for sid in tree.refresh()] == ['notes']
+    assert [tree.get_text(sid) for sid in tree.get_children()] == \
+        ['proj1', 'proj2', 'proj3', 'notes', 'readme']
@@ -0,0 +1,60 @@
+import os
+import os.path as op
+import sqlite3
+
+from Biscuit.utils import header_cache
+from Biscuit.utils.header_cache import HeaderCache, cached_header
+
+
+def test_header_cache(tmpdir, monkeypatch):
+    fname = str(tmpdir.join('test.con'))
+    with open(fname, 'wb') as f:
+        f.write(b'\x00' * 100)
+    reads = []
+
+    def reader(fname):
+        reads.append(fname)
+        return {'gains': (1, 2, 5), 'size': op.getsize(fname)}
+
+    db = str(tmpdir.join('cache', 'header_cache.sqlite'))
+    cache = HeaderCache(db)
+    assert cached_header(fname, 'kit', reader, cache) == {'gains': [1, 2, 5],
+                                                          'size': 100}
+    assert cached_header(fname, 'kit', reader, cache)['size'] == 100
+    assert len(reads) == 1
+    # different kinds of information are cached separately
+    cached_header(fname, 'mrk', reader, cache)
+    assert len(reads) == 2
+
+    # the cache is kept between sessions
+    cache.close()
+    cache = HeaderCache(db)
+    assert cached_header(fname, 'kit', reader, cache)['size'] == 100
+    assert len(reads) == 2
+
+    # changing the file means it is read again
+    with open(fname, 'ab') as f:
+        f.write(b'\x00')
+    assert cached_header(fname, 'kit', reader, cache)['size'] == 101
+    assert len(reads) == 3
+
+    # old versions of the cache are discarded
+    cache.close()
+    monkeypatch.setattr(header_cache, 'CACHE_VERSION',
+                        header_cache.CACHE_VERSION + 1)
+    cache = HeaderCache(db)
+    assert cache.get(fname, 'kit') is None
+    cache.close()
+
+    # the file is still read if the cache can't be used
+    os.remove(db)
+    os.mkdir(db)
+    cache = HeaderCache(db)
+    assert cached_header(fname, 'kit', reader, cache)['size'] == 101
+    assert len(reads) == 4
+    try:
+        cache._connect()
+    except sqlite3.Error:
+        pass
+    else:
+        raise AssertionError('the cache should not be usable')
@@ -0,0 +1,32 @@
+import numpy as np
+from mne import create_info
+from mne.io import RawArray
+
+from Biscuit.FileTypes.headers import header_files, read_headers
+from Biscuit.Management.BatchConvert import FileTree
+from Biscuit.utils import header_cache
+from Biscuit.utils.header_cache import HeaderCache
+
+
+def test_header_files(tmpdir, monkeypatch):
+    cache = HeaderCache()
+    monkeypatch.setattr(header_cache, '_cache', cache)
+    for fname in ('kit/a.con', 'kit/b.con', 'kit/a.mrk', 'kit/a.elp',
+                  'kit/a.hsp', 'other/c.con', 'other/notes.txt'):
+        tmpdir.join(fname).ensure()
+    fif = str(tmpdir.join('d_raw.fif'))
+    info = create_info(['MEG0111', 'STI101'], 1000., ['mag', 'stim'])
+    RawArray(np.zeros((2, 100)), info, verbose='ERROR').save(
+        fif, verbose='ERROR')
+    tree = FileTree(str(tmpdir))
+    sids = [str(tmpdir.join(name)) for name in
+            ('kit', 'other', 'd_raw.fif', 'other/notes.txt')]
+    # only the files of KIT folders are loaded with the folder
+    assert header_files(tree, sids) == [
+        str(tmpdir.join('kit', 'a.con')), str(tmpdir.join('kit', 'b.con')),
+        fif]
+
+    # files which can't be read are skipped
+    read_headers(header_files(tree, sids))
+    assert cache.get(fif, 'fif')['nchan'] == 2
+    assert cache.get(str(tmpdir.join('kit', 'a.con')), 'kit') is None
@@ -0,0 +1,70 @@
+from struct import pack_into
+
+from mne.io.kit.constants import KIT
+
+from Biscuit.FileTypes.kit_header import read_kit_header, kit_channel_names
+
+
+def _write_con(fname, ch_types, version=(2, 4), acq_type=KIT.CONTINUOUS):
+    """Write the header of a KIT file."""
+    sys_offset, amp_offset, acq_offset = 0x500, 0x900, 0x980
+    # put the channel information after the first read
+    chan_offset, chan_size = 0x1100, 0x100
+    data_offset = chan_offset + len(ch_types) * chan_size
+    buf = bytearray(data_offset)
+    pack_into('<i', buf, 0x10, sys_offset)
+    pack_into('<2i', buf, 0x40, chan_offset, chan_size)
+    pack_into('<i', buf, 0x70, amp_offset)
+    pack_into('<i', buf, 0x80, acq_offset)
+    pack_into('<i', buf, 0x90, data_offset)
+    pack_into('<i', buf, 0x1D0, 0x2000)
+    pack_into('<128s128si', buf, 0x20C, b'Macquarie', b'PQ1160R',
+              len(ch_types))
+    pack_into('<i', buf, 0x410, 1500000000)
+    pack_into('<3i', buf, sys_offset, version[0], version[1], 52)
+    if version < (2, 4):
+        pack_into('<i3i', buf, sys_offset + 0x2CC, 10, 0, 16, 12)
+    else:
+        pack_into('<d3i', buf, sys_offset + 0x2CC, 10., 0, 16, 12)
+    pack_into('<i', buf, amp_offset, (3 << 12) | (2 << 28) | (1 << 24))
+    pack_into('<id', buf, acq_offset, acq_type, 1000.)
+    pack_into('<4i', buf, acq_offset + 12, 5000, 0, 0, 3)
+    for i, ch_type in enumerate(ch_types):
+        pack_into('<i', buf, chan_offset + i * chan_size, ch_type)
+    with open(fname, 'wb') as f:
+        f.write(buf)
+
+
+def test_read_kit_header(tmpdir):
+    fname = str(tmpdir.join('test.con'))
+    ch_types = ([KIT.CHANNEL_MAGNETOMETER] * 160 +
+                [KIT.CHANNEL_MAGNETOMETER_REFERENCE] * 3 +
+                [KIT.CHANNEL_TRIGGER] * 8 + [KIT.CHANNEL_NULL] * 21)
+    _write_con(fname, ch_types)
+    header = read_kit_header(fname)
+    assert header['gains'] == (10, 5, 2)
+    assert header['system_name'] == 'Macquarie'
+    assert header['model_name'] == 'PQ1160R'
+    assert header['nchans'] == 192
+    assert header['create_time'] == 1500000000
+    assert header['reTHM']
+    data_info = header['data_info']
+    assert data_info['data_offset'] == 0x1100 + 192 * 0x100
+    assert data_info['n_samples'] == 0
+    assert data_info['dtype'] == '<i2'
+    assert data_info['ad_to_volt'] == 10. / 2 ** 12
+    assert data_info['sfreq'] == 1000.
+    assert data_info['sysid'] == 52
+    assert data_info['ch_types'] == ch_types
+
+    names = kit_channel_names(ch_types)
+    assert names[0] == 'MEG 000'
+    assert names[162] == 'MEG 162'
+    assert names[163] == 'TRIGGER 163'
+    assert names[191] == 'MISC 191'
+
+    # older systems store the ADC range as an integer
+    _write_con(fname, ch_types, version=(2, 3), acq_type=KIT.EPOCHS)
+    data_info = read_kit_header(fname)['data_info']
+    assert data_info['ad_to_volt'] == 10. / 2 ** 12
+    assert data_info['n_samples'] == 15000
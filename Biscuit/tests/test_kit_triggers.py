@@ -0,0 +1,53 @@
+import numpy as np
+import mne
+from mne.io.kit.constants import KIT
+from mne.io.kit.kit import _make_stim_channel
+
+from Biscuit.FileTypes.kit_triggers import find_kit_events
+
+
+def test_find_kit_events(tmpdir):
+    n_samples, nchan, offset = 1000, 6, 64
+    stim = [2, 4]
+    data_info = {'data_offset': offset,
+                 'n_samples': n_samples,
+                 'nchan': nchan,
+                 'dtype': '<i2',
+                 'ad_to_volt': 10.0 / 2 ** 12,
+                 'sfreq': 1000.,
+                 'sysid': 1,
+                 'ch_types': [KIT.CHANNEL_MAGNETOMETER] * 2 +
+                             [KIT.CHANNEL_TRIGGER] * 4}
+    data = np.random.RandomState(0).randint(
+        -400, 400, (n_samples, nchan)).astype('<i2')
+    # orphaned offset, chunk boundary, overlapping channels, event still on
+    # at the end of the data
+    for ch, start, stop in [(2, 0, 10), (2, 100, 150), (2, 299, 301),
+                            (4, 140, 200), (4, 950, 1000)]:
+        data[start:stop, ch] = 2000
+    fname = str(tmpdir.join('test.con'))
+    with open(fname, 'wb') as f:
+        f.write(b'\x00' * offset)
+        f.write(data.tobytes())
+
+    # events as found by mne from the synthetic stim channel
+    stim_ch = _make_stim_channel(
+        data[:, stim].T.astype(float) * data_info['ad_to_volt'], '+', 1,
+        'channel', np.array(stim))
+    raw = mne.io.RawArray(stim_ch, mne.create_info(['STI 014'], 1000.,
+                                                   ['stim']), verbose=False)
+    expected = mne.find_events(raw, output='onset', consecutive=False,
+                               min_duration=0, shortest_event=1,
+                               verbose=False)
+
+    for chunk_size in (300, 1000, 7):
+        events = find_kit_events(fname, data_info, stim,
+                                 chunk_size=chunk_size)
+        np.testing.assert_array_equal(events, expected)
+
+    try:
+        find_kit_events(fname, data_info, [0])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('MEG channels cannot be trigger channels')
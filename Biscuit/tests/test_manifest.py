@@ -0,0 +1,37 @@
+import os
+import os.path as op
+
+from Biscuit.utils.manifest import ConversionManifest, job_fingerprint
+
+
+def test_manifest(tmpdir):
+    src = tmpdir.join('test_raw.fif')
+    src.write('data')
+    root = str(tmpdir.join('BIDS'))
+    job = {'name': 'Task: rest, Run: 1',
+           'raw': {'file': str(src), 'bads': []},
+           'bids': {'subject': '1', 'session': '1', 'task': 'rest',
+                    'run': '1'}}
+    job['fingerprint'] = job_fingerprint(job, 'readme')
+
+    manifest = ConversionManifest(root)
+    assert not manifest.is_current(job)
+    manifest.update(job)
+    manifest.save()
+
+    # the converted data doesn't exist
+    manifest = ConversionManifest(root)
+    assert not manifest.is_current(job)
+    meg_dir = op.join(root, 'sub-1', 'ses-1', 'meg')
+    os.makedirs(meg_dir)
+    open(op.join(meg_dir, 'sub-1_ses-1_task-rest_run-1_meg.fif'), 'w').close()
+    assert manifest.is_current(job)
+
+    # any change to the job or the project changes the fingerprint
+    assert job_fingerprint(job, 'readme') == job['fingerprint']
+    assert job_fingerprint(job, 'new readme') != job['fingerprint']
+    job['raw']['bads'] = ['MEG 001']
+    assert job_fingerprint(job, 'readme') != job['fingerprint']
+    job['raw']['bads'] = []
+    src.write('new data')
+    assert job_fingerprint(job, 'readme') != job['fingerprint']
@@ -0,0 +1,79 @@
+import os.path as op
+import time
+from threading import current_thread
+import tkinter
+
+from Biscuit.Management.BatchConvert import FileTree
+from Biscuit.Management.Prefetcher import Prefetcher
+from Biscuit.utils.executor import TaskExecutor
+from Biscuit.utils.utils import memory_usage
+
+
+def _wait(root, done, timeout=5):
+    start = time.time()
+    while not done() and time.time() - start < timeout:
+        root.update()
+        time.sleep(0.001)
+
+
+class _Selected():
+    def __init__(self, sid):
+        self.ID = sid
+
+
+class _Parent():
+    def __init__(self, directory, settings):
+        self.file_treeview = FileTree(directory)
+        self.settings = settings
+        self.preloaded_data = dict()
+        self.loaded = []
+        self.threads = set()
+
+    def preload(self, sid):
+        self.threads.add(current_thread().name)
+        self.loaded.append(op.basename(sid))
+        self.preloaded_data[sid] = sid
+
+
+def test_prefetcher(tmpdir):
+    for fname in ('ses1/a.fif', 'ses1/b.fif', 'ses1/notes.txt', 'ses2/c.fif',
+                  'ses3/d.con', 'ses4/e.fif', 'ses5/f.fif', 'z.txt'):
+        tmpdir.join(fname).ensure()
+    root = tkinter.Tcl()
+    executor = TaskExecutor(poll_interval=1)
+    executor.attach(root)
+    parent = _Parent(str(tmpdir), {'PREFETCH': True})
+    prefetcher = Prefetcher(parent, executor)
+    selected = _Selected(str(tmpdir.join('ses1', 'a.fif')))
+    parent.preloaded_data[str(tmpdir.join('ses2'))] = None
+    # the other .fif files and the next 3 folders are loaded in tree order
+    # if they aren't already
+    prefetcher.start(selected)
+    _wait(root, lambda: len(parent.loaded) == 5)
+    assert parent.loaded == ['b.fif', 'c.fif', 'ses3', 'ses4', 'e.fif']
+    # the objects are only created in the tkinter thread
+    assert parent.threads == {current_thread().name}
+
+    # nothing more is loaded once something else is selected
+    parent.preloaded_data.clear()
+    parent.loaded = []
+    prefetcher.start(selected)
+    _wait(root, lambda: len(parent.loaded) != 0)
+    prefetcher.cancel()
+    _wait(root, lambda: False, timeout=0.1)
+    assert parent.loaded == ['b.fif']
+
+    # or if over the memory budget
+    if memory_usage() is not None:
+        parent.loaded = []
+        parent.preloaded_data.clear()
+        parent.settings['PREFETCH_MEMORY'] = 0
+        prefetcher.start(selected)
+        _wait(root, lambda: False, timeout=0.1)
+        assert parent.loaded == []
+
+    # prefetching is opt-in
+    parent.settings['PREFETCH'] = False
+    prefetcher.start(selected)
+    _wait(root, lambda: False, timeout=0.1)
+    assert parent.loaded == []
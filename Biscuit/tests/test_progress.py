@@ -0,0 +1,30 @@
+import os.path as op
+from queue import Queue
+
+from mne.utils import logger
+
+from Biscuit.utils.progress import (ProgressReporter, drain, mne_log_file,
+                                    READ_RAW, JOB_DONE)
+
+
+def test_reporter():
+    queue = Queue()
+    reporter = ProgressReporter(queue, 'test.con')
+    reporter.emit(READ_RAW)
+    reporter.emit(JOB_DONE, 100)
+    events = drain(queue)
+    assert [(e.job, e.stage, e.bytes_done) for e in events] == [
+        ('test.con', READ_RAW, 0), ('test.con', JOB_DONE, 100)]
+    assert 0 <= events[0].elapsed <= events[1].elapsed
+    assert drain(queue) == []
+    # nothing happens without a queue
+    ProgressReporter().emit(READ_RAW)
+
+
+def test_mne_log_file(tmpdir):
+    fname = op.join(str(tmpdir), 'conversion.log')
+    with mne_log_file(fname):
+        logger.info('Writing data')
+    logger.info('Not logged')
+    with open(fname, 'r') as f:
+        assert f.read() == 'Writing data\n'
@@ -0,0 +1,50 @@
+import builtins
+from io import StringIO
+import subprocess
+import sys
+
+from Biscuit.utils import startup
+
+# modules which are slow to import and aren't needed until some data is loaded
+# or converted
+SLOW_MODULES = ['mne', 'mne_bids', 'pandas', 'bidshandler', 'numpy',
+                'requests']
+
+
+def test_lazy_imports():
+    code = ("import sys\n"
+            "import Biscuit.Windows.MainWindow\n"
+            "print(' '.join(mod for mod in {0!r} if mod in sys.modules))"
+            .format(SLOW_MODULES))
+    out = subprocess.run([sys.executable, '-c', code], check=True,
+                         stdout=subprocess.PIPE, universal_newlines=True)
+    assert out.stdout.split() == []
+
+
+def test_startup_profiler(tmpdir, monkeypatch):
+    tmpdir.join('startup_test_mod.py').write('import startup_test_dep\n')
+    tmpdir.join('startup_test_dep.py').write('')
+    monkeypatch.syspath_prepend(str(tmpdir))
+    _import = builtins.__import__
+
+    # nothing is timed until the profiling is started
+    with startup.phase('before'):
+        pass
+    startup.start_profiling()
+    with startup.phase('outer'):
+        with startup.phase('inner'):
+            import startup_test_mod  # noqa: F401
+    out = StringIO()
+    startup.report(out)
+    assert builtins.__import__ is _import
+    lines = out.getvalue().splitlines()
+    assert lines[1].split()[0] == 'outer'
+    # nested phases are indented
+    assert lines[2].startswith('    inner')
+    assert lines[3].split()[0] == 'total'
+    imported = [line.split()[0] for line in lines[5:]]
+    assert 'startup_test_mod' in imported
+    assert 'startup_test_dep' in imported
+    assert 'before' not in out.getvalue()
+    for mod in ('startup_test_mod', 'startup_test_dep'):
+        del sys.modules[mod]
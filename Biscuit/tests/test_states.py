@@ -0,0 +1,136 @@
+import pickle
+import tkinter
+from tkinter import BooleanVar, IntVar, StringVar
+
+import pytest
+
+from Biscuit.FileTypes import con_file, FIFData
+from Biscuit.FileTypes.states import (ChannelState, BioChannelState,
+                                      EventState, Value, OptionsValue)
+from Biscuit.Management.CustomVars import OptionsVar, bind_var, bind_value
+
+
+class _ConFile():
+    """Object with just the channel information of a con file."""
+    def __init__(self, tab_info):
+        self.tab_info = tab_info
+        self.interesting_channels = set(tab_info.keys())
+        self.channel_names = ['MEG {0:03d}'.format(i) for i in range(160)]
+
+
+def test_states_pickle():
+    states = [ChannelState('MEG 001', bad=True),
+              BioChannelState('BIO001', 'ECG'),
+              EventState(4, 'visual')]
+    for state, copy in zip(states, pickle.loads(pickle.dumps(states))):
+        assert type(copy) is type(state)
+        for attr in state.__slots__:
+            assert getattr(copy, attr) == getattr(state, attr)
+    # the states are kept small
+    assert not hasattr(states[0], '__dict__')
+
+
+def test_con_file_channels():
+    # the channel information can be used without any tkinter Variables
+    con = _ConFile({1: ChannelState('MEG 001', bad=True),
+                    160: ChannelState('TRIG 160', trigger=True,
+                                      description='visual'),
+                    161: ChannelState('TRIG 161')})
+    assert con_file.bad_channels(con) == ['MEG 001']
+    assert con_file.get_event_data(con) == (['160'], ['visual'])
+    assert con.tab_info[160].to_list() == ['TRIG 160', False, True, 'visual']
+    con_file.channel_state(con, 2).bad = True
+    assert 2 in con.interesting_channels
+    assert con_file.bad_channels(con) == ['MEG 001', 'MEG 002']
+
+
+def test_bind_var():
+    if tkinter._default_root is None:
+        tkinter._default_root = tkinter.Tcl()
+    event = EventState(1, 'start')
+    num = bind_var(IntVar(), event, 'event')
+    desc = bind_var(StringVar(), event, 'description')
+    assert (num.get(), desc.get()) == (1, 'start')
+    num.set(2)
+    desc.set('end')
+    assert (event.event, event.description) == (2, 'end')
+    # an invalid value doesn't change the state
+    num.set('')
+    assert event.event == 2
+
+    channel = BioChannelState('BIO001')
+    ch_type = OptionsVar(options=['EOG', 'ECG', 'EMG'])
+    ch_type.set('ECG')
+    # the copy made by a WidgetTable keeps the value
+    assert ch_type.copy().get() == 'ECG'
+    ch_type = bind_var(ch_type.copy(), channel, 'ch_type')
+    assert ch_type.get() == 'EOG'
+    ch_type.set('EMG')
+    assert channel.ch_type == 'EMG'
+
+
+def test_values():
+    calls = []
+    run = Value('1')
+    run.trace('w', lambda: calls.append(run.get()))
+    run.set('2')
+    # the callbacks are called whenever the value is written
+    run.set('2')
+    assert calls == ['2', '2']
+    # only the value is pickled
+    assert pickle.loads(pickle.dumps(run)).get() == '2'
+
+    task = OptionsValue(options=['rest', 'visual'])
+    assert task.get() == 'rest'
+    task.set('visual')
+    with pytest.raises(ValueError):
+        task.set('audio')
+    # the value is kept if it is still an option
+    task.options = ['visual', 'audio']
+    assert task.get() == 'visual'
+    task.options = ['audio']
+    assert task.get() == 'audio'
+    # without options any value can be set
+    group = OptionsValue()
+    group.set('Control')
+    assert group.options == ['Control']
+    copy = pickle.loads(pickle.dumps(task))
+    assert (copy.get(), copy.options) == ('audio', ['audio'])
+
+
+def test_fif_values(tmpdir):
+    # the job and container values don't need a Tcl interpreter
+    fif = FIFData(file=str(tmpdir.join('test_raw.fif')))
+    fif.proj_name.set('WS001')
+    fif.subject_ID.set('1')
+    fif.run.set('1')
+    # setting the values validates the file
+    assert fif.valid
+    fif.subject_ID.set('')
+    assert not fif.valid
+    fif.is_empty_room.set(True)
+    assert fif.check_valid()
+
+
+def test_bind_value():
+    if tkinter._default_root is None:
+        tkinter._default_root = tkinter.Tcl()
+    run = Value('1')
+    var = StringVar()
+    unbind = bind_value(var, run)
+    assert var.get() == '1'
+    # the binding goes both ways
+    var.set('2')
+    assert run.get() == '2'
+    run.set('3')
+    assert var.get() == '3'
+    unbind()
+    var.set('4')
+    run.set('5')
+    assert (var.get(), run.get()) == ('4', '5')
+
+    is_junk = Value(False)
+    var = BooleanVar()
+    bind_value(var, is_junk)
+    var.set(True)
+    assert is_junk.get() is True
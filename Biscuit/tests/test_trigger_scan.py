@@ -0,0 +1,63 @@
+import numpy as np
+import mne
+from mne.io.kit.constants import KIT
+
+from Biscuit.FileTypes.kit_triggers import find_kit_events
+from Biscuit.FileTypes.trigger_scan import (scan_kit_triggers,
+                                            scan_fif_triggers)
+
+
+def test_scan_kit_triggers(tmpdir):
+    n_samples, nchan, offset = 1000, 6, 64
+    data_info = {'data_offset': offset,
+                 'n_samples': n_samples,
+                 'nchan': nchan,
+                 'dtype': '<i2',
+                 'ad_to_volt': 10.0 / 2 ** 12,
+                 'sfreq': 1000.,
+                 'sysid': 1,
+                 'ch_types': [KIT.CHANNEL_MAGNETOMETER] * 2 +
+                             [KIT.CHANNEL_TRIGGER] * 4}
+    data = np.zeros((n_samples, nchan), dtype='<i2')
+    # on at the start, chunk boundary, still on at the end
+    for ch, start, stop in [(2, 0, 10), (2, 100, 150), (2, 299, 301),
+                            (4, 140, 200), (4, 950, 1000), (0, 500, 600)]:
+        data[start:stop, ch] = 2000
+    fname = str(tmpdir.join('test.con'))
+    with open(fname, 'wb') as f:
+        f.write(b'\x00' * offset)
+        f.write(data.tobytes())
+
+    for chunk_size in (300, 1000, 7):
+        summary = scan_kit_triggers(fname, data_info, chunk_size=chunk_size)
+        # the MEG channel isn't read
+        assert summary['triggers'] == [
+            {'value': 2, 'count': 2, 'first': 0.1, 'last': 0.299},
+            {'value': 4, 'count': 2, 'first': 0.14, 'last': 0.95}]
+    # the same events as are found for the conversion
+    events = find_kit_events(fname, data_info, [2])
+    assert len(events) == 2
+    assert events[0, 0] == 100 and events[-1, 0] == 299
+
+
+def test_scan_fif_triggers(tmpdir):
+    stim = np.zeros(3000)
+    for start, value in [(0, 5), (100, 1), (1200, 2), (1210, 3), (1500, 1),
+                         (2990, 4)]:
+        stim[start:start + 5] = value
+    info = mne.create_info(['MEG 001', 'STI 014'], 1000., ['mag', 'stim'])
+    raw = mne.io.RawArray(np.array([np.zeros(3000), stim]), info,
+                          verbose=False)
+    fname = str(tmpdir.join('test_raw.fif'))
+    raw.save(fname, verbose=False)
+    events = mne.find_events(raw, verbose=False)
+
+    for chunk_size in (1000, 1205, 3000):
+        summary = scan_fif_triggers(fname, chunk_size=chunk_size)
+        assert summary['stim_channel'] == 'STI 014'
+        found = dict((trigger['value'], trigger) for trigger in
+                     summary['triggers'])
+        assert sum(t['count'] for t in summary['triggers']) == len(events)
+        assert set(found) == set(events[:, 2])
+        assert found[1]['count'] == 2
+        assert (found[1]['first'], found[1]['last']) == (0.1, 1.5)
@@ -0,0 +1,54 @@
+import os
+from datetime import datetime
+from struct import pack_into
+
+import pytest
+
+from Biscuit.utils import header_cache
+from Biscuit.utils.header_cache import HeaderCache
+from Biscuit.utils.utils import (MRK_CREATE_TIME, atomic_write_json,
+                                 atomic_write_text, get_mrk_meas_date)
+
+
+def _write_mrk(fname, create_time, sys_offset=0x200):
+    buf = bytearray(sys_offset + MRK_CREATE_TIME + 0x100)
+    pack_into('<i', buf, 0x10, sys_offset)
+    pack_into('<i', buf, sys_offset + MRK_CREATE_TIME, create_time)
+    with open(fname, 'wb') as f:
+        f.write(buf)
+
+
+def test_get_mrk_meas_date(tmpdir, monkeypatch):
+    monkeypatch.setattr(header_cache, '_cache', HeaderCache())
+    pre, post = str(tmpdir.join('pre.mrk')), str(tmpdir.join('post.mrk'))
+    _write_mrk(pre, 1500000000)
+    _write_mrk(post, 1500003600, sys_offset=0x300)
+    assert get_mrk_meas_date(pre) == datetime.fromtimestamp(1500000000)
+    assert sorted([post, pre], key=get_mrk_meas_date) == [pre, post]
+
+    # the date is read again if the file changes
+    _write_mrk(pre, 1500007200)
+    os.utime(pre, ns=(0, 10 ** 9))
+    assert get_mrk_meas_date(pre) == datetime.fromtimestamp(1500007200)
+
+    # a file without a header has no date
+    empty = tmpdir.join('empty.mrk')
+    empty.write('')
+    assert get_mrk_meas_date(str(empty)) == datetime.min
+
+
+
+def test_atomic_write(tmpdir):
+    fname = str(tmpdir.join('data.json'))
+    atomic_write_json(fname, {'b': 1, 'a': [2]}, sort_keys=True)
+    with open(fname, 'r') as f:
+        assert f.read() == '{"a": [2], "b": 1}\n'
+    atomic_write_text(fname, 'text')
+    with open(fname, 'r') as f:
+        assert f.read() == 'text'
+    # the temporary file is removed if the text can't be written
+    with pytest.raises(TypeError):
+        atomic_write_text(fname, None)
+    assert os.listdir(str(tmpdir)) == ['data.json']
+    with open(fname, 'r') as f:
+        assert f.read() == 'text'
@@ -38,6 +38,9 @@ class BIDSCopy():
         function from shutil to track  the rate at whic the indiviual files
         themselves are being transferred. This is for tracking purposes in the
         Windows.SendFilesWindow window.)
+
+    If the files are copied outside the tkinter thread the trackers should be
+    wrapped in `Biscuit.utils.dispatcher.DispatchedVar`.
     """
     def __init__(self, overwrite=False, verify=True, file_name_tracker=None,
                  file_num_tracker=None, file_prog_tracker=None):
@@ -8,8 +8,6 @@ import os.path as op
 import zipfile
 import os
 
-import requests
-
 GIT_API = 'https://api.github.com'
 
 
@@ -45,6 +43,7 @@ def get_latest_release():
     owner = 'Macquarie-MEG-Research'
     repo = 'Biscuit'
     cmd = '/repos/{0}/{1}/releases/latest'.format(owner, repo)
+    import requests
     r = requests.get(GIT_API + cmd)
     data = r.json()
 
@@ -73,6 +72,7 @@ def run_elevated(python_path, update_args):
 def update_mne_bids():
     cmd = '/repos/mne-tools/mne-bids/zipball'
     old_cwd = os.getcwd()
+    import requests
     r = requests.get(GIT_API + cmd)
 
     # get the current version of python running
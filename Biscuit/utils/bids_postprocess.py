@@ -7,11 +7,8 @@ import os.path as op
 import shutil
 
 
-from Biscuit.utils.utils import get_mrk_meas_date
-from bidshandler.utils import _get_bids_params, _bids_params_are_subsets
-from mne_bids import BIDSPath
-
-import pandas as pd
+from Biscuit.utils.utils import (atomic_write_json, atomic_write_text,
+                                 get_mrk_meas_date)
 
 
 def clean_emptyroom(fpath):
@@ -29,16 +26,51 @@ def modify_dataset_description(fname, name):
     with open(fname, 'r') as file:
         data = json.load(file, object_hook=odict)
     data['Name'] = name
-    json_output = json.dumps(data, indent=4)
-    with open(fname, 'w') as file:
-        file.write(json_output)
-        file.write('\n')
+    atomic_write_json(fname, data, indent=4)
+
 
+def merge_bids_folder(src, dst):
+    """Move all the data in the BIDS folder `src` into the BIDS folder `dst`.
 
-def update_markers(confile, fpath, bids_name):
+    Any .tsv files which exist in both folders (eg. participants.tsv or the
+    scans.tsv files) have their rows combined. The dataset level .json and
+    README files are only moved if they don't already exist in `dst`. Any
+    other existing files are replaced.
+    """
+    for root, _, fnames in os.walk(src):
+        dst_root = op.normpath(op.join(dst, op.relpath(root, src)))
+        if not op.exists(dst_root):
+            os.makedirs(dst_root)
+        for fname in fnames:
+            src_fname = op.join(root, fname)
+            dst_fname = op.join(dst_root, fname)
+            if op.exists(dst_fname):
+                if op.splitext(fname)[1] == '.tsv':
+                    _merge_tsv(src_fname, dst_fname)
+                    continue
+                if root == src:
+                    # dataset level files are only written once.
+                    continue
+            os.replace(src_fname, dst_fname)
+
+
+def update_markers(markers, fpath, bids_name):
     # TODO: shouldn't be needed once PR goes through on github
     """Update the markers provided and ensure that the BIDS output contains
-    all the markers."""
+    all the markers.
+
+    Parameters
+    ----------
+    markers : list of str
+        The paths to the marker files associated with the con file.
+        The first entry is the one that has been converted by mne-bids.
+    fpath : str
+        Path to the converted raw data.
+    bids_name : str
+        The BIDS name of the converted raw data.
+    """
+    from bidshandler.utils import _get_bids_params
+    from mne_bids import BIDSPath
 
     bids_params = _get_bids_params(bids_name)
     folder = os.path.split(fpath)[0]
@@ -51,19 +83,19 @@ def update_markers(confile, fpath, bids_name):
                 os.remove(op.join(folder, fname))
                 continue
 
-    if len(confile.hpi) != 2:
+    if len(markers) != 2:
         # If there is only one marker for the con file we don't need to do
         # anything.
         return
 
     # First entry in the list will always be the one that gets converted.
-    converted = confile.hpi[0]
-    not_converted = confile.hpi[1]
+    converted = markers[0]
+    not_converted = markers[1]
 
     # determine which marker is pre and which is post
-    confile.hpi.sort(key=get_mrk_meas_date)
+    markers = sorted(markers, key=get_mrk_meas_date)
     order = ['pre', 'post']
-    if confile.hpi.index(converted) != 0:
+    if markers.index(converted) != 0:
         order = ['post', 'pre']
 
     fnames = list(os.listdir(folder))   # recache for safety
@@ -81,56 +113,130 @@ def update_markers(confile, fpath, bids_name):
             os.rename(op.join(folder, fname), op.join(folder, bname))
             bname = bname.replace('acq-{0}'.format(order[0]),
                                   'acq-{0}'.format(order[1]))
-            shutil.copy(not_converted.file,
-                        op.join(folder, op.basename(not_converted.file)))
-            os.rename(op.join(folder, op.basename(not_converted.file)),
+            shutil.copy(not_converted,
+                        op.join(folder, op.basename(not_converted)))
+            os.rename(op.join(folder, op.basename(not_converted)),
                       op.join(folder, bname))
 
 
 def update_participants(fname, data):
     # add/modify the groups property
+    import pandas as pd
     df = pd.read_csv(fname, sep='\t')
-    participant_id = data[0]
-    group = data[1]
-    if 'group' not in df:
-        df = df.assign(group=[group])
-    else:
-        for i in range(len(df)):
-            if df.loc[i, 'participant_id'] == participant_id:
-                df.loc[i, 'group'] = group
+    df = _set_groups(df, dict([data]))
     df.to_csv(fname, sep='\t', index=False, na_rep='n/a')
 
 
 def update_sidecar(fname, data):
+    with open(fname, 'r') as file:
+        sidecar = json.load(file, object_hook=odict)
+    atomic_write_json(fname, _sidecar_data(sidecar, data), indent=4)
+
+
+def write_readme(fname, readme_text):
+    # Write the readme to the file.
+    atomic_write_text(fname, readme_text)
+
+
+class BIDSMetadataWriter():
+    """Collect the changes to the metadata files of a BIDS folder so that
+    they can all be written at once.
+
+    Each file is read at most once and written exactly once, no matter how
+    many jobs modify it. Every file is written to a temporary file first and
+    then moved into place so that a file is never left partially written.
+
+    Parameters
+    ----------
+    root : str
+        The root of the BIDS folder (ie. the project folder).
+    """
+    def __init__(self, root):
+        self.root = root
+        self.groups = odict()
+        self.sidecars = odict()
+        self.readme = None
+        self.name = None
+
+    def add_participant(self, participant_id, group):
+        """Set the group of the participant in participants.tsv."""
+        self.groups[participant_id] = group
+
+    def add_sidecar(self, fname, data):
+        """Add the extra data to the sidecar json file `fname`."""
+        self.sidecars.setdefault(fname, odict()).update(data)
+
+    def set_readme(self, readme_text):
+        self.readme = readme_text
+
+    def set_name(self, name):
+        """Set the name of the dataset in dataset_description.json."""
+        self.name = name
+
+    def write(self):
+        """Write all the changes."""
+        for fname, data in self.sidecars.items():
+            update_sidecar(fname, data)
+        if len(self.groups) != 0:
+            import pandas as pd
+            fname = op.join(self.root, 'participants.tsv')
+            df = pd.read_csv(fname, sep='\t')
+            df = _set_groups(df, self.groups)
+            atomic_write_text(fname, df.to_csv(sep='\t', index=False,
+                                               na_rep='n/a'))
+        if self.readme is not None:
+            # mne-bids writes a README which needs to be replaced as there
+            # can only be one README file in the folder.
+            write_readme(op.join(self.root, 'README'), self.readme)
+        if self.name is not None:
+            modify_dataset_description(
+                op.join(self.root, 'dataset_description.json'), self.name)
+
+
+def _merge_tsv(src, dst):
+    """Add the rows from the tsv file `src` to the tsv file `dst`.
+
+    The first column is taken to be the identifier for each row (eg.
+    `participant_id` or `filename`). Any rows in `dst` with the same
+    identifier as a row in `src` are replaced.
+    """
+    import pandas as pd
+
+    src_df = pd.read_csv(src, sep='\t', dtype=str, keep_default_na=False)
+    dst_df = pd.read_csv(dst, sep='\t', dtype=str, keep_default_na=False)
+    key = dst_df.columns[0]
+    dst_df = dst_df[~dst_df[key].isin(src_df[key])]
+    df = pd.concat([dst_df, src_df], ignore_index=True, sort=False)
+    df.to_csv(dst, sep='\t', index=False, na_rep='n/a')
+
+
+def _set_groups(df, groups):
+    """Set the group of each of the participants in `groups`."""
+    if 'group' not in df:
+        df = df.assign(group='n/a')
+    # if every group is n/a (eg. only empty room data) the column is read as
+    # numbers
+    df['group'] = df['group'].astype(object)
+    for i in range(len(df)):
+        participant_id = df.loc[i, 'participant_id']
+        if participant_id in groups:
+            df.loc[i, 'group'] = groups[participant_id]
+    return df
+
+
+def _sidecar_data(sidecar, data):
+    """Return the sidecar data with the extra data added."""
     # add dewar angle
     # modify the continuous head localisation value
     # add software filters
     # add empty room info
     # add serial number?
-    with open(fname, 'r') as file:
-        sidecar = json.load(file, object_hook=odict)
-
-    new_data = odict()
+    new_output = odict()
+    new_output.update(sidecar)
     for key in ['InstitutionName', 'ManufacturersModelName',
                 'DeviceSerialNumber', 'DewarPosition',
                 'DigitizedLandmarks', 'DigitizedHeadPoints',
                 'ContinuousHeadLocalization', 'AssociatedEmptyRoom']:
         if data.get(key, None) is not None:
-            new_data[key] = data[key]
-    new_output = odict()
-    new_output.update(sidecar)
-    for key, value in new_data.items():
-        if key not in new_output:
-            new_output.update({key: value})
-        else:
-            new_output[key] = value
-    json_output = json.dumps(new_output, indent=4)
-    with open(fname, 'w') as file:
-        file.write(json_output)
-        file.write('\n')
-
-
-def write_readme(fname, readme_text):
-    # Write the readme to the file.
-    with open(fname, 'w') as file:
-        file.write(readme_text)
+            new_output[key] = data[key]
+    return new_output
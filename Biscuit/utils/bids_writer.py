@@ -0,0 +1,370 @@
+"""
+Conversion of individual jobs to BIDS format.
+
+Everything in this module works on plain python data (the job parameters
+generated by `Biscuit.Management.BIDSConvert`) and never touches tkinter.
+This allows each job to be sent to a separate worker process so that a
+number of jobs can be converted at the same time.
+
+mne and mne-bids are only imported once data is actually read or written, as
+the GUI imports this module when it starts.
+"""
+
+import glob
+import os
+import os.path as op
+import shutil
+import tempfile
+from threading import Thread
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+from multiprocessing import get_context
+from time import perf_counter
+
+from Biscuit.utils.bids_postprocess import (clean_emptyroom, update_markers,
+                                            merge_bids_folder)
+from Biscuit.utils.progress import (ProgressReporter, mne_log_file,
+                                    READ_RAW, FIND_EVENTS, WRITE_DATA,
+                                    POSTPROCESS, JOB_DONE, JOB_FAILED)
+
+
+def convert_job(job, root, progress=None):
+    """Convert a single job to BIDS format.
+
+    Parameters
+    ----------
+    job : dict
+        The job parameters. This contains the parameters required to read the
+        raw data (`raw`), the BIDS entities (`bids`) and the event
+        information. The extra data for the sidecar is added once all the jobs
+        are converted (see `BIDSMetadataWriter`).
+        If the events have already been found they can be provided as
+        `events` to avoid finding them again.
+    root : str
+        The root of the BIDS folder the data is to be written to.
+    progress : queue.Queue | None
+        Queue the progress events of the job are put into. The job is
+        identified by its source file.
+
+    Returns
+    -------
+    events : array | None
+        The events that were written with the data.
+    """
+    reporter = ProgressReporter(progress, job['raw']['file'])
+    try:
+        events = _convert_job(job, root, reporter)
+    except Exception:
+        reporter.emit(JOB_FAILED)
+        raise
+    reporter.emit(JOB_DONE, raw_size(job['raw']))
+    return events
+
+
+def _convert_job(job, root, reporter):
+    from mne_bids import write_raw_bids, BIDSPath
+
+    reporter.emit(READ_RAW)
+    raw = read_raw(job['raw'])
+
+    events = job.get('events')
+    if events is None and len(job['trigger_channels']) != 0:
+        reporter.emit(FIND_EVENTS)
+        events = find_job_events(raw, job['raw'])
+
+    bids_path = BIDSPath(root=root, datatype='meg', **job['bids'])
+
+    reporter.emit(WRITE_DATA)
+    write_raw_bids(
+        raw=raw,
+        bids_path=bids_path,
+        event_id=job['event_id'],
+        events=events,
+        overwrite=True,
+        verbose=True)
+
+    reporter.emit(POSTPROCESS, raw_size(job['raw']))
+    update_markers(job['markers'], bids_path.fpath, bids_path.basename)
+    if job['bids']['subject'] == 'emptyroom':
+        clean_emptyroom(bids_path.directory)
+
+    # Do some cleaning up
+    # rename hsp file
+    for old_name in glob.glob(op.join(bids_path.directory,
+                                      '*acq-HSP_headshape.pos')):
+        new_name = old_name.replace('acq-HSP_headshape.pos', 'headshape.txt')
+        # if file already exists, remove it first (otherwise it won't update)
+        if op.isfile(new_name):
+            os.remove(new_name)
+        os.rename(old_name, new_name)
+    # delete elp file
+    for fname in glob.glob(op.join(bids_path.directory, '*ELP*')):
+        os.remove(fname)
+
+    return events
+
+
+def convert_jobs(jobs, root, workers=1, callback=None, errback=None,
+                 progress=None, log_file=None, history=None):
+    """Convert a number of jobs into the same BIDS folder.
+
+    Parameters
+    ----------
+    jobs : list of dict
+        List of job parameters to be converted.
+    root : str
+        The root of the BIDS folder the data is to be written to.
+    workers : int
+        The maximum number of processes to use. If this is 1 the jobs are all
+        converted one after the other in the current process.
+    callback : function
+        Function called with the job parameters and the events found each
+        time a job has been converted.
+    errback : function
+        Function called with the job parameters and the exception raised if a
+        job fails to be converted. If this is not provided the exception is
+        raised and no further jobs are converted.
+    progress : queue.Queue
+        Queue the progress events of each job are put into.
+    log_file : str
+        The file the output of mne is written to. If not provided the output
+        is printed.
+    history : instance of ThroughputHistory
+        If provided the time taken to convert each job is added to it and it
+        is saved once all the jobs are converted.
+    """
+    try:
+        if workers <= 1 or len(jobs) <= 1:
+            with mne_log_file(log_file):
+                for job in jobs:
+                    try:
+                        events, elapsed = _timed_convert_job(job, root,
+                                                             progress)
+                    except Exception as e:
+                        if errback is None:
+                            raise
+                        errback(job, e)
+                        continue
+                    _add_history(history, job, elapsed)
+                    if callback is not None:
+                        callback(job, events)
+        else:
+            _convert_jobs_parallel(jobs, root, workers, callback, errback,
+                                   progress, log_file, history)
+    finally:
+        if history is not None:
+            history.save()
+
+
+def _convert_jobs_parallel(jobs, root, workers, callback, errback, progress,
+                           log_file, history):
+    """Convert the jobs in a pool of `workers` processes."""
+    # Each worker writes into its own staging folder, which is then merged
+    # into the actual BIDS folder one job at a time. This way the dataset
+    # level files (participants.tsv etc.) are never written concurrently.
+    # The staging folder is made next to the root to ensure it is on the same
+    # file system so that the files can just be moved.
+    staging_parent = op.dirname(op.normpath(root))
+    if not op.exists(staging_parent):
+        os.makedirs(staging_parent)
+    staging_root = tempfile.mkdtemp(prefix='.biscuit-', dir=staging_parent)
+    # Always spawn new processes as forking a process running tkinter is not
+    # safe.
+    context = get_context('spawn')
+    manager = forwarder = None
+    worker_progress = None
+    if progress is not None:
+        # The workers can only put the events into a queue shared by a
+        # manager, so pass them on to the actual queue from a thread.
+        manager = context.Manager()
+        worker_progress = manager.Queue()
+        forwarder = Thread(target=_forward_events,
+                           args=(worker_progress, progress), daemon=True)
+        forwarder.start()
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                 initializer=_init_worker,
+                                 initargs=(log_file,)) as pool:
+            futures = dict()
+            for i, job in enumerate(jobs):
+                job_root = op.join(staging_root, str(i))
+                future = pool.submit(_timed_convert_job, job, job_root,
+                                     worker_progress)
+                futures[future] = (job, job_root)
+            for future in as_completed(futures):
+                job, job_root = futures[future]
+                try:
+                    # raise any error that occurred within the worker.
+                    events, elapsed = future.result()
+                except Exception as e:
+                    if errback is None:
+                        # don't start any more jobs as the pool waits for
+                        # them all to finish before the error is raised
+                        for waiting in futures:
+                            waiting.cancel()
+                        raise
+                    errback(job, e)
+                    continue
+                merge_bids_folder(job_root, root)
+                _add_history(history, job, elapsed)
+                if callback is not None:
+                    callback(job, events)
+    finally:
+        if manager is not None:
+            worker_progress.put(None)
+            forwarder.join()
+            manager.shutdown()
+        shutil.rmtree(staging_root, ignore_errors=True)
+
+
+def read_raw(params):
+    """Read the raw data from the parameters provided.
+
+    Parameters
+    ----------
+    params : dict
+        Parameters required to read the raw data. These are generated by the
+        containers when they are prepared for conversion.
+    """
+    from mne.io import read_raw_kit, read_raw_fif
+    from mne.io.constants import FIFF
+
+    if params['dtype'] == '.con':
+        raw = read_raw_kit(
+            params['file'],
+            mrk=params['mrk'],
+            elp=params['elp'],
+            hsp=params['hsp'],
+            stim=params['stim'], stim_code=params['stim_code'],
+            slope=params['slope'])
+        # change the channel type of any channels that are triggers
+        if isinstance(params['stim'], list):
+            for ch in params['stim']:
+                i = int(ch) - 1
+                raw.info['chs'][i]['kind'] = FIFF.FIFFV_STIM_CH
+    else:
+        raw = read_raw_fif(params['file'], verbose='ERROR',
+                           allow_maxshield=params['allow_maxshield'])
+        # only do some processing if the data has changed
+        if params['ch_names'] != dict():
+            raw.rename_channels(params['ch_names'])
+        if params['ch_types'] != dict():
+            raw.set_channel_types(params['ch_types'])
+
+    if params.get('bads') is not None:
+        raw.info['bads'] = params['bads']
+
+    # assign the subject data
+    subject_info = params['subject_info']
+    if subject_info is None:
+        raw.info['subject_info'] = None
+    else:
+        subject_info = dict(subject_info)
+        # the birthday is stored as a (year, month, day) tuple
+        if subject_info.get('birthday') is not None:
+            subject_info['birthday'] = date(*subject_info['birthday'])
+        if raw.info['subject_info'] is None:
+            raw.info['subject_info'] = dict()
+        raw.info['subject_info'].update(subject_info)
+
+    return raw
+
+
+def find_job_events(raw, params):
+    """Find the events in the raw data read with the parameters.
+
+    For KIT data the trigger channels are read directly from the file if
+    possible as this is much faster than having mne create the stim channel.
+    """
+    # imported here to avoid a circular import
+    from Biscuit.FileTypes.kit_triggers import find_kit_events
+    if (params['dtype'] == '.con' and params['stim_code'] == 'channel' and
+            params.get('data_info') is not None):
+        try:
+            return find_kit_events(params['file'], params['data_info'],
+                                   [int(ch) for ch in params['stim']])
+        except ValueError:
+            # not all the trigger channels can be read directly
+            pass
+    return find_raw_events(raw)
+
+
+def find_raw_events(raw):
+    """Find the events in the stim channel of the raw data.
+
+    For KIT data this is the channel synthesised from the trigger channels
+    when the data is read.
+    """
+    from mne import find_events
+
+    return find_events(
+        raw,
+        output="onset",
+        consecutive=False,
+        min_duration=0,
+        shortest_event=1,
+        mask=None,
+        uint_cast=False,
+        mask_type="and",
+        initial_event=False,
+        verbose=None,
+    )
+
+
+def _timed_convert_job(job, root, progress):
+    """Convert the job, also returning how long it took."""
+    start = perf_counter()
+    events = convert_job(job, root, progress)
+    return events, perf_counter() - start
+
+
+def _add_history(history, job, elapsed):
+    if history is not None:
+        history.add(job['raw']['dtype'], raw_size(job['raw']), elapsed)
+
+
+def _forward_events(src, dst):
+    """Move all the events from the queue `src` to `dst` until a None is
+    received."""
+    for event in iter(src.get, None):
+        dst.put(event)
+
+
+def _init_worker(log_file):
+    """Set up each of the worker processes."""
+    if log_file is not None:
+        from mne import set_log_file
+        set_log_file(log_file, overwrite=False)
+
+
+def get_events_key(params):
+    """Return a key identifying the events that will be found in the raw
+    data read with the parameters.
+
+    If the file or any of the parameters that determine the events change the
+    key will be different.
+    """
+    stat = os.stat(params['file'])
+    stim = params.get('stim')
+    if isinstance(stim, list):
+        stim = tuple(stim)
+    # the later parts of a split recording can also change
+    parts = tuple((part.st_mtime, part.st_size) for part in
+                  map(os.stat, raw_files(params)[1:]))
+    return (stat.st_mtime, stat.st_size, stim, params.get('stim_code'),
+            params.get('slope')) + parts
+
+
+def raw_files(params):
+    """Return the paths of all the files the raw data is read from.
+
+    A .fif recording may be split over a number of files. These are all read
+    (by `mne.io.read_raw_fif`) when the first one is.
+    """
+    return params.get('parts', [params['file']])
+
+
+def raw_size(params):
+    """Return the total size (bytes) of the files the raw data is read
+    from."""
+    return sum(op.getsize(fname) for fname in raw_files(params))
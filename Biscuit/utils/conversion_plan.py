@@ -0,0 +1,203 @@
+"""
+Planning of a conversion without actually converting anything.
+
+The plan contains the files each job will write (and which of these already
+exist and will be overwritten), the number of bytes to be written and an
+estimate of how long the conversion will take. The estimate is based on the
+throughput measured in previous conversions, which is kept in a
+`ThroughputHistory`.
+"""
+
+import json
+import os
+import os.path as op
+
+from Biscuit.utils.bids_writer import raw_size
+from Biscuit.utils.utils import atomic_write_json
+
+THROUGHPUT_NAME = 'throughput.json'
+# number of measurements kept for each type of data
+HISTORY_SIZE = 50
+# dataset level files which are updated by every conversion
+DATASET_FILES = ['participants.tsv', 'participants.json', 'README',
+                 'dataset_description.json']
+
+
+class ThroughputHistory():
+    """The rate at which jobs have been converted in the past.
+
+    Parameters
+    ----------
+    fname : str
+        The file the history is saved to. If None it isn't saved.
+    """
+    def __init__(self, fname=None):
+        self.fname = fname
+        self.records = self._load()
+        # records added since the history was loaded
+        self._new = []
+
+    def add(self, dtype, n_bytes, seconds):
+        """Add the time taken to convert a job.
+
+        Parameters
+        ----------
+        dtype : str
+            The type of the raw data (eg. '.con').
+        n_bytes : int
+            The size of the raw data.
+        seconds : float
+            How long the conversion took.
+        """
+        if seconds > 0:
+            self._new.append([dtype, n_bytes, seconds])
+            self.records.append([dtype, n_bytes, seconds])
+
+    def throughput(self, dtype=None):
+        """Return the average number of bytes converted each second.
+
+        If there is no history for the data type the throughput of all the
+        data types is returned. If there is no history at all None is
+        returned.
+        """
+        records = [r for r in self.records if r[0] == dtype]
+        if len(records) == 0:
+            records = self.records
+        if len(records) == 0:
+            return None
+        return (sum(r[1] for r in records) / sum(r[2] for r in records))
+
+    def save(self):
+        if self.fname is None or len(self._new) == 0:
+            return
+        # add the new records to whatever is there now as another conversion
+        # may have saved its own since this one started
+        records = self._load() + self._new
+        kept = []
+        for dtype in sorted(set(r[0] for r in records)):
+            kept.extend([r for r in records if r[0] == dtype][-HISTORY_SIZE:])
+        if not op.exists(op.dirname(self.fname)):
+            os.makedirs(op.dirname(self.fname))
+        atomic_write_json(self.fname, kept)
+        self.records = kept
+        self._new = []
+
+    def _load(self):
+        if self.fname is None:
+            return []
+        try:
+            with open(self.fname, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return []
+
+
+def job_files(job, root):
+    """Return the paths of the files the job will write.
+
+    Parameters
+    ----------
+    job : dict
+        The job parameters as produced by `BIDSConvert.prepare_jobs`.
+    root : str
+        The root of the BIDS folder the job is written to.
+    """
+    from mne_bids import BIDSPath
+
+    dtype = job['raw']['dtype']
+    bids_path = BIDSPath(root=root, datatype='meg', **job['bids'])
+    # files which aren't specific to the task and run
+    session_path = BIDSPath(root=root, datatype='meg',
+                            subject=job['bids']['subject'],
+                            session=job['bids']['session'])
+    files = [bids_path.copy().update(suffix='meg', extension=dtype),
+             bids_path.copy().update(suffix='meg', extension='.json')]
+    # only the data is kept for empty room recordings
+    if job['bids']['subject'] != 'emptyroom':
+        files.append(bids_path.copy().update(suffix='channels',
+                                             extension='.tsv'))
+        if len(job['trigger_channels']) != 0:
+            files.append(bids_path.copy().update(suffix='events',
+                                                 extension='.tsv'))
+            files.append(bids_path.copy().update(suffix='events',
+                                                 extension='.json'))
+        files.append(session_path.copy().update(suffix='coordsystem',
+                                                extension='.json'))
+        if dtype == '.con':
+            if len(job['markers']) == 2:
+                for acq in ('pre', 'post'):
+                    files.append(bids_path.copy().update(
+                        acquisition=acq, suffix='markers', extension='.mrk'))
+            else:
+                files.append(bids_path.copy().update(suffix='markers',
+                                                     extension='.mrk'))
+    fnames = [str(path.fpath) for path in files]
+    if dtype == '.con' and job['bids']['subject'] != 'emptyroom':
+        # the head shape file is renamed after conversion
+        fnames.append(op.join(bids_path.directory, '{0}_headshape.txt'.format(
+            session_path.basename)))
+    # the scans file is in the session folder
+    fnames.append(op.join(op.dirname(bids_path.directory),
+                          '{0}_scans.tsv'.format(session_path.basename)))
+    return fnames
+
+
+def plan_conversion(jobs, root, current=(), history=None, workers=1):
+    """Return the plan for converting the jobs.
+
+    Parameters
+    ----------
+    jobs : list of dict
+        The job parameters as produced by `BIDSConvert.prepare_jobs`.
+    root : str
+        The root of the BIDS folder the jobs are written to.
+    current : list of dict
+        Any of the jobs which are unchanged since they were last converted.
+        These are not converted again.
+    history : instance of ThroughputHistory
+        The past throughput used to estimate the duration.
+    workers : int
+        The number of processes the jobs are converted with.
+
+    Returns
+    -------
+    plan : dict
+        The plan. This only contains json serialisable data.
+    """
+    current = set(id(job) for job in current)
+    planned = []
+    total_bytes = 0
+    seconds = None if history is None else 0
+    for job in jobs:
+        n_bytes = raw_size(job['raw'])
+        files = job_files(job, root)
+        entry = {'name': job['name'],
+                 'source': job['raw']['file'],
+                 'bids': job['bids'],
+                 'action': 'unchanged' if id(job) in current else 'convert',
+                 'bytes': n_bytes,
+                 'files': files,
+                 'overwrites': [fname for fname in files if
+                                op.exists(fname)]}
+        if entry['action'] == 'convert':
+            total_bytes += n_bytes
+            if seconds is not None:
+                throughput = history.throughput(job['raw']['dtype'])
+                if throughput is None:
+                    seconds = None
+                else:
+                    seconds += n_bytes / throughput
+        planned.append(entry)
+
+    n_converted = sum(1 for entry in planned if entry['action'] == 'convert')
+    if seconds is not None and n_converted != 0:
+        # assume the jobs are evenly shared between the workers
+        seconds /= min(max(1, workers), n_converted)
+    dataset_files = []
+    if n_converted != 0:
+        dataset_files = [op.join(root, fname) for fname in DATASET_FILES]
+    return {'root': root,
+            'jobs': planned,
+            'dataset_files': dataset_files,
+            'total_bytes': total_bytes,
+            'estimated_seconds': seconds}
@@ -2,9 +2,30 @@
 of file transfer
 """
 
+import errno
 import os
 import stat
+import sys
 from hashlib import md5
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# ioctl request to clone the contents of one file into another (Linux)
+FICLONE = 0x40049409
+# size of the blocks copied by copy_file_range
+COPY_RANGE_BLOCK = 16 * 1024 * 1024
+
+# the ways `fast_copy` can copy a file
+REFLINK = 'reflink'
+HARDLINK = 'hardlink'
+COPY_RANGE = 'copy_file_range'
+STREAM = 'stream'
+
+# errors raised when a way of copying isn't supported for the files
+_UNSUPPORTED = (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EPERM,
+                errno.EOPNOTSUPP, errno.ENOTTY, errno.EBADF)
 
 
 class SameFileError(OSError):
@@ -141,3 +162,139 @@ def copy(src, dst, *, follow_symlinks=True, tracker=None, verify=False):
         return dst, file_hash
     else:
         return dst
+
+
+def fast_copy(src, dst, *, allow_hardlink=False, callback=None):
+    """Copy the file using the fastest method available.
+
+    The methods are tried in the following order:
+
+    - reflink: the destination shares the data of the source until either is
+      modified (Linux filesystems which support it, eg. btrfs and xfs).
+    - hardlink: the destination is the same file as the source. Only used if
+      `allow_hardlink` is True as any change to either file changes both.
+    - copy_file_range: the data is copied by the kernel without being read
+      into python.
+    - stream: the data is read and written in blocks.
+
+    Parameters
+    ----------
+    src : str
+        The source file.
+    dst : str
+        The destination. This may be a directory.
+    allow_hardlink : bool
+        Whether the destination may be a hardlink to the source.
+    callback : function
+        Function called with the number of bytes copied so far each time a
+        block has been copied.
+
+    Returns
+    -------
+    dst : str
+        The destination file.
+    method : str
+        The method used to copy the file.
+    """
+    if os.path.isdir(dst):
+        dst = os.path.join(dst, os.path.basename(src))
+    if callback is None:
+        def callback(n_bytes):
+            pass
+    size = os.stat(src).st_size
+
+    if _samefile(src, dst):
+        if (os.path.normcase(os.path.abspath(src)) ==
+                os.path.normcase(os.path.abspath(dst))):
+            raise SameFileError(
+                "{!r} and {!r} are the same file".format(src, dst))
+        # the destination is a hardlink made by a previous copy
+        if allow_hardlink:
+            callback(size)
+            return dst, HARDLINK
+    # Always replace the destination rather than writing into it so that if
+    # it is a hardlink the source isn't modified.
+    if os.path.lexists(dst):
+        os.remove(dst)
+
+    with open(src, 'rb', buffering=0) as fsrc:
+        with open(dst, 'wb', buffering=0) as fdst:
+            method = _clone(fsrc, fdst)
+    if method is None and allow_hardlink and _link(src, dst):
+        method = HARDLINK
+    if method is None:
+        with open(src, 'rb', buffering=0) as fsrc:
+            with open(dst, 'wb', buffering=0) as fdst:
+                method = _copy_range(fsrc, fdst, callback)
+                if method is None:
+                    tracker = _CallbackTracker(callback, size)
+                    copyfileobj(fsrc, fdst, tracker=tracker)
+                    method = STREAM
+    callback(size)
+    if method != HARDLINK:
+        copymode(src, dst)
+    return dst, method
+
+
+def _link(src, dst):
+    """Replace the destination with a hardlink to the source.
+
+    Returns whether this was successful.
+    """
+    os.remove(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        return False
+    return True
+
+
+def _clone(fsrc, fdst):
+    """Reflink the source file into the (empty) destination file.
+
+    Returns `REFLINK` if this was successful, otherwise None.
+    """
+    if fcntl is None or not sys.platform.startswith('linux'):
+        return None
+    try:
+        fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+    except OSError as e:
+        if e.errno in _UNSUPPORTED:
+            return None
+        raise
+    return REFLINK
+
+
+def _copy_range(fsrc, fdst, callback):
+    """Copy the file with copy_file_range.
+
+    Returns `COPY_RANGE` if this was successful, otherwise None. Nothing is
+    left copied if it isn't supported.
+    """
+    if not hasattr(os, 'copy_file_range'):
+        return None
+    copied = 0
+    while True:
+        try:
+            n_bytes = os.copy_file_range(fsrc.fileno(), fdst.fileno(),
+                                         COPY_RANGE_BLOCK)
+        except OSError as e:
+            if e.errno in _UNSUPPORTED and copied == 0:
+                return None
+            raise
+        if n_bytes == 0:
+            return COPY_RANGE
+        copied += n_bytes
+        callback(copied)
+
+
+class _CallbackTracker():
+    """Tracker passed to `copyfileobj` which reports the progress to a
+    callback."""
+    def __init__(self, callback, size):
+        self.callback = callback
+        self.max = size
+
+    def set(self, value):
+        # the last block is generally smaller than the others
+        self.callback(min(value, self.max))
@@ -0,0 +1,144 @@
+"""
+Snapshot of the contents of the folders shown in the file treeview.
+
+Listing a folder is slow on network shares, and the data folder can contain
+hundreds of thousands of files. The entries of each folder which is listed
+are stored in an SQLite database in the user folder, keyed by the normalised
+path of the folder, its inode, size and modification time. The modification
+time of a folder changes whenever an entry is added to, removed from or
+renamed within it, so a folder only needs to be listed again if its key has
+changed since, and checking whether anything has changed only requires a stat
+of each folder.
+
+The modification time is only as precise as the filesystem keeps it, so a
+folder modified very recently may be modified again without its key
+changing. These folders aren't given a key, which means they are always
+listed until they have been left alone for a while.
+
+As with the header cache the snapshot is only ever an optimisation. If it
+can't be read or written the folder is simply listed.
+"""
+
+import json
+import os
+import os.path as op
+import sqlite3
+from threading import Lock
+import time
+
+from Biscuit.utils.constants import OSCONST
+from Biscuit.utils.header_cache import _open_versioned_db
+
+SNAPSHOT_NAME = 'dir_snapshot.sqlite'
+# Increment whenever the format of the stored entries changes so that the old
+# entries are discarded.
+SNAPSHOT_VERSION = 1
+# How long after a folder is modified its key can be relied on (s). This is
+# the resolution of the modification time on FAT filesystems.
+RACY_INTERVAL = 2
+
+_snapshot = None
+_snapshot_lock = Lock()
+
+
+class DirSnapshot():
+    """The database of the contents of each folder.
+
+    Parameters
+    ----------
+    fname : str
+        The database file. If None the snapshot is only kept in memory.
+    """
+    def __init__(self, fname=None):
+        self.fname = fname
+        self._lock = Lock()
+        self._conn = None
+
+    def listdir(self, directory):
+        """Return the entries of the folder, only listing it if it has changed
+        since it was last listed.
+
+        Parameters
+        ----------
+        directory : str
+            The folder to list.
+
+        Returns
+        -------
+        entries : list of tuple
+            The name of each entry in the folder and whether it is a folder.
+        key : tuple | None
+            The key of the folder when it was listed (see `folder_key`).
+        """
+        key = folder_key(directory)
+        path = op.normcase(op.realpath(directory))
+        if key is not None:
+            entries = self._get(path, key)
+            if entries is not None:
+                return entries, key
+        entries = [(entry.name, entry.is_dir()) for entry in
+                   os.scandir(directory)]
+        if key is not None:
+            self._set(path, key, entries)
+        return entries, key
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _get(self, path, key):
+        try:
+            with self._lock:
+                row = self._connect().execute(
+                    'SELECT inode, size, mtime, entries FROM folders '
+                    'WHERE path = ?', (path,)).fetchone()
+        except (OSError, sqlite3.Error):
+            return None
+        if row is None or tuple(row[:3]) != key:
+            return None
+        return [tuple(entry) for entry in json.loads(row[3])]
+
+    def _set(self, path, key, entries):
+        try:
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    conn.execute(
+                        'INSERT OR REPLACE INTO folders '
+                        '(path, inode, size, mtime, entries) '
+                        'VALUES (?, ?, ?, ?, ?)',
+                        (path,) + key + (json.dumps(entries),))
+        except (OSError, sqlite3.Error):
+            pass
+
+    def _connect(self):
+        if self._conn is None:
+            self._conn = _open_versioned_db(
+                self.fname, SNAPSHOT_VERSION, 'DROP TABLE IF EXISTS folders',
+                'CREATE TABLE IF NOT EXISTS folders ('
+                'path TEXT PRIMARY KEY, inode INTEGER, size INTEGER, '
+                'mtime INTEGER, entries TEXT)')
+        return self._conn
+
+
+def get_dir_snapshot():
+    """Return the folder snapshot of the current user."""
+    global _snapshot
+    with _snapshot_lock:
+        if _snapshot is None:
+            _snapshot = DirSnapshot(op.join(OSCONST.USRDIR, SNAPSHOT_NAME))
+        return _snapshot
+
+
+def folder_key(directory):
+    """Return the inode, size and modification time of the folder, or None if
+    it was modified too recently for these to show any further changes.
+
+    Raises OSError if the folder doesn't exist.
+    """
+    stat = os.stat(directory)
+    if time.time() - stat.st_mtime < RACY_INTERVAL:
+        return None
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
@@ -0,0 +1,246 @@
+"""
+Updating of the GUI from any thread.
+
+tkinter objects may only be used in the thread the tkinter interpreter was
+created in. Any change to the GUI a background task wants to make (eg.
+changing the colour of a file in the treeview once it is loaded, or updating
+the progress of a file being copied) is instead passed to a `UIDispatcher`,
+which applies the changes in batches from the tkinter thread.
+
+Each change can be given a key. If a change is dispatched while an earlier one
+with the same key still hasn't been applied, only the latest one is applied,
+so eg. a progress bar is updated at most once per batch however often the
+progress changes.
+"""
+
+from collections import OrderedDict
+from itertools import count
+from threading import Lock, get_ident
+import time
+
+from Biscuit.utils.executor import print_error
+
+# time each batch of changes may take before the rest are left until the next
+# batch, so that the GUI stays responsive (ms)
+FRAME_BUDGET = 10
+# how often changes are applied while there are any (ms)
+PUMP_INTERVAL = 16
+# how often to check for changes while there are none (ms)
+IDLE_INTERVAL = 100
+
+_dispatcher = None
+_dispatcher_lock = Lock()
+
+
+class UIDispatcher():
+    """Apply changes to the GUI in the tkinter thread.
+
+    Parameters
+    ----------
+    frame_budget : int
+        The time each batch of changes may take (ms).
+    pump_interval : int
+        How often changes are applied while there are any (ms).
+    idle_interval : int
+        How often to check for changes while there are none (ms).
+
+    Until a widget is attached (see `attach`) changes are applied straight
+    away in the thread they are dispatched from.
+    """
+    def __init__(self, frame_budget=FRAME_BUDGET, pump_interval=PUMP_INTERVAL,
+                 idle_interval=IDLE_INTERVAL):
+        self.frame_budget = frame_budget
+        self.pump_interval = pump_interval
+        self.idle_interval = idle_interval
+        self.widget = None
+        self.on_error = print_error
+
+        self._lock = Lock()
+        # the changes which haven't been applied yet, in the order they were
+        # (last) dispatched
+        self._pending = OrderedDict()
+        # keys for changes dispatched without one
+        self._ids = count()
+        self._thread = None
+
+        self._dispatched = 0
+        self._coalesced = 0
+        self._applied = 0
+        self._max_depth = 0
+        self._last_batch = 0
+        self._last_batch_time = 0
+        self._max_batch_time = 0
+        self._over_budget = 0
+
+    def attach(self, widget, on_error=None):
+        """Apply the changes in the tkinter thread of the widget.
+
+        This must be called from the tkinter thread.
+
+        Parameters
+        ----------
+        widget : instance of tkinter.Misc
+            Any widget. Its `after` method is used to apply the changes.
+        on_error : function
+            Function called with any exception raised while applying a
+            change. By default the traceback is printed.
+        """
+        self.widget = widget
+        self._thread = get_ident()
+        if on_error is not None:
+            self.on_error = on_error
+        self.widget.after(self.idle_interval, self._pump)
+
+    def dispatch(self, func, *args, key=None):
+        """Call a function in the tkinter thread.
+
+        If this is called from the tkinter thread while there are no other
+        changes waiting the function is called straight away.
+
+        Parameters
+        ----------
+        func : function
+            The function to call with the remaining arguments.
+        key : hashable
+            If provided, any change with the same key which hasn't been
+            applied yet is replaced by this one.
+        """
+        with self._lock:
+            self._dispatched += 1
+            inline = (self.widget is None or
+                      (get_ident() == self._thread and
+                       len(self._pending) == 0))
+            if not inline:
+                if key is None:
+                    key = ('_', next(self._ids))
+                elif key in self._pending:
+                    self._coalesced += 1
+                    del self._pending[key]
+                self._pending[key] = (func, args)
+                self._max_depth = max(self._max_depth, len(self._pending))
+                return
+        self._apply(func, args)
+
+    def flush(self):
+        """Apply all the waiting changes now.
+
+        This must be called from the tkinter thread (or, if no widget is
+        attached, any thread).
+        """
+        while True:
+            with self._lock:
+                if len(self._pending) == 0:
+                    return
+                _, (func, args) = self._pending.popitem(last=False)
+            self._apply(func, args)
+
+    def metrics(self):
+        """Return statistics on the changes dispatched.
+
+        Returns
+        -------
+        metrics : dict
+            - queue_depth: the number of changes waiting to be applied
+            - max_queue_depth: the most changes which have been waiting
+            - dispatched: the number of changes dispatched
+            - coalesced: the number of changes replaced by a later one
+            - applied: the number of changes applied
+            - last_batch: the number of changes applied in the last batch
+            - last_batch_time: how long the last batch took (ms)
+            - max_batch_time: how long the longest batch took (ms)
+            - frame_budget: the time each batch may take (ms)
+            - over_budget: the number of batches which ran out of time
+              before all the waiting changes were applied
+        """
+        with self._lock:
+            return {'queue_depth': len(self._pending),
+                    'max_queue_depth': self._max_depth,
+                    'dispatched': self._dispatched,
+                    'coalesced': self._coalesced,
+                    'applied': self._applied,
+                    'last_batch': self._last_batch,
+                    'last_batch_time': self._last_batch_time,
+                    'max_batch_time': self._max_batch_time,
+                    'frame_budget': self.frame_budget,
+                    'over_budget': self._over_budget}
+
+    def _apply(self, func, args):
+        try:
+            func(*args)
+        except Exception as e:
+            self.on_error(e)
+        with self._lock:
+            self._applied += 1
+
+    def _pump(self):
+        """Apply the waiting changes until the frame budget runs out."""
+        start = time.perf_counter()
+        end = start + self.frame_budget / 1000
+        applied = 0
+        while True:
+            with self._lock:
+                if len(self._pending) == 0:
+                    break
+                if applied != 0 and time.perf_counter() >= end:
+                    self._over_budget += 1
+                    break
+                _, (func, args) = self._pending.popitem(last=False)
+            self._apply(func, args)
+            applied += 1
+        with self._lock:
+            if applied != 0:
+                self._last_batch = applied
+                self._last_batch_time = (time.perf_counter() - start) * 1000
+                self._max_batch_time = max(self._max_batch_time,
+                                           self._last_batch_time)
+            busy = len(self._pending) != 0
+        self.widget.after(self.pump_interval if busy or applied != 0 else
+                          self.idle_interval, self._pump)
+
+
+class DispatchedVar():
+    """Stand-in for a tkinter Variable which can be set from any thread.
+
+    The value is kept so that it can be read without using tkinter, and the
+    Variable is set by the dispatcher.
+
+    Parameters
+    ----------
+    var : instance of tkinter.Variable
+        The Variable to set. This may have a `max` attribute (see
+        `Biscuit.Management.CustomVars.RangeVar`) which can also be set.
+    dispatcher : instance of UIDispatcher
+        The dispatcher to set the Variable with. Defaults to the one used by
+        the GUI.
+    """
+    def __init__(self, var, dispatcher=None):
+        self.var = var
+        self.dispatcher = dispatcher or get_dispatcher()
+        self._value = var.get()
+        self._max = getattr(var, 'max', None)
+
+    def get(self):
+        return self._value
+
+    def set(self, value):
+        self._value = value
+        self.dispatcher.dispatch(self.var.set, value, key=(id(self), 'set'))
+
+    @property
+    def max(self):
+        return self._max
+
+    @max.setter
+    def max(self, value):
+        self._max = value
+        self.dispatcher.dispatch(setattr, self.var, 'max', value,
+                                 key=(id(self), 'max'))
+
+
+def get_dispatcher():
+    """Return the dispatcher all the changes to the GUI are made by."""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = UIDispatcher()
+        return _dispatcher
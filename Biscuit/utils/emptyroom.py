@@ -0,0 +1,127 @@
+"""
+Registry of the empty room recordings converted into each BIDS folder.
+
+The same empty room recording is often copied into every folder recorded on
+the same day. Each recording is identified by its measurement date and a hash
+of its contents so that, no matter which copy is converted, it is only
+written into each BIDS folder once.
+"""
+
+import glob
+import json
+import os
+import os.path as op
+
+from Biscuit.utils.manifest import partial_hash
+from Biscuit.utils.utils import atomic_write_json
+
+REGISTRY_NAME = 'emptyroom.json'
+
+
+def is_emptyroom(job):
+    """Whether the job parameters are for an empty room recording."""
+    return job['bids']['subject'] == 'emptyroom'
+
+
+def emptyroom_key(job):
+    """Return the key identifying the empty room recording of the job."""
+    return '{0}_{1}'.format(job['bids']['session'],
+                            partial_hash(job['raw']['file']))
+
+
+class EmptyRoomRegistry():
+    """The empty room recordings which have been converted.
+
+    Parameters
+    ----------
+    fname : str
+        The file the registry is saved to. If None it isn't saved.
+    """
+    def __init__(self, fname=None):
+        self.fname = fname
+        self.recordings = self._load()
+        # recordings added since the registry was loaded
+        self._new = dict()
+
+    def find(self, job, root):
+        """Return the path of the converted data relative to `root` if the
+        recording has already been converted into it, otherwise None."""
+        path = self.recordings.get(emptyroom_key(job), dict()).get(root)
+        if path is None:
+            return None
+        # make sure the data hasn't been removed since
+        if len(glob.glob(op.join(root, op.splitext(path)[0] + '*'))) == 0:
+            return None
+        return path
+
+    def add(self, job, root):
+        """Record that the recording has been converted into `root`."""
+        from mne_bids import BIDSPath
+        bids_path = BIDSPath(root=root, datatype='meg', suffix='meg',
+                             extension=job['raw']['dtype'], **job['bids'])
+        path = op.relpath(str(bids_path.fpath), root).replace(os.sep, '/')
+        key = emptyroom_key(job)
+        self.recordings.setdefault(key, dict())[root] = path
+        self._new.setdefault(key, dict())[root] = path
+
+    def save(self):
+        if self.fname is None or len(self._new) == 0:
+            return
+        # add the new recordings to whatever is there now as another
+        # conversion may have saved its own since this one started
+        recordings = self._load()
+        for key, roots in self._new.items():
+            recordings.setdefault(key, dict()).update(roots)
+        if not op.exists(op.dirname(self.fname)):
+            os.makedirs(op.dirname(self.fname))
+        atomic_write_json(self.fname, recordings, indent=4, sort_keys=True)
+        self.recordings = recordings
+        self._new = dict()
+
+    def _load(self):
+        if self.fname is None:
+            return dict()
+        try:
+            with open(self.fname, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return dict()
+
+
+def split_emptyroom(jobs, root, registry):
+    """Split the jobs into those that need converting and the empty room
+    recordings which are already in `root`.
+
+    An empty room recording is also not converted if another job converts
+    the same recording.
+
+    Parameters
+    ----------
+    jobs : list of dict
+        The parameters of the jobs to be converted.
+    root : str
+        The root of the BIDS folder the jobs are converted into.
+    registry : instance of EmptyRoomRegistry
+        The registry of empty room recordings already converted.
+
+    Returns
+    -------
+    new_jobs : list of dict
+        The jobs to be converted.
+    reused : list of dict
+        The empty room jobs whose recording doesn't need to be converted.
+    """
+    new_jobs = []
+    reused = []
+    keys = set()
+    for job in jobs:
+        if not is_emptyroom(job):
+            new_jobs.append(job)
+            continue
+        key = emptyroom_key(job)
+        if key in keys or registry.find(job, root) is not None:
+            reused.append(job)
+        else:
+            keys.add(key)
+            new_jobs.append(job)
+    return new_jobs, reused
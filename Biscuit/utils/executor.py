@@ -0,0 +1,231 @@
+"""
+Running of tasks which are too slow to run in the tkinter thread.
+
+All the background work of the GUI (loading the selected files, syntax
+highlighting, sending and converting data) is submitted to a single
+`TaskExecutor`. This runs the tasks on bounded pools of worker threads and
+passes their results (or the exception raised) to callbacks which are called
+in the tkinter thread, so the callbacks can safely update the GUI.
+
+A task can be given a group. Submitting a new task in the same group
+supersedes the previous one: it is cancelled if it hasn't started yet, and
+otherwise its result is ignored. This stops, for example, the loading of a
+selection the user has already clicked away from from updating the GUI.
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from queue import Queue, Empty
+from threading import Lock
+import traceback
+
+# number of threads for short tasks (eg. loading the selected files)
+MAX_WORKERS = 4
+# number of threads for long running tasks (eg. conversions). These are kept
+# separate so that they can't stop the GUI from loading files.
+MAX_LONG_WORKERS = 4
+# number of threads for background tasks (eg. prefetching). These are only run
+# to speed up later tasks, so are kept separate so that they can't hold up the
+# tasks the user is waiting for.
+MAX_BACKGROUND_WORKERS = 1
+# how often the results of the tasks are checked for (ms)
+POLL_INTERVAL = 50
+
+_executor = None
+_executor_lock = Lock()
+
+
+class TaskExecutor():
+    """Run functions in a bounded pool of threads.
+
+    Parameters
+    ----------
+    max_workers : int
+        The number of threads short tasks are run on.
+    max_long_workers : int
+        The number of threads long running tasks are run on.
+    max_background_workers : int
+        The number of threads background tasks are run on.
+    poll_interval : int
+        How often the results of the tasks are checked for (ms).
+
+    Until a widget is attached (see `attach`) the callbacks are called in the
+    worker threads.
+    """
+    def __init__(self, max_workers=MAX_WORKERS,
+                 max_long_workers=MAX_LONG_WORKERS,
+                 max_background_workers=MAX_BACKGROUND_WORKERS,
+                 poll_interval=POLL_INTERVAL):
+        self._pool = ThreadPoolExecutor(max_workers,
+                                        thread_name_prefix='BiscuitTask')
+        self._long_pool = ThreadPoolExecutor(
+            max_long_workers, thread_name_prefix='BiscuitLongTask')
+        self._background_pool = ThreadPoolExecutor(
+            max_background_workers,
+            thread_name_prefix='BiscuitBackgroundTask')
+        self.poll_interval = poll_interval
+        self.widget = None
+        self.on_error = print_error
+
+        self._lock = Lock()
+        # futures whose results haven't been passed to their callbacks yet
+        self._pending = set()
+        self._results = Queue()
+        self._polling = False
+        # the most recent future submitted in each group
+        self._groups = dict()
+        # futures of the functions currently being run by `once`
+        self._in_flight = dict()
+
+    def attach(self, widget, on_error=None):
+        """Call the callbacks in the tkinter thread of the widget.
+
+        Parameters
+        ----------
+        widget : instance of tkinter.Misc
+            Any widget. Its `after` method is used to check for results, so
+            tasks must then be submitted from the tkinter thread.
+        on_error : function
+            Function called with the exception raised by any task submitted
+            without an `errback`. By default the traceback is printed.
+        """
+        self.widget = widget
+        if on_error is not None:
+            self.on_error = on_error
+
+    def submit(self, func, *args, callback=None, errback=None, group=None,
+               long_running=False, background=False, **kwargs):
+        """Call a function in a worker thread.
+
+        Parameters
+        ----------
+        func : function
+            The function to call with the remaining arguments. If a widget
+            is attached this must not use any tkinter objects.
+        callback : function
+            Function called with the value returned by `func`.
+        errback : function
+            Function called with the exception raised by `func`. If None the
+            `on_error` function of the executor is called instead.
+        group : hashable
+            If provided, any previous task in the same group is cancelled, or
+            if it has already started its callbacks won't be called.
+        long_running : bool
+            Whether the function may take a long time (minutes rather than
+            seconds) to run.
+        background : bool
+            Whether the function is only run to speed up later tasks (eg.
+            prefetching). These are run one at a time.
+
+        Returns
+        -------
+        future : instance of concurrent.futures.Future
+            The future of the call to `func`.
+        """
+        if background:
+            pool = self._background_pool
+        elif long_running:
+            pool = self._long_pool
+        else:
+            pool = self._pool
+        with self._lock:
+            future = pool.submit(func, *args, **kwargs)
+            self._pending.add(future)
+            if group is not None:
+                previous = self._groups.get(group)
+                self._groups[group] = future
+            else:
+                previous = None
+        if previous is not None:
+            previous.cancel()
+        future.add_done_callback(
+            lambda future: self._done(future, callback, errback, group))
+        if self.widget is not None:
+            self._start_polling()
+        return future
+
+    def once(self, key, func, *args, **kwargs):
+        """Call a function unless a call with the same key is already running,
+        in which case its result is waited for and returned instead.
+
+        This is called directly in the calling thread, so can be used to stop
+        a number of tasks from, eg. loading the same file at the same time.
+        """
+        with self._lock:
+            future = self._in_flight.get(key)
+            running = future is not None
+            if not running:
+                future = self._in_flight[key] = Future()
+        if running:
+            return future.result()
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    def _done(self, future, callback, errback, group):
+        """Pass the result of the future to its callbacks, unless it has been
+        superseded."""
+        with self._lock:
+            current = True
+            if group is not None:
+                current = self._groups.get(group) is future
+                if current:
+                    del self._groups[group]
+            if future.cancelled() or not current:
+                self._pending.discard(future)
+                return
+            if self.widget is not None:
+                self._results.put((future, callback, errback))
+                return
+            self._pending.discard(future)
+        self._deliver(future, callback, errback)
+
+    def _deliver(self, future, callback, errback):
+        error = future.exception()
+        if error is not None:
+            (errback or self.on_error)(error)
+        elif callback is not None:
+            callback(future.result())
+
+    def _start_polling(self):
+        if not self._polling:
+            self._polling = True
+            self.widget.after(self.poll_interval, self._poll)
+
+    def _poll(self):
+        while True:
+            try:
+                future, callback, errback = self._results.get_nowait()
+            except Empty:
+                break
+            with self._lock:
+                self._pending.discard(future)
+            try:
+                self._deliver(future, callback, errback)
+            except Exception as e:
+                self.on_error(e)
+        with self._lock:
+            self._polling = len(self._pending) != 0
+        if self._polling:
+            self.widget.after(self.poll_interval, self._poll)
+
+
+def get_executor():
+    """Return the executor all the background tasks are run by."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = TaskExecutor()
+        return _executor
+
+
+def print_error(error):
+    """Print the traceback of an exception raised by a task."""
+    traceback.print_exception(type(error), error, error.__traceback__)
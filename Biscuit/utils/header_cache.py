@@ -0,0 +1,182 @@
+"""
+Cache of the information read from the headers of the data files.
+
+Reading the header of every .con, .fif and .mrk file each time a folder is
+opened is slow for large folders, particularly on network shares. The
+information read from each file is stored in an SQLite database in the user
+folder, keyed by the normalised path of the file, its size and modification
+time, so that reopening a folder only requires a stat of each file. Other
+information which is slow to find from a file (eg. the quality statistics of
+each channel) is cached the same way.
+
+The cache is only ever an optimisation. If it can't be read or written the
+header is simply read from the file.
+"""
+
+import json
+import os
+import os.path as op
+import sqlite3
+from threading import Lock
+
+from Biscuit.utils.constants import OSCONST
+
+CACHE_NAME = 'header_cache.sqlite'
+# Increment whenever the format of any of the cached data changes so that
+# the old entries are discarded.
+CACHE_VERSION = 2
+
+_cache = None
+_cache_lock = Lock()
+
+
+class HeaderCache():
+    """The database of cached file headers.
+
+    Parameters
+    ----------
+    fname : str
+        The database file. If None the cache is only kept in memory.
+    """
+    def __init__(self, fname=None):
+        self.fname = fname
+        self._lock = Lock()
+        self._conn = None
+
+    def get(self, fname, kind):
+        """Return the cached header of the file, or None if it isn't cached
+        or the file has changed since.
+
+        Parameters
+        ----------
+        fname : str
+            The file the header is from.
+        kind : str
+            The kind of header (eg. 'kit'). A file can have a number of
+            different kinds of information cached.
+        """
+        try:
+            key = _file_key(fname)
+            with self._lock:
+                row = self._connect().execute(
+                    'SELECT size, mtime, data FROM headers '
+                    'WHERE path = ? AND kind = ?', (key[0], kind)).fetchone()
+        except (OSError, sqlite3.Error):
+            return None
+        if row is None or tuple(row[:2]) != key[1:]:
+            return None
+        return json.loads(row[2])
+
+    def set(self, fname, kind, data):
+        """Cache the header of the file.
+
+        Parameters
+        ----------
+        fname : str
+            The file the header is from.
+        kind : str
+            The kind of header.
+        data : dict
+            The information read from the header. This must be json
+            serialisable.
+        """
+        try:
+            key = _file_key(fname)
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    conn.execute(
+                        'INSERT OR REPLACE INTO headers '
+                        '(path, kind, size, mtime, data) '
+                        'VALUES (?, ?, ?, ?, ?)',
+                        (key[0], kind, key[1], key[2], json.dumps(data)))
+        except (OSError, sqlite3.Error):
+            pass
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            self._conn = _open_versioned_db(
+                self.fname, CACHE_VERSION, 'DROP TABLE IF EXISTS headers',
+                'CREATE TABLE IF NOT EXISTS headers ('
+                'path TEXT, kind TEXT, size INTEGER, mtime INTEGER, '
+                'data TEXT, PRIMARY KEY (path, kind))')
+        return self._conn
+
+
+def get_header_cache():
+    """Return the header cache of the current user."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = HeaderCache(op.join(OSCONST.USRDIR, CACHE_NAME))
+        return _cache
+
+
+def cached_header(fname, kind, reader, cache=None):
+    """Return the header of the file, reading it only if it isn't cached.
+
+    Parameters
+    ----------
+    fname : str
+        The file to read.
+    kind : str
+        The kind of header.
+    reader : function
+        Function which reads the header from the file and returns it as a
+        json serialisable dictionary.
+    cache : instance of HeaderCache
+        The cache to use. Defaults to the cache of the current user.
+    """
+    if cache is None:
+        cache = get_header_cache()
+    header = cache.get(fname, kind)
+    if header is None:
+        # return exactly what will be returned once it is cached (eg. lists
+        # rather than tuples)
+        header = json.loads(json.dumps(reader(fname)))
+        cache.set(fname, kind, header)
+    return header
+
+
+def _open_versioned_db(fname, version, drop_sql, create_sql):
+    """Open the database, discarding its contents if they were stored with a
+    different version of the format.
+
+    Parameters
+    ----------
+    fname : str
+        The database file. If None the database is only kept in memory.
+    version : int
+        The version of the format of the data stored in the database.
+    drop_sql : str
+        Statement dropping the tables if the version has changed.
+    create_sql : str
+        Statement creating the tables if they don't exist.
+    """
+    if fname is None:
+        conn = sqlite3.connect(':memory:', check_same_thread=False)
+    else:
+        if not op.exists(op.dirname(fname)):
+            os.makedirs(op.dirname(fname))
+        # the file may be used by a number of processes at once (eg. the
+        # conversion workers)
+        conn = sqlite3.connect(fname, timeout=5, check_same_thread=False)
+    current, = conn.execute('PRAGMA user_version').fetchone()
+    with conn:
+        if current != version:
+            conn.execute(drop_sql)
+            conn.execute('PRAGMA user_version = {0:d}'.format(version))
+        conn.execute(create_sql)
+    return conn
+
+
+def _file_key(fname):
+    """Return the normalised path, size and modification time of the file."""
+    stat = os.stat(fname)
+    return (op.normcase(op.realpath(fname)), stat.st_size, stat.st_mtime_ns)
@@ -0,0 +1,112 @@
+"""
+Record of the jobs converted into a BIDS folder.
+
+Each job is identified by its source file and stored with a fingerprint of
+everything that affects the converted data. When a container is converted
+again, any job whose fingerprint hasn't changed (and whose data still
+exists) doesn't need to be converted again.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import os.path as op
+
+from Biscuit.utils.bids_writer import raw_files
+from Biscuit.utils.utils import atomic_write_json
+
+MANIFEST_NAME = '.biscuit_manifest.json'
+# amount of data hashed from each end of the source file
+HASH_SIZE = 1024 * 1024
+# job parameters which don't affect the converted data
+IGNORED_PARAMS = ('name', 'events', 'events_key', 'fingerprint')
+
+
+def partial_hash(fname, size=HASH_SIZE):
+    """Return a hash of the start and end of the file and its size.
+
+    This is much faster than hashing the entire file and, combined with the
+    modification time, is enough to detect that a recording has changed.
+    """
+    file_size = op.getsize(fname)
+    h = hashlib.sha256(str(file_size).encode())
+    with open(fname, 'rb') as f:
+        h.update(f.read(size))
+        if file_size > size:
+            f.seek(max(size, file_size - size))
+            h.update(f.read(size))
+    return h.hexdigest()
+
+
+def job_fingerprint(job, readme=None):
+    """Return the fingerprint of the job.
+
+    Parameters
+    ----------
+    job : dict
+        The job parameters as produced by `BIDSConvert.prepare_jobs`.
+    readme : str
+        The README of the project the job is converted into. This is generated
+        from the project settings.
+    """
+    data = dict((key, value) for key, value in job.items() if
+                key not in IGNORED_PARAMS)
+    sources = [_source(fname) for fname in raw_files(job['raw'])]
+    data['source'] = sources[0]
+    # the later parts of a split recording
+    if len(sources) > 1:
+        data['parts'] = sources[1:]
+    data['readme'] = readme
+    # any non-json types (eg. tuples) are simply converted to strings
+    return hashlib.sha256(json.dumps(data, sort_keys=True,
+                                     default=str).encode()).hexdigest()
+
+
+def _source(fname):
+    """Return the values identifying the contents of a source file."""
+    stat = os.stat(fname)
+    return {'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'hash': partial_hash(fname)}
+
+
+class ConversionManifest():
+    """The manifest of the jobs converted into a BIDS folder.
+
+    Parameters
+    ----------
+    root : str
+        The root of the BIDS folder.
+    """
+    def __init__(self, root):
+        self.root = root
+        self.fname = op.join(root, MANIFEST_NAME)
+        try:
+            with open(self.fname, 'r') as f:
+                self.jobs = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.jobs = dict()
+
+    def is_current(self, job):
+        """Whether the job has already been converted with the same
+        fingerprint."""
+        entry = self.jobs.get(job['raw']['file'])
+        if entry is None or entry['fingerprint'] != job['fingerprint']:
+            return False
+        # make sure the data hasn't been removed since
+        from mne_bids import BIDSPath
+        bids_path = BIDSPath(root=self.root, datatype='meg', suffix='meg',
+                             **job['bids'])
+        return len(glob.glob(op.join(bids_path.directory,
+                                     bids_path.basename + '*'))) != 0
+
+    def update(self, job):
+        """Record that the job has been converted."""
+        self.jobs[job['raw']['file']] = {'fingerprint': job['fingerprint'],
+                                         'bids': job['bids']}
+
+    def save(self):
+        if not op.exists(self.root):
+            os.makedirs(self.root)
+        atomic_write_json(self.fname, self.jobs, indent=4, sort_keys=True)
@@ -0,0 +1,107 @@
+"""
+Reporting of the progress of a conversion.
+
+The conversion emits a `ProgressEvent` into a queue at the start of each
+stage of each job. The events are plain python data so that they can be
+emitted from any thread or worker process, and whatever is displaying the
+progress (eg. the `ProgressPopup`) reads them from the queue in its own
+time.
+"""
+
+from collections import namedtuple
+from contextlib import contextmanager
+from queue import Empty
+from threading import Lock
+from time import perf_counter
+
+
+# stages of each job
+READ_RAW = 'read raw'
+FIND_EVENTS = 'detect events'
+WRITE_DATA = 'write data'
+POSTPROCESS = 'post-process'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+# stages of the whole conversion. These events have no job.
+STARTED = 'started'
+WRITE_SIDECARS = 'write sidecars'
+COPY_EXTRAS = 'copy extras'
+FINISHED = 'finished'
+ERROR = 'error'
+
+# number of conversions currently writing to the mne log file
+_log_users = 0
+_log_lock = Lock()
+
+ProgressEvent = namedtuple('ProgressEvent',
+                           ['job', 'stage', 'bytes_done', 'elapsed'])
+ProgressEvent.__doc__ = """An event emitted at the start of a stage.
+
+job : str | None
+    The source file of the job. This is None for the events which relate to
+    the conversion as a whole.
+stage : str
+    The stage being started.
+bytes_done : int
+    The number of bytes of the job which have been converted. For the
+    `STARTED` event this is the total number of bytes to be converted.
+elapsed : float
+    The time in seconds since the job (or conversion) started.
+"""
+
+
+class ProgressReporter():
+    """Emit the progress events of a single job.
+
+    Parameters
+    ----------
+    queue : queue.Queue | multiprocessing.Queue | None
+        The queue the events are put into. If None nothing is emitted.
+    job : str | None
+        The job the events relate to.
+    """
+    def __init__(self, queue=None, job=None):
+        self.queue = queue
+        self.job = job
+        self.start = perf_counter()
+
+    def emit(self, stage, bytes_done=0):
+        if self.queue is not None:
+            self.queue.put(ProgressEvent(self.job, stage, bytes_done,
+                                         perf_counter() - self.start))
+
+
+def drain(queue):
+    """Return all the events currently in the queue without waiting."""
+    events = []
+    while True:
+        try:
+            events.append(queue.get_nowait())
+        except Empty:
+            return events
+
+
+@contextmanager
+def mne_log_file(fname):
+    """Write all the mne (and mne-bids) output to the file instead of
+    stdout.
+
+    The mne log is global so if a number of conversions are running at once
+    the output is only returned to stdout once they have all finished.
+    """
+    global _log_users
+    if fname is None:
+        yield
+        return
+    import mne
+    with _log_lock:
+        if _log_users == 0:
+            mne.set_log_file(fname, overwrite=False)
+        _log_users += 1
+    try:
+        yield
+    finally:
+        with _log_lock:
+            _log_users -= 1
+            if _log_users == 0:
+                mne.set_log_file(None)
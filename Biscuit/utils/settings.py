@@ -0,0 +1,21 @@
+"""
+Default values of the settings of Biscuit.
+
+These are kept separate from the GUI so that the batch converter can use
+them without importing any of the GUI modules.
+"""
+
+from Biscuit.utils.constants import OSCONST
+
+# default memory budget of the prefetching (MB)
+PREFETCH_MEMORY = 1024
+
+DEFAULTSETTINGS = {"DATA_PATH": "",
+                   "SHOW_ASSOC_MESSAGE": True,
+                   "ARCHIVE_PATH": OSCONST.SVR_PATH,
+                   "CHUNK_FREQ": 14,
+                   "CONVERSION_WORKERS": 1,
+                   "QUEUE_CONCURRENCY": 1,
+                   "LINK_EXTRAS": False,
+                   "PREFETCH": False,
+                   "PREFETCH_MEMORY": PREFETCH_MEMORY}
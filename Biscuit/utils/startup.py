@@ -0,0 +1,144 @@
+"""
+Profiling of how long Biscuit takes to start.
+
+When the GUI is run with `--profile-startup` the time taken by each phase of
+starting up (importing the GUI, loading the settings, generating the
+treeview, loading the saved data and drawing the window for the first time)
+and the slowest modules imported along the way are printed once the window
+has appeared.
+
+The phases are marked in the code with `phase`, which does nothing unless
+the profiling has been started.
+"""
+
+import builtins
+from contextlib import contextmanager
+from importlib.util import resolve_name
+import sys
+from threading import get_ident
+import time
+
+# number of modules listed in the report
+TOP_IMPORTS = 15
+
+_profiler = None
+
+
+class StartupProfiler():
+    """Time the phases of starting up and the modules imported.
+
+    Only the imports made from the thread the profiler is started in are
+    timed. The time for each module includes the time taken to import any
+    modules it imports (as with `python -X importtime`).
+    """
+    def __init__(self):
+        self.phases = []
+        self.imports = dict()
+        self._depth = 0
+        self._thread = None
+        self._import = None
+        self._start = None
+
+    def start(self):
+        self._start = time.perf_counter()
+        self._thread = get_ident()
+        self._import = builtins.__import__
+        builtins.__import__ = self._timed_import
+
+    def stop(self):
+        """Stop timing the imports and return the total time taken (s)."""
+        if self._import is not None:
+            builtins.__import__ = self._import
+            self._import = None
+        return time.perf_counter() - self._start
+
+    @contextmanager
+    def phase(self, name):
+        """Time the code run within the context as a phase."""
+        # the entry is added first so the phases are listed in the order they
+        # start in
+        entry = [name, self._depth, 0]
+        self.phases.append(entry)
+        self._depth += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry[2] = time.perf_counter() - start
+            self._depth -= 1
+
+    def report(self, file=None):
+        """Stop the profiling and print the time taken."""
+        file = file or sys.stdout
+        total = self.stop()
+        print('Startup time', file=file)
+        for name, depth, elapsed in self.phases:
+            print('  {0:<40} {1:>10.1f} ms'.format('  ' * depth + name,
+                                                   elapsed * 1000),
+                  file=file)
+        print('  {0:<40} {1:>10.1f} ms'.format('total', total * 1000),
+              file=file)
+        print('Slowest imports', file=file)
+        slowest = sorted(self.imports.items(), key=lambda x: x[1],
+                         reverse=True)[:TOP_IMPORTS]
+        for name, elapsed in slowest:
+            print('  {0:<40} {1:>10.1f} ms'.format(name, elapsed * 1000),
+                  file=file)
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(),
+                      level=0):
+        if get_ident() != self._thread:
+            return self._import(name, globals, locals, fromlist, level)
+        full_name = name
+        if level > 0:
+            try:
+                full_name = resolve_name(
+                    '.' * level + name, (globals or dict()).get('__package__'))
+            except (ImportError, ValueError):
+                pass
+        # the modules which will be imported if they aren't already
+        new = [mod for mod in
+               [full_name] + ['{0}.{1}'.format(full_name, attr) for attr in
+                              fromlist or () if attr != '*'] if
+               mod not in sys.modules]
+        if len(new) == 0:
+            return self._import(name, globals, locals, fromlist, level)
+        start = time.perf_counter()
+        try:
+            return self._import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            for mod in new:
+                if mod in sys.modules:
+                    self.imports[mod] = self.imports.get(mod, 0) + elapsed
+                    # any other modules were imported by this one
+                    break
+
+
+def start_profiling():
+    """Start profiling the start up and return the profiler."""
+    global _profiler
+    _profiler = StartupProfiler()
+    _profiler.start()
+    return _profiler
+
+
+def report(file=None):
+    """Print the time taken to start up if it is being profiled."""
+    global _profiler
+    if _profiler is not None:
+        _profiler.report(file)
+        _profiler = None
+
+
+@contextmanager
+def phase(name):
+    """Time the code run within the context as a phase of starting up.
+
+    Nothing is timed unless `start_profiling` has been called.
+    """
+    if _profiler is None:
+        yield
+    else:
+        with _profiler.phase(name):
+            yield
@@ -1,17 +1,26 @@
-from functools import wraps
+from functools import lru_cache
+import json
+import os
 import os.path as op
 from os import makedirs
 from math import log
 from tkinter import messagebox
 from copy import copy
-from threading import Thread
 from datetime import datetime
+from struct import unpack
+import sys
+import tempfile
 
-import numpy as np
-from mne.io.kit.kit import get_kit_info
+from Biscuit.utils.header_cache import cached_header
 
-from bidshandler import BIDSTree, Project, Subject, Session, Scan, MappingError
-from bidshandler.utils import _get_bids_params
+# offset of the creation time from the start of the system information in a
+# KIT file (after the version, revision, system id, system name, model name,
+# channel count and comment)
+MRK_CREATE_TIME = 0x210
+
+# permissions of newly created files (mkstemp only gives the user access)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
 
 
 def assign_bids_data(new_sids, treeview, data):
@@ -29,6 +38,13 @@ def assign_bids_data(new_sids, treeview, data):
         The preloaded data from the main window instance. Any new data is added
         to this automatically.
     """
+    # There can't be any BIDS objects for the new entries to belong to until
+    # bidshandler has been imported (see `is_bids_object`).
+    if 'bidshandler' not in sys.modules:
+        return
+    from bidshandler import BIDSTree, Project, Subject, Session
+    from bidshandler.utils import _get_bids_params
+
     # Go over each of the new entries in the tree from the top down, and
     # determine if they are BIDS objects.
     for sid in new_sids:
@@ -80,6 +96,8 @@ def assign_bids_folder(fpath, treeview, data):
     Assign the filepath as a BIDS folder and associate all children as the
     required type.
     """
+    from bidshandler import BIDSTree, MappingError
+
     try:
         bids_folder = BIDSTree(fpath)
     except MappingError:
@@ -109,6 +127,33 @@ def assign_bids_folder(fpath, treeview, data):
     return bids_folder
 
 
+def atomic_write_json(fname, obj, **kwargs):
+    """Write the object to a json file, replacing the file only once it is
+    complete. Any keyword arguments are passed to `json.dumps`."""
+    atomic_write_text(fname, json.dumps(obj, **kwargs) + '\n')
+
+
+def atomic_write_text(fname, text):
+    """Write the text to the file, replacing the file only once it is
+    complete.
+
+    The text is written to a temporary file in the same folder which is then
+    moved over the file, so the file is never left partially written and
+    processes writing the same file at once don't share a temporary file.
+    """
+    fd, temp_fname = tempfile.mkstemp(
+        dir=op.dirname(op.abspath(fname)),
+        prefix='.{0}.'.format(op.basename(fname)), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(text)
+        os.chmod(temp_fname, 0o666 & ~_UMASK)
+        os.replace(temp_fname, fname)
+    except BaseException:
+        os.remove(temp_fname)
+        raise
+
+
 def copy_dict(dict_):
     """Return a faithful copy of a dictionary.
     This is different to a deep copy in that it will return `copy` of the
@@ -204,6 +249,8 @@ def generate_readme(data):
 
 def get_bidsobj_info(obj):
     """Return a string representation of a BIDS object from bidshandler."""
+    from bidshandler import Project, Subject, Session, Scan
+
     if isinstance(obj, Project):
         return ' '.join(
             ['Project',
@@ -244,13 +291,13 @@ def get_mrk_meas_date(mrk):
 
     Parameters
     ----------
-    mrk : instance of mrk_file
-        Marker file to find date of.
+    mrk : str | instance of mrk_file
+        Marker file (or path to the marker file) to find date of.
     """
-    info = get_kit_info(mrk.file, False)[0]
-    meas_date = info.get('meas_date', None)
-    if isinstance(meas_date, (tuple, list, np.ndarray)):
-        meas_date = meas_date[0]
+    fname = getattr(mrk, 'file', mrk)
+    stat = os.stat(fname)
+    meas_date = _mrk_meas_date(op.realpath(fname), stat.st_size,
+                               stat.st_mtime_ns)
     if meas_date is not None:
         meas_datetime = datetime.fromtimestamp(meas_date)
     else:
@@ -258,6 +305,32 @@ def get_mrk_meas_date(mrk):
     return meas_datetime
 
 
+@lru_cache(maxsize=None)
+def _mrk_meas_date(fname, size, mtime):
+    """Return the measurement date of the marker file.
+    The size and modification time are only passed so that the date is read
+    again if the file changes."""
+    return cached_header(fname, 'mrk', _read_mrk_header)['meas_date']
+
+
+def _read_mrk_header(fname):
+    """Read the measurement date from the header of a KIT marker file.
+    Only the offset of the system information and the creation time within
+    it are read."""
+    with open(fname, 'rb') as f:
+        # the offset of the system information is in the second directory
+        # entry
+        f.seek(0x10)
+        data = f.read(4)
+        if len(data) == 4:
+            f.seek(unpack('<i', data)[0] + MRK_CREATE_TIME)
+            data = f.read(4)
+    if len(data) != 4:
+        # the file is too short to contain a date
+        return {'meas_date': None}
+    return {'meas_date': float(unpack('<i', data)[0])}
+
+
 def get_object_class(dtype):
     from Biscuit.FileTypes import (con_file, mrk_file, elp_file, hsp_file,
                                    tsv_file, json_file, generic_file, FIFData)
@@ -275,6 +348,36 @@ def get_object_class(dtype):
         return 'folder'
 
 
+def is_bids_object(obj, *names):
+    """Whether the object is an instance of any of the named bidshandler
+    classes (eg. 'BIDSTree', 'Session').
+
+    bidshandler is slow to import so it is only imported once some BIDS data
+    is loaded. Until then nothing can be a BIDS object.
+    """
+    if 'bidshandler' not in sys.modules:
+        return False
+    import bidshandler
+    return isinstance(obj, tuple(getattr(bidshandler, name) for name in names))
+
+
+def memory_usage():
+    """Return the resident memory used by Biscuit (bytes), or None if it
+    can't be found."""
+    try:
+        import psutil
+    except ImportError:
+        pass
+    else:
+        return psutil.Process().memory_info().rss
+    # without psutil it can still be found on linux
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
 def str_to_obj(string):
     """
     Convert the string representation of a number to a number if required.
@@ -285,20 +388,6 @@ def str_to_obj(string):
         return string
 
 
-def threaded(func):
-    """
-    Simple function to be used as a decorator to allow the
-    decorated function to be threaded automatically
-    """
-
-    @wraps(func)
-    def wrapper(*args, **kwargs):
-        thread = Thread(target=func, args=args, kwargs=kwargs)
-        thread.start()
-        return thread
-    return wrapper
-
-
 def validate_markers(filetree, markers, confiles=[]):
     """Check whether the selected markers are in the same folder"""
     cont = True
@@ -0,0 +1,127 @@
+"""
+Benchmark of calculating the quality statistics of the channels of KIT data.
+
+Compares `kit_channel_stats` (a chunk of samples mapped at a time) against
+loading all the data into memory first. The time per file and the peak
+resident memory of each method are shown. Each method is run in its own
+process so that the peak memory of one doesn't affect the other.
+
+Usage:
+
+    python benchmarks/channel_stats.py [FILE.con ...] [--seconds N]
+
+If no files are given a recording with 192 channels sampled at 1000 Hz is
+generated.
+"""
+
+from argparse import ArgumentParser, SUPPRESS
+import json
+import os.path as op
+import resource
+import subprocess
+import sys
+import tempfile
+from time import perf_counter
+
+sys.path.insert(0, op.dirname(op.dirname(op.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+from mne.io.kit.constants import KIT  # noqa: E402
+
+from Biscuit.FileTypes.channel_stats import (kit_channel_stats,  # noqa: E402
+                                             channel_stats)
+from Biscuit.FileTypes.kit_header import read_kit_header  # noqa: E402
+
+
+def load_all(fname, data_info):
+    """Calculate the statistics with all the data loaded at once."""
+    data = np.fromfile(fname, dtype=data_info['dtype'],
+                       offset=data_info['data_offset'],
+                       count=data_info['n_samples'] * data_info['nchan'])
+    data = data.reshape(-1, data_info['nchan']) * data_info['ad_to_volt']
+    return channel_stats([data], data_info['sfreq'], data_info['nchan'])
+
+
+METHODS = {'chunked memmap': kit_channel_stats,
+           'load all': load_all}
+
+
+def make_data(fname, seconds, nchans=192, sfreq=1000):
+    """Write the raw data of a KIT file and return its data_info."""
+    n_samples = int(seconds * sfreq)
+    data_info = {'data_offset': 0x100,
+                 'n_samples': n_samples,
+                 'nchan': nchans,
+                 'dtype': '<i2',
+                 'ad_to_volt': 10.0 / 2 ** 12,
+                 'sfreq': float(sfreq),
+                 'sysid': 52,
+                 'ch_types': [KIT.CHANNEL_MAGNETOMETER] * 160 +
+                             [KIT.CHANNEL_NULL] * (nchans - 160)}
+    rng = np.random.RandomState(0)
+    block = rng.randint(-400, 400, (sfreq, nchans)).astype('<i2')
+    with open(fname, 'wb') as f:
+        f.write(b'\x00' * data_info['data_offset'])
+        for _ in range(int(seconds)):
+            f.write(block.tobytes())
+    return data_info
+
+
+def run_child(method, fname, data_info):
+    """Run the method and print the time taken and peak memory (MB)."""
+    start = perf_counter()
+    METHODS[method](fname, data_info)
+    elapsed = perf_counter() - start
+    # ru_maxrss is in kB on linux and bytes on macOS
+    scale = 1024 ** 2 if sys.platform == 'darwin' else 1024
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+    print(json.dumps({'time': elapsed, 'peak': peak}))
+
+
+def main(argv=None):
+    parser = ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('files', metavar='FILE', nargs='*')
+    parser.add_argument('--seconds', type=float, default=600,
+                        help='Length of the generated recording.')
+    parser.add_argument('--child', nargs=3, help=SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child is not None:
+        method, fname, data_info = args.child
+        run_child(method, fname, json.loads(data_info))
+        return
+
+    temp_dir = None
+    if len(args.files) == 0:
+        temp_dir = tempfile.TemporaryDirectory()
+        fname = op.join(temp_dir.name, 'test.con')
+        files = [(fname, make_data(fname, args.seconds))]
+    else:
+        files = [(fname, read_kit_header(fname)['data_info']) for fname in
+                 args.files]
+
+    print('{0:<30} {1:>10} {2:>14}'.format('method', 's per file',
+                                           'peak RSS (MB)'))
+    for fname, data_info in files:
+        print('{0} ({1:.0f} MB)'.format(op.basename(fname),
+                                        op.getsize(fname) / 1024 ** 2))
+        for method in METHODS:
+            out = subprocess.run(
+                [sys.executable, __file__, '--child', method, fname,
+                 json.dumps(data_info)],
+                stdout=subprocess.PIPE, universal_newlines=True)
+            if out.returncode != 0:
+                # most likely killed for running out of memory
+                print('  {0:<28} {1:>25}'.format(
+                    method, 'failed ({0})'.format(out.returncode)))
+                continue
+            result = json.loads(out.stdout.splitlines()[-1])
+            print('  {0:<28} {1:>10.2f} {2:>14.0f}'.format(
+                method, result['time'], result['peak']))
+
+    if temp_dir is not None:
+        temp_dir.cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark of checking the folders in the file treeview for changes.
+
+When the treeview is refreshed every folder which has been listed is
+checked. Compares listing each folder again (as `FileTreeview.refresh` used
+to) against checking the key of each folder from the `DirSnapshot`, as well
+as the time to list the folders through the snapshot the first time and once
+it is stored (eg. the next time Biscuit is started).
+
+Usage:
+
+    python benchmarks/dir_snapshot.py [DATA_PATH] [--folders N] [--files N]
+
+If no DATA_PATH is given a folder containing `--folders` folders each with
+`--files` files is generated. Every folder in DATA_PATH is considered listed.
+"""
+
+from argparse import ArgumentParser
+import os
+import os.path as op
+import sys
+import tempfile
+import time
+from time import perf_counter
+
+sys.path.insert(0, op.dirname(op.dirname(op.abspath(__file__))))
+
+from Biscuit.utils.dir_snapshot import (DirSnapshot,  # noqa: E402
+                                        folder_key, RACY_INTERVAL)
+
+
+def make_data(root, n_folders, n_files):
+    """Create the folders and files and return the paths of the folders."""
+    for i in range(n_folders):
+        folder = op.join(root, 'folder{0:05d}'.format(i))
+        os.makedirs(folder)
+        for j in range(n_files):
+            with open(op.join(folder, 'file{0:05d}.con'.format(j)), 'w'):
+                pass
+    # the folders only get a key once they haven't been modified for a while
+    mtime = time.time() - 2 * RACY_INTERVAL
+    for folder, _, _ in os.walk(root):
+        os.utime(folder, (mtime, mtime))
+
+
+def list_all(folders):
+    for folder in folders:
+        [(entry.name, entry.is_dir()) for entry in os.scandir(folder)]
+
+
+def timed(func, *args):
+    start = perf_counter()
+    result = func(*args)
+    return perf_counter() - start, result
+
+
+def main(argv=None):
+    parser = ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('data_path', metavar='DATA_PATH', nargs='?')
+    parser.add_argument('--folders', type=int, default=1000,
+                        help='Number of folders generated.')
+    parser.add_argument('--files', type=int, default=100,
+                        help='Number of files in each generated folder.')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_path = args.data_path
+        if data_path is None:
+            data_path = op.join(temp_dir, 'data')
+            print('generating {0} files...'.format(args.folders * args.files))
+            make_data(data_path, args.folders, args.files)
+        folders = [folder for folder, _, _ in os.walk(data_path)]
+        fname = op.join(temp_dir, 'snapshot.sqlite')
+
+        snapshot = DirSnapshot(fname)
+        cold, keys = timed(
+            lambda: [snapshot.listdir(folder)[1] for folder in folders])
+        snapshot.close()
+        snapshot = DirSnapshot(fname)
+        warm, _ = timed(
+            lambda: [snapshot.listdir(folder) for folder in folders])
+        snapshot.close()
+        relist, _ = timed(list_all, folders)
+        check, changed = timed(
+            lambda: [folder for folder, key in zip(folders, keys) if
+                     folder_key(folder) != key])
+
+    print('{0} folders'.format(len(folders)))
+    print('{0:<40} {1:>10}'.format('method', 'ms'))
+    for name, elapsed in (('refresh: list every folder', relist),
+                          ('refresh: check folder keys', check),
+                          ('list through snapshot (first time)', cold),
+                          ('list through snapshot (stored)', warm)):
+        print('{0:<40} {1:>10.1f}'.format(name, elapsed * 1000))
+    print('folders changed: {0}'.format(len(changed)))
+
+
+if __name__ == '__main__':
+    main()
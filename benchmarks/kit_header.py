@@ -0,0 +1,174 @@
+"""
+Benchmark of reading the header of KIT (.con) files.
+
+Compares `read_kit_header` (two bulk reads) against reading each value with
+its own seek and read, as `con_file.load_data` used to. The time per file
+and the number of reads made are shown for each method. On a network share
+each read is a round trip to the server, so the number of reads matters more
+than the local time.
+
+Usage:
+
+    python benchmarks/kit_header.py [FILE.con ...] [--repeat N]
+
+If no files are given a header with 192 channels is generated.
+"""
+
+from argparse import ArgumentParser
+import os.path as op
+import sys
+import tempfile
+from struct import pack_into, unpack
+from time import perf_counter
+
+sys.path.insert(0, op.dirname(op.dirname(op.abspath(__file__))))
+
+from mne.io.kit.constants import KIT  # noqa: E402
+
+from Biscuit.FileTypes import kit_header  # noqa: E402
+from Biscuit.FileTypes.kit_header import (read_kit_header,  # noqa: E402
+                                          kit_channel_names)
+
+
+class CountingFile():
+    """File which counts the number of reads made."""
+    def __init__(self, fname, mode='rb'):
+        self.f = open(fname, mode, buffering=0)
+        self.reads = 0
+
+    def read(self, size=-1):
+        self.reads += 1
+        return self.f.read(size)
+
+    def seek(self, *args):
+        return self.f.seek(*args)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.f.close()
+
+
+def read_seek(fname, opener=open):
+    """Read the header values the way `con_file.load_data` used to."""
+    with opener(fname, 'rb') as file:
+        file.seek(0x70)
+        offset = unpack('i', file.read(4))[0]
+        file.seek(offset)
+        unpack('i', file.read(4))
+        file.seek(0x20C)
+        unpack('128s', file.read(0x80))
+        unpack('128s', file.read(0x80))
+        nchans = unpack('i', file.read(4))[0]
+        file.seek(0x100, 1)
+        unpack('i', file.read(0x4))
+        file.seek(0x1D0)
+        unpack('i', file.read(0x4))
+        file.seek(0x10)
+        sys_offset, = unpack('i', file.read(4))
+        file.seek(sys_offset)
+        version, revision, sysid = unpack('3i', file.read(12))
+        file.seek(sys_offset + 0x2CC)
+        if version < 2 or (version == 2 and revision <= 3):
+            unpack('i', file.read(4))
+        else:
+            unpack('d', file.read(8))
+        unpack('3i', file.read(12))
+        file.seek(0x80)
+        acq_offset, = unpack('i', file.read(4))
+        file.seek(acq_offset)
+        acq_type, = unpack('i', file.read(4))
+        unpack('d', file.read(8))
+        if acq_type == KIT.CONTINUOUS:
+            file.seek(4, 1)
+            unpack('i', file.read(4))
+        else:
+            unpack('4i', file.read(16))
+        file.seek(0x90)
+        unpack('i', file.read(4))
+        file.seek(0x40)
+        chan_offset, chan_size = unpack('2i', file.read(8))
+        ch_types = []
+        for i in range(nchans):
+            file.seek(chan_offset + i * chan_size)
+            ch_types.append(unpack('i', file.read(4))[0])
+    return kit_channel_names(ch_types)
+
+
+def read_bulk(fname):
+    return kit_channel_names(read_kit_header(fname)['data_info']['ch_types'])
+
+
+def count_reads(func, fname):
+    """Return the number of reads made by the function."""
+    files = []
+
+    def opener(fname, mode='rb'):
+        files.append(CountingFile(fname, mode))
+        return files[-1]
+    if func is read_seek:
+        read_seek(fname, opener)
+    else:
+        kit_header.open = opener
+        try:
+            func(fname)
+        finally:
+            del kit_header.open
+    return sum(f.reads for f in files)
+
+
+def make_header(fname, nchans=192):
+    """Write the header of a KIT file with `nchans` channels."""
+    sys_offset, amp_offset, acq_offset = 0x500, 0x900, 0x980
+    chan_offset, chan_size = 0x1100, 0x100
+    buf = bytearray(chan_offset + nchans * chan_size)
+    pack_into('<i', buf, 0x10, sys_offset)
+    pack_into('<2i', buf, 0x40, chan_offset, chan_size)
+    pack_into('<i', buf, 0x70, amp_offset)
+    pack_into('<i', buf, 0x80, acq_offset)
+    pack_into('<i', buf, 0x90, len(buf))
+    pack_into('<i', buf, 0x30C, nchans)
+    pack_into('<3i', buf, sys_offset, 2, 4, 52)
+    pack_into('<d3i', buf, sys_offset + 0x2CC, 10., 0, 16, 12)
+    pack_into('<id', buf, acq_offset, KIT.CONTINUOUS, 1000.)
+    for i in range(nchans):
+        pack_into('<i', buf, chan_offset + i * chan_size,
+                  KIT.CHANNEL_MAGNETOMETER if i < 160 else KIT.CHANNEL_NULL)
+    with open(fname, 'wb') as f:
+        f.write(buf)
+
+
+def main(argv=None):
+    parser = ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('files', metavar='FILE', nargs='*')
+    parser.add_argument('--repeat', type=int, default=200,
+                        help='Number of times each file is read.')
+    args = parser.parse_args(argv)
+
+    files = args.files
+    temp_dir = None
+    if len(files) == 0:
+        temp_dir = tempfile.TemporaryDirectory()
+        files = [op.join(temp_dir.name, 'test.con')]
+        make_header(files[0])
+
+    print('{0:<30} {1:>12} {2:>8}'.format('method', 'ms per file', 'reads'))
+    for fname in files:
+        print(op.basename(fname))
+        assert read_seek(fname) == read_bulk(fname)
+        for name, func in (('seek per value', read_seek),
+                           ('bulk read', read_bulk)):
+            start = perf_counter()
+            for _ in range(args.repeat):
+                func(fname)
+            elapsed = (perf_counter() - start) / args.repeat
+            print('  {0:<28} {1:>12.3f} {2:>8}'.format(
+                name, elapsed * 1000, count_reads(func, fname)))
+
+    if temp_dir is not None:
+        temp_dir.cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+Benchmark of the time taken for the Biscuit window to first appear.
+
+Each measurement is made in a new Python process so that nothing has already
+been imported. The time to import the GUI (`Biscuit.Windows.MainWindow`) is
+always measured, along with any of the modules which are slow to import that
+were imported with it. If a display is available the time until the main
+window has been drawn for the first time is also measured, with the settings
+and saved data kept in a temporary folder.
+
+Usage:
+
+    python benchmarks/startup.py [DATA_PATH] [--repeat N]
+
+If no DATA_PATH is given an empty folder is used.
+"""
+
+from argparse import ArgumentParser
+import json
+import os
+import os.path as op
+import pickle
+import subprocess
+import sys
+import tempfile
+from statistics import median
+
+ROOT = op.dirname(op.dirname(op.abspath(__file__)))
+
+# modules which are slow to import and aren't needed to show the window
+SLOW_MODULES = ['mne', 'mne_bids', 'pandas', 'bidshandler', 'numpy', 'PIL',
+                'pygments', 'requests']
+
+IMPORT_GUI = """
+import sys, time
+start = time.perf_counter()
+import Biscuit.Windows.MainWindow
+elapsed = time.perf_counter() - start
+slow = [mod for mod in SLOW_MODULES if mod in sys.modules]
+print(json.dumps({'time': elapsed, 'slow': slow}))
+"""
+
+FIRST_WINDOW = """
+import time
+start = time.perf_counter()
+from tkinter import Tk
+from Biscuit.Windows import MainWindow
+root = Tk()
+m = MainWindow(master=root)
+root.update()
+elapsed = time.perf_counter() - start
+root.destroy()
+print(json.dumps({'time': elapsed}))
+"""
+
+
+def run(code, env):
+    """Run the code in a new process and return what it printed."""
+    code = 'import json\nSLOW_MODULES = {0!r}\n{1}'.format(SLOW_MODULES, code)
+    # the paths to the icons are relative to the Biscuit folder
+    out = subprocess.run([sys.executable, '-c', code], env=env,
+                         cwd=op.join(ROOT, 'Biscuit'),
+                         check=True, stdout=subprocess.PIPE,
+                         universal_newlines=True)
+    return json.loads(out.stdout.splitlines()[-1])
+
+
+def has_display():
+    from tkinter import Tk, TclError
+    try:
+        Tk().destroy()
+    except TclError:
+        return False
+    return True
+
+
+def make_home(home, data_path, env):
+    """Use `home` as the user folder and create the settings needed for the
+    window to open without asking for the data folder."""
+    env['HOME'] = env['USERPROFILE'] = env['APPDATA'] = home
+    if sys.platform == 'win32':
+        usrdir = op.join(home, 'Biscuit')
+    elif sys.platform == 'darwin':
+        usrdir = op.join(home, 'Library', 'Biscuit')
+    else:
+        usrdir = op.join(home, '.Biscuit')
+    os.makedirs(usrdir)
+    with open(op.join(usrdir, 'settings.pkl'), 'wb') as f:
+        pickle.dump({'DATA_PATH': data_path}, f)
+
+
+def main(argv=None):
+    parser = ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('data_path', metavar='DATA_PATH', nargs='?')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Number of times each measurement is made.')
+    args = parser.parse_args(argv)
+
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [ROOT] + [p for p in [env.get('PYTHONPATH')] if p])
+
+    results = [run(IMPORT_GUI, env) for _ in range(args.repeat)]
+    print('{0:<30} {1:>10}'.format('measurement', 'median ms'))
+    print('{0:<30} {1:>10.1f}'.format(
+        'import GUI', median(r['time'] for r in results) * 1000))
+    slow = results[-1]['slow']
+    print('slow modules imported: {0}'.format(', '.join(slow) or 'none'))
+
+    if not has_display():
+        print('No display available, the time to the first window is not '
+              'measured.')
+        return
+    with tempfile.TemporaryDirectory() as home:
+        data_path = args.data_path
+        if data_path is None:
+            data_path = op.join(home, 'data')
+            os.makedirs(data_path)
+        make_home(home, op.abspath(data_path), env)
+        results = [run(FIRST_WINDOW, env) for _ in range(args.repeat)]
+    print('{0:<30} {1:>10.1f}'.format(
+        'first window', median(r['time'] for r in results) * 1000))
+
+
+if __name__ == '__main__':
+    main()
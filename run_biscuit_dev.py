@@ -1,13 +1,9 @@
 # script to allow for testing of Biscuit without having to build a wheel
 
 import Biscuit
-from Biscuit.Windows.MainWindow import MainWindow
-from tkinter import Tk
 
-import os
-from os.path import dirname
-os.chdir(dirname(Biscuit.__file__))
-
-root = Tk()
-m = MainWindow(master=root)
-m.mainloop()
+# The guard is required as the conversion worker processes will import this
+# file when they are started.
+if __name__ == "__main__":
+    # any arguments (eg. --profile-startup) are passed on
+    Biscuit.run()
@@ -20,7 +20,7 @@ setuptools.setup(
     download_url=DOWNLOAD_URL,
     packages=setuptools.find_packages(),
     install_requires=['numpy', 'scipy', 'matplotlib', 'pandas', 'Pygments',
-                      'Pillow', 'mne>=0.17.0', 'requests', 'mne-bids>=0.10',
+                      'Pillow', 'mne>=0.17.0', 'requests', 'mne-bids>=0.11',
                       'bidshandler>=0.2.1'],
     license="MIT",
     platform="any",
@@ -30,6 +30,7 @@ setuptools.setup(
         "Operating System :: OS Independent",
     ],
     entry_points={
-        'console_scripts': ['Biscuit = Biscuit.__init__:run']
+        'console_scripts': ['Biscuit = Biscuit.__init__:run',
+                            'biscuit-convert = Biscuit.__init__:run_convert']
     }
 )